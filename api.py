@@ -9,11 +9,25 @@ from datetime import datetime
 import os
 from scraper import Scraper
 from url_collector import URLCollector
+from category_scheduler import AgendadorCategorias, executor_categorias
+from worker_pool import BrowserWorkerPool, MAX_WORKERS
+from job_runner import job_runner
+from page_readiness import metricas_espera
+from resource_blocking import economia_recursos
+from driver_lease import driver_manager, DRIVERS_AQUECIDOS
 from scraping_log import logger
+from product_store import store, COLUNAS_NUMERICAS
+from url_frontier import FronteiraURLs
+from dataset_cache import dataset
+from product_serializer import serializar_produtos, resposta_json
+from data_export import FORMATOS, GERADORES, cache_excel, ler_arquivo
+from numeric_index import BASES, valores_da_base, ordenar_pagina, interpretar_ordenacao, codificar_cursor, decodificar_cursor
+from crawl_journal import diario_coleta
+from progress_bus import BarramentoProgresso
+from http_cache import formatar_etag, cabecalhos_cache, nao_modificado, resposta_nao_modificada
 import socketio
 import uvicorn
 from dotenv import load_dotenv
-import io
 import asyncio
 from threading import Thread
 import webbrowser
@@ -35,10 +49,51 @@ app = FastAPI(
 # Montando o Socket.IO com o FastAPI
 socket_app = socketio.ASGIApp(sio, app)
 
+# Mensagens de progresso da coleta, enviadas em lotes pelo Socket.IO
+barramento_progresso = BarramentoProgresso(sio.emit)
+
 # Configuração dos templates e arquivos estáticos
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+# Rotas de leitura respondidas a partir da base: revalidadas pela versão dos dados
+ROTAS_DA_BASE = ("/produtos", "/api/produtos", "/api/exportar", "/api/download-excel", "/download-excel")
+# Rotas com conteúdo fixo no código: só mudam quando a API é reiniciada
+ROTAS_ESTATICAS = ("/categorias", "/api/categorias")
+INICIO_API = time.time()
+
+@app.middleware("http")
+async def cache_http(request: Request, call_next):
+    """
+    ETag e Last-Modified nas rotas de leitura, com 304 para requisições condicionais.
+    
+    A versão é obtida antes de a rota ler os dados; se a base mudar no meio
+    do caminho, a resposta sai com uma versão anterior e o cliente apenas
+    baixa o conteúdo de novo na próxima revalidação.
+    """
+    caminho = request.url.path
+    if request.method not in ("GET", "HEAD"):
+        return await call_next(request)
+    if caminho in ROTAS_DA_BASE or caminho.startswith("/api/produtos/"):
+        # Com a base em dia, a versão sai da memória sem passar pelo pool de threads
+        validadores = dataset.validadores_em_memoria()
+        if validadores is None:
+            validadores = await job_runner.executar(dataset.validadores)
+        versao, modificado_em = validadores
+    elif caminho in ROTAS_ESTATICAS:
+        versao, modificado_em = f"inicio-{int(INICIO_API)}", INICIO_API
+    else:
+        return await call_next(request)
+    
+    etag = formatar_etag(versao)
+    if nao_modificado(request.headers, etag, modificado_em):
+        return resposta_nao_modificada(etag, modificado_em)
+    
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(cabecalhos_cache(etag, modificado_em))
+    return response
+
 class ProdutoBase(BaseModel):
     url: str
     nome: str
@@ -67,7 +122,8 @@ class ColetaRequest(BaseModel):
 
 # Variável global para controlar o estado da coleta
 coleta_ativa = False
-scraper_instance = None
+worker_pool = None
+agendador_categorias = None
 
 def get_system_metrics():
     """Obtém as métricas do sistema"""
@@ -199,8 +255,13 @@ async def coletar_urls(categoria: URLCategoria):
     - **modo_teste**: Se True, limita a quantidade de URLs coletadas
     """
     try:
-        collector = URLCollector(modo_teste=bool(categoria.modo_teste))
-        urls = collector.coletar_urls(categoria.url)
+        collector = URLCollector()
+        urls = await job_runner.executar(
+            collector.coletar_urls,
+            categoria.url,
+            modo_teste=bool(categoria.modo_teste),
+            categoria_nome=categoria.nome
+        )
         
         # Converte para o formato da API
         produtos = []
@@ -231,39 +292,25 @@ async def coletar_dados(urls: List[ProdutoBase]):
         temp_urls_file = f"urls_temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         df_urls.to_csv(temp_urls_file, index=False)
         
-        # Faz o scraping
-        scraper = Scraper()
-        scraper.processar_arquivo_urls(temp_urls_file)
+        # Faz o scraping fora do loop de eventos
+        def executar_scraping():
+            scraper = Scraper()
+            scraper.processar_arquivo_urls(temp_urls_file)
+        
+        await job_runner.executar(executar_scraping)
         
         # Lê os resultados
-        if os.path.exists("dados_nutricionais.csv"):
-            df_dados = pd.read_csv("dados_nutricionais.csv")
+        if not store.vazio():
+            df_dados = await job_runner.executar(dataset.obter)
             
-            # Converte para o formato da API
-            produtos = []
-            for _, row in df_dados.iterrows():
-                produto = DadoNutricional(
-                    nome=str(row['NOME_PRODUTO']),
-                    url=str(row['URL']),
-                    porcao=float(row['PORCAO (g)']),
-                    calorias=float(row['CALORIAS (kcal)']),
-                    carboidratos=float(row['CARBOIDRATOS (g)']),
-                    proteinas=float(row['PROTEINAS (g)']),
-                    gorduras=float(row['GORDURAS_TOTAIS (g)']),
-                    gorduras_saturadas=float(row['GORDURAS_SATURADAS (g)']),
-                    fibras=float(row['FIBRAS (g)']),
-                    acucares=float(row['ACUCARES (g)']),
-                    sodio=float(row['SODIO (mg)']),
-                    categoria=str(row.get('categoria', '')),
-                    data_coleta=datetime.now().isoformat()
-                )
-                produtos.append(produto)
+            # Converte para o formato da API, por colunas
+            produtos = serializar_produtos(df_dados)
             
             # Remove arquivo temporário
             if os.path.exists(temp_urls_file):
                 os.remove(temp_urls_file)
             
-            return produtos
+            return resposta_json(produtos)
         else:
             raise HTTPException(status_code=404, detail="Nenhum dado foi coletado")
     
@@ -288,10 +335,15 @@ async def coletar_categoria_completa(categoria: URLCategoria):
         
         # Primeiro coleta as URLs
         logger.info("🌐 Inicializando coletor de URLs...")
-        collector = URLCollector(modo_teste=bool(categoria.modo_teste))
+        collector = URLCollector()
         
         logger.info(f"📑 Coletando URLs da categoria {categoria.nome}...")
-        urls = collector.coletar_urls(categoria.url)
+        urls = await job_runner.executar(
+            collector.coletar_urls,
+            categoria.url,
+            modo_teste=bool(categoria.modo_teste),
+            categoria_nome=categoria.nome
+        )
         logger.info(f"✅ URLs coletadas com sucesso! Total: {len(urls)} produtos encontrados")
         
         # Converte para o formato da API
@@ -314,35 +366,21 @@ async def coletar_categoria_completa(categoria: URLCategoria):
         temp_urls_file = f"urls_temp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         df_urls.to_csv(temp_urls_file, index=False)
         
-        # Faz o scraping
-        scraper = Scraper()
-        logger.info("🔄 Processando arquivo de URLs...")
-        scraper.processar_arquivo_urls(temp_urls_file)
+        # Faz o scraping fora do loop de eventos
+        def executar_scraping():
+            scraper = Scraper()
+            logger.info("🔄 Processando arquivo de URLs...")
+            scraper.processar_arquivo_urls(temp_urls_file)
+        
+        await job_runner.executar(executar_scraping)
         
         # Lê os resultados
-        if os.path.exists("dados_nutricionais.csv"):
+        if not store.vazio():
             logger.info("📊 Lendo dados coletados...")
-            df_dados = pd.read_csv("dados_nutricionais.csv")
+            df_dados = await job_runner.executar(dataset.obter)
             
-            # Converte para o formato da API
-            produtos_coletados = []
-            for _, row in df_dados.iterrows():
-                produto = DadoNutricional(
-                    nome=str(row['NOME_PRODUTO']),
-                    url=str(row['URL']),
-                    porcao=float(row['PORCAO (g)']),
-                    calorias=float(row['CALORIAS (kcal)']),
-                    carboidratos=float(row['CARBOIDRATOS (g)']),
-                    proteinas=float(row['PROTEINAS (g)']),
-                    gorduras=float(row['GORDURAS_TOTAIS (g)']),
-                    gorduras_saturadas=float(row['GORDURAS_SATURADAS (g)']),
-                    fibras=float(row['FIBRAS (g)']),
-                    acucares=float(row['ACUCARES (g)']),
-                    sodio=float(row['SODIO (mg)']),
-                    categoria=str(row.get('categoria', '')),
-                    data_coleta=datetime.now().isoformat()
-                )
-                produtos_coletados.append(produto)
+            # Converte para o formato da API, por colunas
+            produtos_coletados = serializar_produtos(df_dados)
             
             # Remove arquivo temporário
             if os.path.exists(temp_urls_file):
@@ -350,7 +388,7 @@ async def coletar_categoria_completa(categoria: URLCategoria):
                 logger.info("🧹 Arquivos temporários removidos")
             
             logger.info(f"✨ Coleta finalizada com sucesso! {len(produtos_coletados)} produtos processados")
-            return produtos_coletados
+            return resposta_json(produtos_coletados)
         else:
             raise HTTPException(status_code=404, detail="Nenhum dado foi coletado")
     
@@ -369,12 +407,14 @@ async def listar_produtos(
     Lista os produtos e seus dados nutricionais com opções de paginação e filtros
     """
     try:
-        # Verifica se o arquivo de dados existe
-        if not os.path.exists("dados_nutricionais.csv"):
+        # Verifica se há dados armazenados
+        if store.vazio():
             raise HTTPException(status_code=404, detail="Nenhum dado nutricional disponível")
         
-        # Lê o arquivo CSV
-        df = pd.read_csv("dados_nutricionais.csv")
+        # Lê os produtos do cache em memória (frame compartilhado: não alterar), com os
+        # filtros aplicados pelo índice de busca; sem busca por nome, a ordem é por
+        # data de coleta decrescente (mais recente primeiro)
+        df, ordem = await job_runner.executar(dataset.consultar, nome=nome, categoria=categoria)
         
         # Verifica se as colunas necessárias existem
         colunas_esperadas = [
@@ -387,82 +427,17 @@ async def listar_produtos(
         if colunas_faltantes:
             raise HTTPException(
                 status_code=500, 
-                detail=f"Colunas faltantes no CSV: {', '.join(colunas_faltantes)}"
+                detail=f"Colunas faltantes nos dados: {', '.join(colunas_faltantes)}"
             )
         
-        # Aplica filtros se fornecidos
-        if categoria:
-            df = df[df['categoria'].str.contains(categoria, case=False, na=False)]
-        if nome:
-            df = df[df['nome'].str.contains(nome, case=False, na=False)]
-        
-        # Ordena por data de coleta decrescente (mais recente primeiro)
-        try:
-            # Converte datas para datetime, lidando com formatos mistos
-            df['data_coleta_dt'] = pd.to_datetime(df['data_coleta'], format='mixed', errors='coerce')
-            # Se falhar, tenta formatos específicos
-            mask_na = df['data_coleta_dt'].isna()
-            if mask_na.any():
-                # Tenta formato apenas data
-                df.loc[mask_na, 'data_coleta_dt'] = pd.to_datetime(
-                    df.loc[mask_na, 'data_coleta'], 
-                    format='%Y-%m-%d', 
-                    errors='coerce'
-                )
-            
-            # Ordena por data decrescente
-            df = df.sort_values('data_coleta_dt', ascending=False, na_position='last')
-            df = df.drop('data_coleta_dt', axis=1)  # Remove coluna auxiliar
-        except Exception as e:
-            logger.warning(f"Erro ao ordenar por data: {e}. Mantendo ordem original.")
-        
         # Aplica paginação
-        total = len(df)
-        df = df.iloc[skip:skip + limit]
+        df = df.iloc[ordem[skip:skip + limit]]
         
-        # Converte para o formato da API
-        produtos = []
-        for _, row in df.iterrows():
-            try:
-                # Garante que os valores numéricos sejam float
-                valores_numericos = {
-                    'porcao': float(row['porcao']),
-                    'calorias': float(row['calorias']),
-                    'carboidratos': float(row['carboidratos']),
-                    'proteinas': float(row['proteinas']),
-                    'gorduras': float(row['gorduras']),
-                    'gorduras_saturadas': float(row['gorduras_saturadas']),
-                    'fibras': float(row['fibras']),
-                    'acucares': float(row['acucares']),
-                    'sodio': float(row['sodio'])
-                }
-                
-                # Garante que a data seja string
-                data_coleta = str(row['data_coleta']) if pd.notna(row['data_coleta']) else None
-                
-                produto = DadoNutricional(
-                    nome=str(row['nome']),
-                    url=str(row['url']),
-                    porcao=valores_numericos['porcao'],
-                    calorias=valores_numericos['calorias'],
-                    carboidratos=valores_numericos['carboidratos'],
-                    proteinas=valores_numericos['proteinas'],
-                    gorduras=valores_numericos['gorduras'],
-                    gorduras_saturadas=valores_numericos['gorduras_saturadas'],
-                    fibras=valores_numericos['fibras'],
-                    acucares=valores_numericos['acucares'],
-                    sodio=valores_numericos['sodio'],
-                    categoria=str(row.get('categoria', '')),
-                    data_coleta=data_coleta
-                )
-                produtos.append(produto)
-            except Exception as e:
-                logger.error(f"Erro ao converter linha do CSV: {str(e)}")
-                logger.error(f"Dados da linha: {row.to_dict()}")
-                continue
-        
-        return produtos
+        # Converte para o formato da API, por colunas
+        return resposta_json(serializar_produtos(df))
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar produtos: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -470,7 +445,7 @@ async def listar_produtos(
 @app.post("/coletar")
 async def iniciar_coleta(request: Request):
     """Inicia o processo de coleta de dados"""
-    global coleta_ativa, scraper_instance
+    global coleta_ativa, worker_pool
     
     if coleta_ativa:
         raise HTTPException(status_code=400, detail="Já existe uma coleta em andamento")
@@ -483,59 +458,104 @@ async def iniciar_coleta(request: Request):
         if not categorias:
             raise HTTPException(status_code=400, detail="Nenhuma categoria selecionada")
         
+        # Número de navegadores simultâneos (limitado por MAX_WORKERS)
+        try:
+            num_workers = int(form.get("workers") or MAX_WORKERS)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Número de workers inválido")
+        num_workers = max(1, min(num_workers, MAX_WORKERS))
+        
+        # Por padrão reaproveita uma coleta interrompida no mesmo modo (retomar=0 começa do zero)
+        retomar = form.get("retomar", "1") not in ("0", "false")
+        
         # Marca a coleta como ativa
         coleta_ativa = True
-        
-        # Inicializa o scraper
-        scraper_instance = Scraper()
+        worker_pool = None
         
         # Inicia a coleta em background
-        import asyncio
-        asyncio.create_task(realizar_coleta(modo, categorias))
+        asyncio.create_task(realizar_coleta(modo, categorias, num_workers, retomar))
         
-        return {"status": "Coleta iniciada com sucesso"}
+        return {"status": "Coleta iniciada com sucesso", "workers": num_workers}
         
+    except HTTPException:
+        raise
     except Exception as e:
         coleta_ativa = False
-        scraper_instance = None
+        worker_pool = None
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/cancelar-coleta")
-async def cancelar_coleta():
-    """Cancela o processo de coleta em andamento"""
-    global coleta_ativa, scraper_instance
+async def cancelar_coleta(
+    worker_id: Optional[int] = Query(None, description="Cancela apenas o worker informado")
+):
+    """Cancela o processo de coleta em andamento (ou apenas um worker)"""
+    global coleta_ativa, worker_pool, agendador_categorias
     
     if not coleta_ativa:
         raise HTTPException(status_code=400, detail="Não há coleta em andamento")
     
     try:
+        # Cancelamento de um único worker: os demais continuam consumindo a fila
+        if worker_id is not None:
+            if not worker_pool or not worker_pool.cancelar_worker(worker_id):
+                raise HTTPException(status_code=404, detail="Worker não encontrado")
+            await emit_log_update(f"Worker {worker_id} cancelado pelo usuário", "warning")
+            return {"status": f"Worker {worker_id} cancelado com sucesso"}
+        
         # Primeiro marca como inativa para interromper o loop de coleta
         coleta_ativa = False
         
-        # Aguarda um momento para garantir que o loop de coleta foi interrompido
-        await asyncio.sleep(1)
+        # Interrompe as categorias em andamento e as que ainda aguardam vez (fase 1)
+        if agendador_categorias:
+            agendador_categorias.cancelar()
         
-        # Cancela o scraper se existir
-        if scraper_instance:
+        # Cancela todos os workers e fecha os navegadores
+        if worker_pool:
             try:
-                scraper_instance.cancelar()  # Usa o novo método de cancelamento
+                worker_pool.cancelar()
             except Exception as e:
-                logger.error(f"Erro ao cancelar scraper: {str(e)}")
-            finally:
-                scraper_instance = None
+                logger.error(f"Erro ao cancelar workers: {str(e)}")
         
         await emit_log_update("Coleta cancelada pelo usuário", "warning")
         return {"status": "Coleta cancelada com sucesso"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao cancelar coleta: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def realizar_coleta(modo: str, categorias: List[str]):
+@app.get("/api/coleta/diario")
+async def api_diario_coleta():
+    """Situação da última coleta registrada no diário (API endpoint)"""
+    if not coleta_ativa:
+        await job_runner.executar(diario_coleta.carregar)
+    return diario_coleta.resumo()
+
+@app.post("/retomar-coleta")
+async def retomar_coleta():
+    """Retoma a coleta interrompida registrada no diário"""
+    global coleta_ativa, worker_pool
+    
+    if coleta_ativa:
+        raise HTTPException(status_code=400, detail="Já existe uma coleta em andamento")
+    
+    if not await job_runner.executar(diario_coleta.carregar):
+        raise HTTPException(status_code=404, detail="Não há coleta interrompida para retomar")
+    
+    num_workers = max(1, min(int(diario_coleta.workers or MAX_WORKERS), MAX_WORKERS))
+    coleta_ativa = True
+    worker_pool = None
+    asyncio.create_task(realizar_coleta(diario_coleta.modo, diario_coleta.categorias, num_workers))
+    
+    return {"status": "Coleta retomada com sucesso", **diario_coleta.resumo()}
+
+async def realizar_coleta(modo: str, categorias: List[str], num_workers: int = MAX_WORKERS, retomar: bool = True):
     """Realiza a coleta de dados em background com logging detalhado"""
-    global coleta_ativa, scraper_instance
+    global coleta_ativa, worker_pool, agendador_categorias
     
     inicio_coleta = datetime.now()
+    coleta_concluida = False
     estatisticas = {
         'sucessos': 0,
         'falhas': 0,
@@ -543,19 +563,19 @@ async def realizar_coleta(modo: str, categorias: List[str]):
         'categorias_processadas': 0,
         'tempo_medio_por_produto': 0
     }
+    barramento_progresso.reiniciar_estatisticas()
     
     try:
         await emit_log_update("🚀 Iniciando sistema de coleta...", "system")
         
-        # Carrega URLs já coletadas do CSV existente
-        urls_ja_coletadas = set()
-        if os.path.exists('dados_nutricionais.csv'):
-            df_existente = pd.read_csv('dados_nutricionais.csv')
-            urls_ja_coletadas = set(df_existente['url'])
+        # Produtos já coletados (por SKU ou URL canônica), carregados do armazenamento
+        fronteira = FronteiraURLs()
+        if not store.vazio():
+            fronteira = FronteiraURLs(await job_runner.executar(store.chaves))
             await emit_log_update(
-                f"📊 Base de dados carregada: {len(urls_ja_coletadas)} produtos já coletados",
+                f"📊 Base de dados carregada: {len(fronteira)} produtos já coletados",
                 "info",
-                estatisticas={"produtos_existentes": len(urls_ja_coletadas)}
+                estatisticas={"produtos_existentes": len(fronteira)}
             )
         else:
             await emit_log_update("📊 Criando nova base de dados (primeira coleta)", "info")
@@ -574,188 +594,278 @@ async def realizar_coleta(modo: str, categorias: List[str]):
         for i, cat in enumerate(categorias_selecionadas, 1):
             await emit_log_update(f"  📂 {i}. {cat['nome']}", "info")
         
-        await emit_log_update(f"⚙️ Modo de coleta: {'🧪 Teste (limitado)' if modo == 'teste' else '🔥 Completo (ilimitado)'}", "system")
+        # Diário da coleta: permite continuar do ponto em que um processo interrompido parou
+        retomando = await job_runner.executar(diario_coleta.iniciar, modo, categorias, num_workers, retomar)
+        if retomando:
+            await emit_log_update(
+                f"♻️ Retomando coleta interrompida: {len(diario_coleta.urls_categorias)} categorias já percorridas, "
+                f"{len(diario_coleta.concluidas)} produtos já processados",
+                "system"
+            )
         
-        # Lista para armazenar todas as URLs coletadas
-        todas_urls = []
+        await emit_log_update(f"⚙️ Modo de coleta: {'🧪 Teste (limitado)' if modo == 'teste' else '🔥 Completo (ilimitado)'}", "system")
         
-        # FASE 1: Coleta de URLs
+        # Coleta em fluxo contínuo: as categorias são percorridas em paralelo (FASE 1)
+        # e cada lote de produtos descoberto vai direto para a fila limitada dos
+        # workers (FASE 2). Com a fila cheia, os coletores esperam a extração.
         await emit_log_update("📋 FASE 1: Coletando URLs dos produtos...", "system")
         
-        for idx_cat, categoria in enumerate(categorias_selecionadas, 1):
-            if not coleta_ativa:
-                await emit_log_update("⏹️ Coleta interrompida pelo usuário", "warning")
-                if scraper_instance:
-                    scraper_instance.cancelar()
-                break
-                
-            try:
-                progresso_categoria = int((idx_cat - 1) / len(categorias_selecionadas) * 50)  # 50% para coleta URLs
-                
-                await emit_log_update(
-                    f"🔍 Processando categoria: {categoria['nome']}",
-                    "info",
-                    progress=progresso_categoria,
-                    categoria=categoria['nome'],
-                    estatisticas={"fase": "Coleta de URLs", "categoria_atual": f"{idx_cat}/{len(categorias_selecionadas)}"}
-                )
-                
-                # Coleta URLs da categoria
-                collector = URLCollector()
-                
-                # Log inicio da coleta de URLs
-                await emit_log_update(f"  🌐 Abrindo navegador para categoria {categoria['nome']}...", "info")
-                
-                urls = collector.coletar_urls(
-                    url_categoria=categoria["url"], 
-                    modo_teste=(modo == "teste"),
-                    categoria_nome=categoria["nome"]
-                )
-                
-                if not coleta_ativa:
-                    if scraper_instance:
-                        scraper_instance.cancelar()
-                    break
-                
-                # Filtra apenas URLs que ainda não foram coletadas
-                urls_novas = [url for url in urls if url['url'] not in urls_ja_coletadas]
-                urls_existentes = len(urls) - len(urls_novas)
-                
-                estatisticas['produtos_ja_existentes'] += urls_existentes
-                estatisticas['categorias_processadas'] += 1
-                
-                await emit_log_update(
-                    f"  ✅ {categoria['nome']}: {len(urls)} produtos encontrados ({len(urls_novas)} novos, {urls_existentes} já coletados)",
-                    "success",
-                    categoria=categoria['nome'],
-                    collected=len(urls_novas),
-                    total=len(urls)
-                )
-                
-                todas_urls.extend(urls_novas)
-                
-                # Log detalhado dos primeiros produtos encontrados
-                if urls_novas:
-                    await emit_log_update(f"  📝 Exemplos encontrados:", "info")
-                    for i, url_info in enumerate(urls_novas[:3], 1):
-                        await emit_log_update(f"    {i}. {url_info['nome'][:50]}{'...' if len(url_info['nome']) > 50 else ''}", "info")
-                    if len(urls_novas) > 3:
-                        await emit_log_update(f"    ... e mais {len(urls_novas) - 3} produtos", "info")
-                
-            except Exception as e:
-                await emit_log_update(f"❌ Erro ao coletar URLs da categoria {categoria['nome']}: {str(e)}", "error")
-                estatisticas['falhas'] += 1
-                continue
-        
-        # FASE 2: Coleta de dados nutricionais
-        total_urls = len(todas_urls)
-        
-        if total_urls == 0:
-            await emit_log_update("ℹ️ Não há novos produtos para coletar. Base de dados já está atualizada!", "success", progress=100)
-            return
-        
+        # Os coletores e os workers rodam em threads; os eventos voltam para o loop por esta fila
+        loop = asyncio.get_running_loop()
+        eventos = asyncio.Queue()
+        
+        def ao_evento(*evento):
+            loop.call_soon_threadsafe(eventos.put_nowait, evento)
+        
+        def ao_concluir_categoria(categoria, contagem, erro):
+            eventos.put_nowait(('categoria', categoria, contagem, erro))
+        
+        def ao_evento_worker(tipo, worker_id, url_info, *resultado):
+            # O diário é gravado na thread do worker, como os produtos no store: o loop não espera o disco
+            if tipo == 'inicio':
+                diario_coleta.registrar_inicio_produto(url_info['url'])
+            else:
+                dados, erro, _ = resultado
+                diario_coleta.registrar_produto(url_info['url'], dados and not erro)
+            ao_evento(tipo, worker_id, url_info, *resultado)
+        
+        # Os navegadores dos workers só são abertos quando o primeiro produto novo aparece
+        worker_pool = BrowserWorkerPool(num_workers, ao_evento_worker)
+        
+        def enfileirar(lote, contagem):
+            """Envia um lote de produtos aos workers (roda em executor_categorias e pode esperar)."""
+            for url_info in lote:
+                contagem['encontrados'] += 1
+                # Produtos já coletados, já processados nesta coleta ou já enfileirados por outra categoria
+                if diario_coleta.concluido(url_info['url']) or not fronteira.adicionar(url_info['url'], url_info.get('sku')):
+                    contagem['existentes'] += 1
+                    continue
+                contagem['novos'] += 1
+                if len(contagem['exemplos']) < 3:
+                    contagem['exemplos'].append(url_info['nome'])
+                # Avisado antes de entrar na fila para ser contado antes dos eventos do worker
+                ao_evento('enfileirado', None, url_info)
+                if not worker_pool.submeter(url_info):
+                    return
+        
+        async def coletar_categoria(categoria, coletor):
+            await emit_log_update(
+                f"🔍 Processando categoria: {categoria['nome']}",
+                "info",
+                categoria=categoria['nome'],
+                estatisticas={"fase": "Coleta de URLs"}
+            )
+            contagem = {'encontrados': 0, 'novos': 0, 'existentes': 0, 'exemplos': []}
+            
+            # Categoria já percorrida antes da interrupção: usa as URLs do diário
+            urls = diario_coleta.categoria_coletada(categoria["id"])
+            if urls is not None:
+                await emit_log_update(f"  ♻️ {categoria['nome']}: {len(urls)} URLs recuperadas do diário, sem reabrir a categoria", "info")
+                # A fila dos workers pode estar cheia: a espera ocupa a thread da categoria, não o job_runner
+                await executor_categorias.executar(enfileirar, urls, contagem)
+                return contagem
+            
+            await emit_log_update(f"  🌐 Abrindo navegador para categoria {categoria['nome']}...", "info")
+            
+            # Com várias categorias em paralelo, os logs do coletor levam o nome da categoria
+            async def ao_log(mensagem, tipo):
+                await emitir_log_coletor(f"[{categoria['nome']}] {mensagem}", tipo)
+            
+            # Cada lote vai para o diário e para a fila assim que é lido
+            def ao_lote(lote):
+                diario_coleta.registrar_urls(categoria["id"], lote)
+                enfileirar(lote, contagem)
+            
+            # O navegador roda nas threads das categorias; os logs do coletor são repassados ao frontend
+            await executor_categorias.executar(
+                coletor.coletar_urls,
+                url_categoria=categoria["url"],
+                modo_teste=(modo == "teste"),
+                categoria_nome=categoria["nome"],
+                ao_lote=ao_lote,
+                ao_log=ao_log
+            )
+            
+            # Uma categoria sem URLs (erro no coletor) é percorrida de novo na retomada
+            if contagem['encontrados'] and coleta_ativa and not coletor.cancelado:
+                # Gravação com fsync: fora do loop de eventos
+                await executor_categorias.executar(diario_coleta.registrar_categoria, categoria["id"], categoria["nome"])
+            return contagem
+        
+        agendador_categorias = AgendadorCategorias(coletar_categoria, ao_concluir_categoria)
+        agendador_categorias.iniciar(categorias_selecionadas)
         await emit_log_update(
-            f"🍽️ FASE 2: Coletando dados nutricionais de {total_urls} produtos...",
-            "system",
-            progress=50,
-            total=total_urls
+            f"🧭 Até {agendador_categorias.max_simultaneas} categorias em paralelo; "
+            f"a extração começa no primeiro produto encontrado",
+            "info"
         )
         
-        tempo_estimado_por_produto = 8  # segundos por produto estimado
-        tempo_total_estimado = total_urls * tempo_estimado_por_produto
+        total_categorias = len(categorias_selecionadas)
+        categorias_concluidas = 0
+        total_enfileirado = 0
+        iniciados = 0
+        processados = 0
         
-        await emit_log_update(
-            f"⏱️ Tempo estimado: {tempo_total_estimado // 60}min {tempo_total_estimado % 60}s ({tempo_estimado_por_produto}s por produto)",
-            "info",
-            tempo_estimado=f"{tempo_total_estimado // 60}min {tempo_total_estimado % 60}s"
-        )
+        def progresso_atual():
+            # 50% para as categorias percorridas e 50% para os produtos já enfileirados
+            parte_categorias = categorias_concluidas / total_categorias if total_categorias else 1
+            parte_produtos = processados / total_enfileirado if total_enfileirado else 0
+            return int(parte_categorias * 50 + parte_produtos * 50)
         
-        # Processa cada URL nova
-        for i, url_info in enumerate(todas_urls, 1):
+        # Acompanha as categorias e os workers até tudo o que foi enfileirado ser processado
+        while categorias_concluidas < total_categorias or processados < total_enfileirado:
             if not coleta_ativa:
-                if scraper_instance:
-                    scraper_instance.cancelar()
+                await emit_log_update("⏹️ Coleta interrompida pelo usuário", "warning")
+                agendador_categorias.cancelar()
+                worker_pool.cancelar()
                 break
-                
+            
             try:
-                inicio_produto = datetime.now()
-                progresso = int(50 + (i / total_urls) * 50)  # 50-100% para coleta de dados
+                evento = await asyncio.wait_for(eventos.get(), timeout=1)
+            except asyncio.TimeoutError:
+                if (worker_pool.iniciado() and not worker_pool.ativo() and eventos.empty()
+                        and categorias_concluidas >= total_categorias):
+                    await emit_log_update("⚠️ Nenhum navegador ativo, encerrando a fase 2", "warning")
+                    break
+                continue
+            
+            if evento[0] == 'enfileirado':
+                total_enfileirado += 1
+                if total_enfileirado == 1:
+                    await emit_log_update(
+                        f"🍽️ FASE 2: Coletando dados nutricionais com {num_workers} navegadores, em paralelo com a descoberta de URLs...",
+                        "system",
+                        progress=progresso_atual()
+                    )
+                continue
+            
+            if evento[0] == 'categoria':
+                _, categoria, contagem, erro = evento
+                categorias_concluidas += 1
                 
-                nome_produto = url_info.get('nome', 'Produto sem nome')[:40]
-                categoria_produto = url_info.get('categoria', 'Categoria não informada')
+                if erro:
+                    estatisticas['falhas'] += 1
+                    await emit_log_update(
+                        f"❌ Erro ao coletar URLs da categoria {categoria['nome']}: {str(erro)}",
+                        "error",
+                        estatisticas=estatisticas
+                    )
+                else:
+                    estatisticas['produtos_ja_existentes'] += contagem['existentes']
+                    estatisticas['categorias_processadas'] += 1
+                    
+                    await emit_log_update(
+                        f"  ✅ {categoria['nome']}: {contagem['encontrados']} produtos encontrados ({contagem['novos']} novos, {contagem['existentes']} já coletados)",
+                        "success",
+                        progress=progresso_atual(),
+                        categoria=categoria['nome'],
+                        collected=contagem['novos'],
+                        total=contagem['encontrados'],
+                        estatisticas={"categorias_processadas": estatisticas['categorias_processadas']}
+                    )
+                    
+                    # Log dos primeiros produtos encontrados
+                    if contagem['exemplos']:
+                        await emit_log_update(f"  📝 Exemplos encontrados:", "info")
+                        for i, nome in enumerate(contagem['exemplos'], 1):
+                            await emit_log_update(f"    {i}. {nome[:50]}{'...' if len(nome) > 50 else ''}", "info")
+                        if contagem['novos'] > 3:
+                            await emit_log_update(f"    ... e mais {contagem['novos'] - 3} produtos", "info")
                 
+                # Última categoria: não há mais URLs a enfileirar
+                if categorias_concluidas == total_categorias:
+                    worker_pool.finalizar()
+                    restantes = total_enfileirado - processados
+                    if restantes:
+                        tempo_por_produto = estatisticas['tempo_medio_por_produto'] or 8  # segundos por produto estimado
+                        tempo_total_estimado = int(restantes * tempo_por_produto / num_workers)
+                        await emit_log_update(
+                            f"⏱️ URLs coletadas: {total_enfileirado} produtos enviados à extração, {restantes} restantes. "
+                            f"Tempo estimado: {tempo_total_estimado // 60}min {tempo_total_estimado % 60}s ({num_workers} navegadores)",
+                            "info",
+                            progress=progresso_atual(),
+                            total=total_enfileirado,
+                            tempo_estimado=f"{tempo_total_estimado // 60}min {tempo_total_estimado % 60}s"
+                        )
+                continue
+            
+            tipo_evento, worker_id, url_info = evento[:3]
+            nome_produto = url_info.get('nome', 'Produto sem nome')[:40]
+            categoria_produto = url_info.get('categoria', 'Categoria não informada')
+            
+            if tipo_evento == 'inicio':
+                iniciados += 1
                 await emit_log_update(
-                    f"🔄 Produto {i}/{total_urls}: {nome_produto}{'...' if len(url_info.get('nome', '')) > 40 else ''}",
+                    f"🔄 [W{worker_id}] Produto {iniciados}/{total_enfileirado}: {nome_produto}{'...' if len(url_info.get('nome', '')) > 40 else ''}",
                     "info",
-                    progress=progresso,
+                    progress=progresso_atual(),
                     collected=estatisticas['sucessos'],
-                    total=total_urls,
+                    total=total_enfileirado,
                     categoria=categoria_produto,
                     produto_nome=nome_produto
                 )
+                continue
+            
+            resultado, erro, tempo_produto = evento[3:]
+            processados += 1
+            progresso = progresso_atual()
+            
+            if erro:
+                estatisticas['falhas'] += 1
+                await emit_log_update(
+                    f"  💥 [W{worker_id}] Erro ao processar produto: {str(erro)}",
+                    "error",
+                    progress=progresso,
+                    estatisticas=estatisticas
+                )
+                continue
+            
+            if resultado:
+                estatisticas['sucessos'] += 1
                 
-                # Extrai a URL do dicionário
-                url = url_info['url']
-                
-                # Verifica novamente se a URL já não foi coletada (dupla verificação)
-                if url in urls_ja_coletadas:
-                    await emit_log_update(f"  ⏭️ Produto já coletado anteriormente, pulando...", "info")
-                    estatisticas['produtos_ja_existentes'] += 1
-                    continue
+                # Atualiza tempo médio
+                estatisticas['tempo_medio_por_produto'] = (
+                    (estatisticas['tempo_medio_por_produto'] * (estatisticas['sucessos'] - 1) + tempo_produto) / 
+                    estatisticas['sucessos']
+                )
                 
-                await emit_log_update(f"  🌐 Acessando página do produto...", "info")
-                resultado = scraper_instance.extrair_dados_nutricionais(url, categoria_produto)
+                # Calcula novo tempo estimado considerando os workers em paralelo
+                produtos_restantes = total_enfileirado - processados
+                tempo_restante = int(produtos_restantes * estatisticas['tempo_medio_por_produto'] / num_workers)
                 
-                fim_produto = datetime.now()
-                tempo_produto = (fim_produto - inicio_produto).total_seconds()
+                await emit_log_update(
+                    f"  ✅ [W{worker_id}] Dados coletados com sucesso! ({tempo_produto:.1f}s)",
+                    "success",
+                    progress=progresso,
+                    collected=estatisticas['sucessos'],
+                    tempo_estimado=f"{tempo_restante // 60}min {tempo_restante % 60}s restantes",
+                    estatisticas=estatisticas
+                )
                 
-                if resultado:
-                    # Adiciona a URL ao conjunto de URLs já coletadas
-                    urls_ja_coletadas.add(url)
-                    estatisticas['sucessos'] += 1
-                    
-                    # Atualiza tempo médio
-                    estatisticas['tempo_medio_por_produto'] = (
-                        (estatisticas['tempo_medio_por_produto'] * (estatisticas['sucessos'] - 1) + tempo_produto) / 
-                        estatisticas['sucessos']
-                    )
-                    
-                    # Calcula novo tempo estimado
-                    produtos_restantes = total_urls - i
-                    tempo_restante = int(produtos_restantes * estatisticas['tempo_medio_por_produto'])
-                    
+                # Log dos dados nutricionais coletados
+                if resultado.get('calorias', 0) > 0:
                     await emit_log_update(
-                        f"  ✅ Dados coletados com sucesso! ({tempo_produto:.1f}s)",
-                        "success",
-                        progress=progresso,
-                        collected=estatisticas['sucessos'],
-                        tempo_estimado=f"{tempo_restante // 60}min {tempo_restante % 60}s restantes",
-                        estatisticas=estatisticas
-                    )
-                    
-                    # Log dos dados nutricionais coletados
-                    if resultado.get('calorias', 0) > 0:
-                        await emit_log_update(
-                            f"    📊 {resultado.get('calorias', 0)}kcal | Prot: {resultado.get('proteinas', 0)}g | Carb: {resultado.get('carboidratos', 0)}g | Gord: {resultado.get('gorduras', 0)}g",
-                            "info"
-                        )
-                    
-                else:
-                    estatisticas['falhas'] += 1
-                    await emit_log_update(
-                        f"  ❌ Falha ao extrair dados nutricionais ({tempo_produto:.1f}s)",
-                        "error",
-                        progress=progresso,
-                        estatisticas=estatisticas
+                        f"    📊 {resultado.get('calorias', 0)}kcal | Prot: {resultado.get('proteinas', 0)}g | Carb: {resultado.get('carboidratos', 0)}g | Gord: {resultado.get('gorduras', 0)}g",
+                        "info"
                     )
                 
-            except Exception as e:
+            else:
                 estatisticas['falhas'] += 1
-                await emit_log_update(f"  💥 Erro ao processar produto: {str(e)}", "error")
-                continue
+                await emit_log_update(
+                    f"  ❌ [W{worker_id}] Falha ao extrair dados nutricionais ({tempo_produto:.1f}s)",
+                    "error",
+                    progress=progresso,
+                    estatisticas=estatisticas
+                )
+        
+        if coleta_ativa and total_enfileirado == 0:
+            coleta_concluida = categorias_concluidas >= total_categorias
+            await emit_log_update("ℹ️ Não há novos produtos para coletar. Base de dados já está atualizada!", "success", progress=100)
+            return
         
         # Finalização
         if coleta_ativa:
+            coleta_concluida = categorias_concluidas >= total_categorias and processados >= total_enfileirado
             tempo_total = (datetime.now() - inicio_coleta).total_seconds()
             
             await emit_log_update(
@@ -763,7 +873,7 @@ async def realizar_coleta(modo: str, categorias: List[str]):
                 "success",
                 progress=100,
                 collected=estatisticas['sucessos'],
-                total=total_urls,
+                total=total_enfileirado,
                 estatisticas=estatisticas
             )
             
@@ -783,46 +893,27 @@ async def realizar_coleta(modo: str, categorias: List[str]):
     
     finally:
         coleta_ativa = False
-        if scraper_instance:
-            scraper_instance.cancelar()
-            scraper_instance = None
+        # Uma coleta interrompida mantém o diário aberto para ser retomada depois
+        if coleta_concluida:
+            diario_coleta.finalizar()
+        else:
+            diario_coleta.fechar()
+        if agendador_categorias:
+            agendador_categorias.cancelar()
+            agendador_categorias = None
+        if worker_pool:
+            worker_pool.cancelar()
+            worker_pool = None
         await emit_log_update("🏁 Sistema pronto para nova coleta", "system")
+        # A mensagem final não espera o próximo intervalo do barramento
+        await barramento_progresso.descarregar()
 
 @app.get("/download-excel")
 async def download_excel():
     """
     Baixa os dados nutricionais em formato Excel
     """
-    try:
-        # Verificar se existe arquivo de dados
-        if not os.path.exists("dados_nutricionais.csv"):
-            raise HTTPException(status_code=404, detail="Nenhum dado nutricional disponível")
-        
-        # Lê o arquivo CSV
-        df = pd.read_csv("dados_nutricionais.csv")
-        
-        if df.empty:
-            raise HTTPException(status_code=404, detail="Nenhum dado nutricional disponível")
-        
-        # Criar arquivo Excel em memória
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Dados Nutricionais', index=False)
-        
-        output.seek(0)
-        
-        # Retornar o arquivo como resposta de streaming
-        return StreamingResponse(
-            io.BytesIO(output.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=dados_nutricionais.xlsx"}
-        )
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Erro ao gerar arquivo Excel: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar arquivo Excel: {str(e)}")
+    return await exportar_produtos(formato="xlsx", search=None, categoria=None)
 
 # Endpoints com prefixo /api/ para compatibilidade com o frontend
 @app.get("/api/categorias")
@@ -832,127 +923,163 @@ async def api_listar_categorias():
 
 @app.get("/api/produtos")
 async def api_listar_produtos(
-    page: int = Query(1, description="Número da página (começa em 1)"),
-    limit: int = Query(10, description="Número máximo de registros por página"),
+    limit: int = Query(10, ge=1, le=1000, description="Número máximo de registros por página"),
+    cursor: Optional[str] = Query(None, description="Cursor de outra página (proximo_cursor ou cursor_anterior)"),
     search: Optional[str] = Query(None, description="Filtrar por nome do produto (busca parcial)"),
     categoria: Optional[str] = Query(None, description="Filtrar por categoria de produto")
 ):
     """
-    Lista os produtos coletados com paginação e filtros (API endpoint)
+    Lista os produtos coletados com paginação por cursor e filtros (API endpoint)
     
-    - **page**: Número da página (começa em 1)
     - **limit**: Número máximo de registros por página
+    - **cursor**: `proximo_cursor` ou `cursor_anterior` de uma resposta anterior; sem cursor, retorna a primeira página
     - **search**: Filtrar por nome do produto (busca parcial)
     - **categoria**: Filtrar por categoria de produto
     """
+    chaves_cursor, anterior = None, False
+    if cursor:
+        try:
+            dados = decodificar_cursor(cursor)
+            chaves_cursor, anterior = list(dados['k']), bool(dados['a'])
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Cursor inválido: {str(e)}")
+    
     try:
-        # Verifica se o arquivo de dados existe
-        if not os.path.exists("dados_nutricionais.csv"):
-            return {"produtos": [], "total": 0}
-        
-        # Lê o arquivo CSV
-        df = pd.read_csv("dados_nutricionais.csv")
-        
-        # Aplica filtros se fornecidos
-        if categoria:
-            df = df[df['categoria'].str.contains(categoria, case=False, na=False)]
-        if search:
-            df = df[df['nome'].str.contains(search, case=False, na=False)]
+        # Verifica se há dados armazenados
+        if store.vazio():
+            return {"produtos": [], "total": 0, "proximo_cursor": None, "cursor_anterior": None}
         
-        # Total de produtos após filtros
-        total_produtos = len(df)
-        
-        # Ordena por data de coleta decrescente (mais recente primeiro)
+        # Lê a página do cache em memória (frame compartilhado: não alterar), com os
+        # filtros aplicados pelo índice de busca; sem busca, a ordem é por data
+        # de coleta decrescente (mais recente primeiro)
         try:
-            df['data_coleta_dt'] = pd.to_datetime(df['data_coleta'], format='mixed', errors='coerce')
-            mask_na = df['data_coleta_dt'].isna()
-            if mask_na.any():
-                df.loc[mask_na, 'data_coleta_dt'] = pd.to_datetime(
-                    df.loc[mask_na, 'data_coleta'], 
-                    format='%Y-%m-%d', 
-                    errors='coerce'
-                )
-            df = df.sort_values('data_coleta_dt', ascending=False, na_position='last')
-            df = df.drop('data_coleta_dt', axis=1)
-        except Exception as e:
-            logger.warning(f"Erro ao ordenar por data: {e}. Mantendo ordem original.")
+            df, pagina, ids, total_produtos, proximo, previo = await job_runner.executar(
+                dataset.listar_pagina, nome=search, categoria=categoria,
+                limite=limit, cursor=chaves_cursor, anterior=anterior
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Cursor inválido: {str(e)}")
         
-        # Aplica paginação
-        skip = (page - 1) * limit
-        df_paginado = df.iloc[skip:skip + limit]
+        # Converte para o formato da API, por colunas
+        return resposta_json({
+            "produtos": serializar_produtos(df.iloc[pagina], formato_api=True, ids=ids),
+            "total": total_produtos,
+            "proximo_cursor": codificar_cursor({"k": proximo, "a": False}) if proximo else None,
+            "cursor_anterior": codificar_cursor({"k": previo, "a": True}) if previo else None
+        })
         
-        # Converte para o formato da API
-        produtos = []
-        for idx, row in df_paginado.iterrows():
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao listar produtos: {str(e)}")
+        return {"produtos": [], "total": 0, "proximo_cursor": None, "cursor_anterior": None}
+
+@app.get("/api/produtos/consulta")
+async def api_consultar_produtos(
+    request: Request,
+    ordenar: Optional[str] = Query(None, description="Colunas de ordenação separadas por vírgula; '-' para decrescente (ex.: calorias,-proteinas)"),
+    base: str = Query("porcao", description="Base dos valores: porcao (como coletados) ou 100g"),
+    limit: int = Query(50, ge=1, le=1000, description="Número máximo de registros por página"),
+    cursor: Optional[str] = Query(None, description="Cursor retornado pela página anterior"),
+    search: Optional[str] = Query(None, description="Filtrar por nome do produto"),
+    categoria: Optional[str] = Query(None, description="Filtrar por categoria de produto")
+):
+    """
+    Consulta produtos por faixas de valores nutricionais (API endpoint)
+    
+    - **<coluna>_min** / **<coluna>_max**: Faixa de uma coluna numérica (porcao, calorias,
+      carboidratos, proteinas, gorduras, gorduras_saturadas, fibras, acucares, sodio),
+      ex.: `proteinas_min=20&sodio_max=400`
+    - **ordenar**: Colunas numéricas ou data_coleta; padrão: data_coleta decrescente
+    - **base**: Compara, ordena e retorna os nutrientes por porção ou por 100 g
+    - **cursor**: Continua a partir da página anterior (`proximo_cursor`)
+    """
+    if base not in BASES:
+        raise HTTPException(status_code=400, detail=f"Base inválida. Use: {', '.join(BASES)}")
+    
+    # Faixas informadas como <coluna>_min e <coluna>_max
+    faixas = {}
+    for coluna in COLUNAS_NUMERICAS:
+        limites = []
+        for sufixo in ('_min', '_max'):
+            valor = request.query_params.get(coluna + sufixo)
             try:
-                produto = {
-                    "id": int(idx),  # Usa o índice como ID
-                    "nome": str(row['nome']),
-                    "categoria": str(row.get('categoria', '')),
-                    "url": str(row['url']),
-                    "porcao": float(row['porcao']),
-                    "calorias": float(row['calorias']),
-                    "energia": float(row['calorias']),  # Alias para calorias
-                    "carboidratos": float(row['carboidratos']),
-                    "proteinas": float(row['proteinas']),
-                    "gorduras": float(row['gorduras']),
-                    "gorduras_saturadas": float(row['gorduras_saturadas']),
-                    "fibras": float(row['fibras']),
-                    "acucares": float(row['acucares']),
-                    "sodio": float(row['sodio']),
-                    "data_coleta": str(row['data_coleta']) if pd.notna(row['data_coleta']) else None
-                }
-                produtos.append(produto)
-            except Exception as e:
-                logger.error(f"Erro ao converter linha do CSV: {str(e)}")
-                continue
+                limites.append(float(valor) if valor not in (None, '') else None)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Valor inválido para {coluna}{sufixo}: {valor}")
+        if limites != [None, None]:
+            faixas[coluna] = tuple(limites)
+    
+    try:
+        ordenacao = interpretar_ordenacao(ordenar)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # O cursor só vale para a mesma ordenação e base em que foi gerado
+    chaves_cursor = None
+    if cursor:
+        try:
+            dados = decodificar_cursor(cursor)
+            if dados['o'] != [list(chave) for chave in ordenacao] or dados['b'] != base:
+                raise ValueError("Cursor gerado para outra ordenação")
+            chaves_cursor = list(dados['k'])
+            if len(chaves_cursor) != len(ordenacao) + 1:
+                raise ValueError("Cursor incompleto")
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Cursor inválido: {str(e)}")
+    
+    try:
+        if store.vazio():
+            return {"produtos": [], "total": 0, "proximo_cursor": None}
         
-        return {
-            "produtos": produtos,
-            "total": total_produtos
-        }
+        # Faixas resolvidas pelos índices ordenados do cache em memória
+        df, posicoes, ids, _ = await job_runner.executar(
+            dataset.consultar_faixas, faixas, base, nome=search, categoria=categoria
+        )
+        pagina, proximo = await job_runner.executar(
+            ordenar_pagina, df, posicoes, ids, ordenacao, base, limit, chaves_cursor
+        )
         
+        df_pagina = df.iloc[pagina]
+        if base == "100g":
+            # Valores por 100 g; produtos sem porção informada ficam sem valor
+            df_pagina = df_pagina.assign(**{
+                coluna: pd.Series(
+                    [None if valor != valor else valor for valor in valores_da_base(df_pagina, coluna, base).tolist()],
+                    index=df_pagina.index, dtype=object
+                )
+                for coluna in COLUNAS_NUMERICAS if coluna != "porcao"
+            })
+        
+        return resposta_json({
+            "produtos": serializar_produtos(df_pagina, formato_api=True, ids=ids[pagina]),
+            "total": len(posicoes),
+            "base": base,
+            "proximo_cursor": codificar_cursor({"o": ordenacao, "b": base, "k": proximo}) if proximo else None
+        })
+    
     except Exception as e:
-        logger.error(f"Erro ao listar produtos: {str(e)}")
-        return {"produtos": [], "total": 0}
+        logger.error(f"Erro ao consultar produtos: {str(e)}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @app.get("/api/produtos/{produto_id}")
 async def api_obter_produto(produto_id: int):
-    """Obtém detalhes de um produto específico (API endpoint)"""
+    """Obtém detalhes de um produto específico pelo id retornado na listagem (API endpoint)"""
     try:
-        # Verifica se o arquivo de dados existe
-        if not os.path.exists("dados_nutricionais.csv"):
+        # Verifica se há dados armazenados
+        if store.vazio():
             raise HTTPException(status_code=404, detail="Nenhum dado nutricional disponível")
         
-        # Lê o arquivo CSV
-        df = pd.read_csv("dados_nutricionais.csv")
+        # Procura o id no cache em memória (frame compartilhado: não alterar)
+        df, posicao = await job_runner.executar(dataset.obter_por_id, produto_id)
         
         # Verifica se o produto existe
-        if produto_id >= len(df):
+        if posicao is None:
             raise HTTPException(status_code=404, detail="Produto não encontrado")
         
-        # Obtém o produto pelo índice
-        row = df.iloc[produto_id]
-        
-        produto = {
-            "id": produto_id,
-            "nome": str(row['nome']),
-            "categoria": str(row.get('categoria', '')),
-            "url": str(row['url']),
-            "porcao": float(row['porcao']),
-            "calorias": float(row['calorias']),
-            "energia": float(row['calorias']),  # Alias para calorias
-            "carboidratos": float(row['carboidratos']),
-            "proteinas": float(row['proteinas']),
-            "gorduras": float(row['gorduras']),
-            "gorduras_saturadas": float(row['gorduras_saturadas']),
-            "fibras": float(row['fibras']),
-            "acucares": float(row['acucares']),
-            "sodio": float(row['sodio']),
-            "data_coleta": str(row['data_coleta']) if pd.notna(row['data_coleta']) else None
-        }
+        produto = serializar_produtos(df.iloc[[posicao]], formato_api=True, ids=pd.Index([produto_id]))[0]
         
-        return produto
+        return resposta_json(produto)
         
     except HTTPException:
         raise
@@ -968,42 +1095,72 @@ async def api_download_excel(
     """
     Baixa os dados nutricionais em formato Excel (API endpoint)
     """
+    return await exportar_produtos(formato="xlsx", search=search, categoria=categoria)
+
+@app.get("/api/exportar")
+async def exportar_produtos(
+    formato: str = Query("xlsx", description="Formato do arquivo: xlsx, csv, ndjson ou parquet"),
+    search: Optional[str] = Query(None, description="Filtrar por nome do produto"),
+    categoria: Optional[str] = Query(None, description="Filtrar por categoria")
+):
+    """
+    Exporta os dados nutricionais filtrados, enviando o arquivo em partes (API endpoint)
+    
+    - **formato**: xlsx (planilha guardada em cache até os dados mudarem), csv, ndjson ou parquet
+    - **search**: Filtrar por nome do produto
+    - **categoria**: Filtrar por categoria
+    """
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido. Use: {', '.join(FORMATOS)}")
+    
     try:
-        # Verificar se existe arquivo de dados
-        if not os.path.exists("dados_nutricionais.csv"):
+        # Verificar se existem dados armazenados
+        if store.vazio():
             raise HTTPException(status_code=404, detail="Nenhum dado nutricional disponível")
         
-        # Lê o arquivo CSV
-        df = pd.read_csv("dados_nutricionais.csv")
-        
-        # Aplica filtros se fornecidos
-        if categoria:
-            df = df[df['categoria'].str.contains(categoria, case=False, na=False)]
-        if search:
-            df = df[df['nome'].str.contains(search, case=False, na=False)]
+        # Aplica filtros pelo índice de busca do cache em memória
+        df, posicoes, geracao = await job_runner.executar(
+            dataset.consultar_versionado, nome=search, categoria=categoria
+        )
         
-        if df.empty:
+        if not len(posicoes):
             raise HTTPException(status_code=404, detail="Nenhum dado encontrado com os filtros aplicados")
         
-        # Criar arquivo Excel em memória
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Dados Nutricionais', index=False)
-        
-        output.seek(0)
+        media_type, extensao = FORMATOS[formato]
+        if formato == "xlsx":
+            # A planilha é gerada em disco uma vez e reaproveitada até os dados mudarem
+            arquivo = await job_runner.executar(cache_excel.obter, df, posicoes, geracao, (search, categoria))
+            conteudo = ler_arquivo(arquivo)
+        else:
+            conteudo = GERADORES[formato](df, posicoes)
         
-        # Retornar o arquivo como resposta de streaming
+        # Envia o arquivo em partes, à medida que é lido ou gerado
         return StreamingResponse(
-            io.BytesIO(output.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=dados_nutricionais.xlsx"}
+            conteudo,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename=dados_nutricionais.{extensao}"}
         )
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao gerar arquivo Excel: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar arquivo Excel: {str(e)}")
+        logger.error(f"Erro ao exportar dados: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar dados: {str(e)}")
+
+@app.get("/api/metricas/esperas")
+async def api_metricas_esperas():
+    """Tempo real gasto em cada tipo de espera de carregamento de página (API endpoint)"""
+    return metricas_espera.resumo()
+
+@app.get("/api/metricas/recursos")
+async def api_metricas_recursos():
+    """Requisições e bytes economizados pelo bloqueio de recursos, por etapa (API endpoint)"""
+    return economia_recursos.resumo()
+
+@app.get("/api/navegadores")
+async def api_status_navegadores():
+    """Situação dos navegadores mantidos abertos pelo gerenciador (API endpoint)"""
+    return driver_manager.status()
 
 # Eventos do Socket.IO
 @sio.event
@@ -1014,13 +1171,22 @@ async def connect(sid, environ):
 async def disconnect(sid):
     print(f"Cliente desconectado: {sid}")
 
+@sio.event
+async def sincronizar(sid, dados=None):
+    """Devolve ao cliente que (re)conectou as mensagens que ele perdeu e as estatísticas atuais"""
+    ultima_sequencia = (dados or {}).get('seq') or 0
+    return barramento_progresso.sincronizar(int(ultima_sequencia))
+
 # Função para emitir atualizações do log
 async def emit_log_update(message: str, type: str = "info", progress: int = None, 
                          collected: int = None, total: int = None, categoria: str = None,
                          produto_nome: str = None, tempo_estimado: str = None,
                          estatisticas: dict = None):
     """
-    Emite atualizações do log com informações detalhadas
+    Publica uma atualização do log com informações detalhadas
+    
+    A mensagem é enviada ao frontend no próximo lote do barramento de
+    progresso, junto com as alterações nas estatísticas.
     
     Args:
         message: Mensagem principal do log
@@ -1031,7 +1197,7 @@ async def emit_log_update(message: str, type: str = "info", progress: int = None
         categoria: Categoria atual sendo processada
         produto_nome: Nome do produto atual
         tempo_estimado: Tempo estimado para conclusão
-        estatisticas: Dicionário com estatísticas detalhadas
+        estatisticas: Dicionário com estatísticas detalhadas (só as alterações são enviadas)
     """
     log_data = {
         'message': message, 
@@ -1052,10 +1218,35 @@ async def emit_log_update(message: str, type: str = "info", progress: int = None
         log_data['produto_nome'] = produto_nome
     if tempo_estimado:
         log_data['tempo_estimado'] = tempo_estimado
-    if estatisticas:
-        log_data['estatisticas'] = estatisticas
     
-    await sio.emit('log_update', log_data)
+    barramento_progresso.publicar(log_data, estatisticas)
+
+async def emitir_log_coletor(message: str, type: str = "info"):
+    """Repassa ao frontend os logs gerados pelo coletor de URLs em outra thread"""
+    await emit_log_update(f"    {message}", type)
+
+@app.on_event("startup")
+async def aquecer_navegadores():
+    """Abre navegadores em segundo plano para que a primeira coleta não pague a inicialização"""
+    if DRIVERS_AQUECIDOS > 0:
+        asyncio.create_task(job_runner.executar(driver_manager.aquecer, DRIVERS_AQUECIDOS))
+
+@app.on_event("startup")
+async def migrar_csv_legado():
+    """Importa o dados_nutricionais.csv antigo para a base na primeira execução"""
+    await job_runner.executar(store.migrar)
+
+@app.on_event("startup")
+async def limpar_exportacoes():
+    """Apaga as planilhas geradas por uma execução anterior, que não valem para os dados atuais"""
+    cache_excel.limpar()
+
+@app.on_event("shutdown")
+async def encerrar_jobs():
+    """Encerra o pool de jobs e fecha os navegadores ao desligar o servidor"""
+    driver_manager.encerrar()
+    executor_categorias.desligar()
+    job_runner.desligar()
 
 # Função para abrir o navegador
 def abrir_navegador(host: str, port: int):
@@ -0,0 +1,118 @@
+"""
+Benchmark do script de extração nutricional: passada única x script original.
+
+Uso (a partir da raiz do repositório):
+
+    # Salva o HTML de algumas páginas de produto para uso offline
+    python -m benchmarks.extracao_nutricional salvar paginas/ URL [URL ...]
+
+    # Compara os dois scripts sobre os HTMLs salvos
+    python -m benchmarks.extracao_nutricional comparar paginas/ --repeticoes 20
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from browser_config import configurar_driver
+from nutrition_extraction import SCRIPT_EXTRACAO, SCRIPT_EXTRACAO_LEGADO
+
+CAMPOS = [
+    'porcao', 'calorias', 'carboidratos', 'proteinas', 'gorduras',
+    'gorduras_saturadas', 'fibras', 'acucares', 'sodio'
+]
+
+
+def salvar_paginas(diretorio, urls):
+    """Abre cada URL no navegador e salva o HTML renderizado."""
+    from page_readiness import aguardar_tabela_nutricional
+
+    os.makedirs(diretorio, exist_ok=True)
+    driver = configurar_driver()
+    try:
+        for url in urls:
+            driver.get(url)
+            aguardar_tabela_nutricional(driver)
+            nome = url.rstrip('/').split('/')[-1][:80] or 'pagina'
+            caminho = os.path.join(diretorio, f"{nome}.html")
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(driver.page_source)
+            print(f"Salvo: {caminho}")
+    finally:
+        driver.quit()
+
+
+def medir(driver, script, repeticoes):
+    """Executa o script várias vezes e retorna (tempos em ms, último resultado)."""
+    tempos = []
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = driver.execute_script(script)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos, resultado
+
+
+def comparar(diretorio, repeticoes):
+    """Compara tempo e resultado dos dois scripts em cada HTML salvo."""
+    arquivos = sorted(Path(diretorio).glob('*.html'))
+    if not arquivos:
+        print(f"Nenhum arquivo .html encontrado em {diretorio}")
+        return 1
+
+    driver = configurar_driver()
+    totais = {'legado': [], 'novo': []}
+    divergencias = 0
+    try:
+        print(f"{'arquivo':<50} {'legado (ms)':>12} {'novo (ms)':>10} {'ganho':>7}")
+        for arquivo in arquivos:
+            driver.get(arquivo.resolve().as_uri())
+            tempos_legado, dados_legado = medir(driver, SCRIPT_EXTRACAO_LEGADO, repeticoes)
+            tempos_novo, dados_novo = medir(driver, SCRIPT_EXTRACAO, repeticoes)
+
+            mediana_legado = statistics.median(tempos_legado)
+            mediana_novo = statistics.median(tempos_novo)
+            totais['legado'].append(mediana_legado)
+            totais['novo'].append(mediana_novo)
+            print(f"{arquivo.name[:50]:<50} {mediana_legado:>12.1f} {mediana_novo:>10.1f} "
+                  f"{mediana_legado / max(mediana_novo, 0.001):>6.1f}x")
+
+            diferentes = [
+                f"{campo}: {dados_legado.get(campo)} -> {dados_novo.get(campo)}"
+                for campo in CAMPOS
+                if float(dados_legado.get(campo) or 0) != float(dados_novo.get(campo) or 0)
+            ]
+            if diferentes:
+                divergencias += 1
+                print(f"    campos diferentes: {', '.join(diferentes)}")
+    finally:
+        driver.quit()
+
+    print(f"\nMediana geral: legado {statistics.median(totais['legado']):.1f} ms | "
+          f"novo {statistics.median(totais['novo']):.1f} ms")
+    print(f"Páginas com resultados diferentes: {divergencias}/{len(arquivos)}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_salvar = subparsers.add_parser('salvar', help='Salva o HTML de páginas de produto')
+    parser_salvar.add_argument('diretorio')
+    parser_salvar.add_argument('urls', nargs='+')
+
+    parser_comparar = subparsers.add_parser('comparar', help='Compara os scripts sobre HTMLs salvos')
+    parser_comparar.add_argument('diretorio')
+    parser_comparar.add_argument('--repeticoes', type=int, default=10)
+
+    args = parser.parse_args()
+    if args.comando == 'salvar':
+        salvar_paginas(args.diretorio, args.urls)
+        return 0
+    return comparar(args.diretorio, args.repeticoes)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark da serialização de produtos: por colunas x iterrows() + pydantic.
+
+Uso (a partir da raiz do repositório):
+
+    # Base sintética
+    python -m benchmarks.serializacao_produtos --linhas 100000 --pagina 100
+
+    # Base real em dados/
+    python -m benchmarks.serializacao_produtos --base --pagina 100
+"""
+import sys
+import time
+import argparse
+import statistics
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from typing import Optional
+from product_store import COLUNAS_NUMERICAS, normalizar_frame
+from product_serializer import serializar_produtos, codificar_json
+
+
+class DadoNutricional(BaseModel):
+    url: str
+    nome: str
+    categoria: Optional[str] = None
+    porcao: float
+    calorias: float
+    carboidratos: float
+    proteinas: float
+    gorduras: float
+    gorduras_saturadas: float
+    fibras: float
+    acucares: float
+    sodio: float
+    data_coleta: Optional[str] = None
+
+
+def serializar_legado(df):
+    """Loop usado antes pelos endpoints: iterrows(), float() por campo e um modelo por linha."""
+    produtos = []
+    for _, row in df.iterrows():
+        produto = DadoNutricional(
+            nome=str(row['nome']),
+            url=str(row['url']),
+            porcao=float(row['porcao']),
+            calorias=float(row['calorias']),
+            carboidratos=float(row['carboidratos']),
+            proteinas=float(row['proteinas']),
+            gorduras=float(row['gorduras']),
+            gorduras_saturadas=float(row['gorduras_saturadas']),
+            fibras=float(row['fibras']),
+            acucares=float(row['acucares']),
+            sodio=float(row['sodio']),
+            categoria=str(row.get('categoria', '')),
+            data_coleta=str(row['data_coleta']) if pd.notna(row['data_coleta']) else None
+        )
+        produtos.append(produto.model_dump() if hasattr(produto, 'model_dump') else produto.dict())
+    return codificar_json(produtos)
+
+
+def serializar_novo(df):
+    return codificar_json(serializar_produtos(df))
+
+
+def base_sintetica(linhas):
+    """Gera uma base com a mesma estrutura e tipos do ProductStore."""
+    rng = np.random.default_rng(42)
+    dados = {
+        'nome': [f"Produto de teste {i}" for i in range(linhas)],
+        'url': [f"https://www.paodeacucar.com/produto/{100000 + i}/produto-{i}" for i in range(linhas)],
+        'categoria': rng.choice(['Bolos', 'Biscoitos', 'Laticínios', 'Massas'], linhas),
+        'data_coleta': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 10**7, linhas), unit='s')
+    }
+    for coluna in COLUNAS_NUMERICAS:
+        dados[coluna] = rng.uniform(0, 500, linhas).round(1)
+    return normalizar_frame(pd.DataFrame(dados))
+
+
+def medir(funcao, df, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(df)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=100000, help='Tamanho da base sintética')
+    parser.add_argument('--base', action='store_true', help='Usa a base real em dados/')
+    parser.add_argument('--pagina', type=int, default=100, help='Tamanho da página serializada')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.base:
+        from product_store import store
+        df = store.carregar()
+    else:
+        df = base_sintetica(args.linhas)
+    print(f"Base com {len(df)} produtos")
+
+    # Confere se os dois caminhos produzem o mesmo conteúdo
+    amostra = df.iloc[:50]
+    if codificar_json(serializar_produtos(amostra)) != serializar_legado(amostra):
+        print("Aviso: as duas serializações produziram JSON diferente na amostra")
+
+    print(f"{'tamanho':<12} {'legado (ms)':>12} {'colunas (ms)':>13} {'ganho':>7}")
+    for tamanho in sorted({args.pagina, len(df)}):
+        fatia = df.iloc[:tamanho]
+        repeticoes = args.repeticoes if tamanho <= 1000 else 1
+        legado = medir(serializar_legado, fatia, repeticoes)
+        novo = medir(serializar_novo, fatia, max(repeticoes, 3))
+        print(f"{tamanho:<12} {legado:>12.1f} {novo:>13.1f} {legado / max(novo, 0.001):>6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,9 @@ import platform
 import os
 import subprocess
 import shutil
+import json
+import time
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -9,6 +12,9 @@ from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.core.os_manager import ChromeType
 from scraping_log import logger
 
+# User agent usado pelo navegador e pelas requisições HTTP diretas
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+
 def detectar_navegador():
     """
     Detecta qual navegador está disponível no sistema.
@@ -124,13 +130,157 @@ def verificar_driver_sistema():
     
     return None
 
+# Argumentos de linha de comando usados em todas as instâncias do Chrome
+OPCOES_CHROME = [
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--window-size=1920,1080",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-dev-tools",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-setuid-sandbox",
+    "--disable-software-rasterizer",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-features=TranslateUI",
+    "--disable-ipc-flooding-protection",
+    "--disable-hang-monitor",
+    "--disable-popup-blocking",
+    "--disable-prompt-on-repost",
+    "--disable-sync",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor",
+    f"--user-agent={USER_AGENT}"
+]
+
+# Arquivo com o navegador, o driver e a estratégia que funcionaram da última vez
+CACHE_DRIVER = os.getenv('CACHE_DRIVER', '.driver_cache.json')
+
+# Configuração já validada neste processo (evita reler o arquivo a cada driver)
+_configuracao_em_memoria = None
+_lock_configuracao = threading.Lock()
+
+def criar_opcoes(binary_location=None):
+    """Cria as opções do Chrome usadas pelo scraper."""
+    options = Options()
+    for opcao in OPCOES_CHROME:
+        options.add_argument(opcao)
+    
+    # Log de rede usado para medir o que o bloqueio de recursos economiza
+    # e para descobrir a API de listagem das páginas de categoria
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    
+    # Configurações específicas para ambiente de produção
+    if os.environ.get('RENDER') or os.environ.get('HEROKU'):
+        options.binary_location = "/usr/bin/google-chrome-stable"
+    elif binary_location:
+        options.binary_location = binary_location
+    return options
+
+def versao_chrome(binary_location):
+    """Retorna a versão do navegador informado (ex.: 'Google Chrome 131.0.6778.85')."""
+    if not binary_location or not os.path.exists(binary_location):
+        return None
+    try:
+        result = subprocess.run([binary_location, '--version'], capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except Exception as e:
+        logger.warning(f"Erro ao obter versão do navegador {binary_location}: {e}")
+        return None
+
+def carregar_cache_driver():
+    """Lê o cache de configuração do driver, se existir."""
+    try:
+        with open(CACHE_DRIVER, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def salvar_cache_driver(configuracao):
+    """Grava a configuração que funcionou para ser reaproveitada."""
+    global _configuracao_em_memoria
+    try:
+        temporario = CACHE_DRIVER + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(configuracao, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, CACHE_DRIVER)
+    except OSError as e:
+        logger.warning(f"Não foi possível salvar o cache do driver: {e}")
+    _configuracao_em_memoria = configuracao
+
+def invalidar_cache_driver():
+    """Remove o cache de configuração do driver."""
+    global _configuracao_em_memoria
+    _configuracao_em_memoria = None
+    try:
+        os.remove(CACHE_DRIVER)
+    except OSError:
+        pass
+
+def obter_configuracao_cache():
+    """
+    Retorna a configuração em cache se ela ainda for válida.
+
+    O cache é indexado pela versão do Chrome: se o binário não mudou (mesmo
+    mtime) ele é usado direto; se mudou, a versão é consultada e o cache só
+    é aproveitado se ela for a mesma.
+    """
+    global _configuracao_em_memoria
+    with _lock_configuracao:
+        if _configuracao_em_memoria:
+            return _configuracao_em_memoria
+        
+        configuracao = carregar_cache_driver()
+        if not configuracao:
+            return None
+        
+        driver_path = configuracao.get('driver_path')
+        if not driver_path or not os.path.exists(driver_path):
+            return None
+        
+        binario = configuracao.get('binario')
+        if binario:
+            if not os.path.exists(binario):
+                return None
+            mtime = os.path.getmtime(binario)
+            if mtime != configuracao.get('mtime_binario'):
+                versao = versao_chrome(binario)
+                if not versao or versao != configuracao.get('versao_chrome'):
+                    logger.info("Versão do navegador mudou; refazendo a detecção do driver")
+                    return None
+                configuracao['mtime_binario'] = mtime
+                salvar_cache_driver(configuracao)
+        
+        _configuracao_em_memoria = configuracao
+        return configuracao
+
 def configurar_driver():
     """
     Configura e retorna uma instância do navegador usando webdriver-manager.
     Detecta automaticamente o navegador disponível e baixa o driver apropriado.
+    
+    A combinação de navegador, driver e estratégia que funcionar é guardada em
+    cache; nas chamadas seguintes a detecção é pulada.
     """
     logger.info("Iniciando configuração do WebDriver...")
     
+    # Caminho rápido: configuração que já funcionou antes
+    configuracao = obter_configuracao_cache()
+    if configuracao:
+        try:
+            service = Service(executable_path=configuracao['driver_path'])
+            driver = webdriver.Chrome(service=service, options=criar_opcoes(configuracao.get('binario')))
+            logger.info(f"WebDriver configurado a partir do cache ({configuracao.get('estrategia')})")
+            return driver
+        except Exception as e:
+            logger.warning(f"Configuração em cache falhou, refazendo a detecção: {str(e)}")
+            invalidar_cache_driver()
+    
     # Detecta o navegador disponível
     browser_type, binary_location = detectar_navegador()
     
@@ -138,42 +288,7 @@ def configurar_driver():
     driver_sistema = verificar_driver_sistema()
     
     # Configura as opções do navegador
-    options = Options()
-    opcoes_comuns = [
-        "--headless=new",
-        "--no-sandbox",
-        "--disable-dev-shm-usage",
-        "--window-size=1920,1080",
-        "--disable-gpu",
-        "--disable-extensions",
-        "--disable-dev-tools",
-        "--no-first-run",
-        "--no-default-browser-check",
-        "--disable-blink-features=AutomationControlled",
-        "--disable-setuid-sandbox",
-        "--disable-software-rasterizer",
-        "--disable-background-timer-throttling",
-        "--disable-renderer-backgrounding",
-        "--disable-backgrounding-occluded-windows",
-        "--disable-features=TranslateUI",
-        "--disable-ipc-flooding-protection",
-        "--disable-hang-monitor",
-        "--disable-popup-blocking",
-        "--disable-prompt-on-repost",
-        "--disable-sync",
-        "--disable-web-security",
-        "--disable-features=VizDisplayCompositor",
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-    ]
-    
-    for opcao in opcoes_comuns:
-        options.add_argument(opcao)
-    
-    # Configurações específicas para ambiente de produção
-    if os.environ.get('RENDER') or os.environ.get('HEROKU'):
-        options.binary_location = "/usr/bin/google-chrome-stable"
-    elif binary_location:
-        options.binary_location = binary_location
+    options = criar_opcoes(binary_location)
     
     # Lista de tentativas para configurar o driver
     tentativas = []
@@ -235,6 +350,16 @@ def configurar_driver():
             # Testa se o driver funciona
             driver.get("data:text/html,<html><body><h1>Teste</h1></body></html>")
             logger.info(f"WebDriver configurado com sucesso usando {metodo} com {tipo_navegador}")
+            
+            # Guarda a combinação que funcionou para as próximas chamadas
+            binario = options.binary_location or binary_location
+            salvar_cache_driver({
+                'estrategia': f"{metodo} com {tipo_navegador}",
+                'driver_path': driver_path,
+                'binario': binario,
+                'mtime_binario': os.path.getmtime(binario) if binario and os.path.exists(binario) else None,
+                'versao_chrome': versao_chrome(binario)
+            })
             return driver
             
         except Exception as e:
@@ -248,4 +373,50 @@ def configurar_driver():
     
     # Se todas as tentativas falharam
     logger.error("Falha ao configurar WebDriver com todas as tentativas")
-    raise Exception("Não foi possível configurar o WebDriver. Verifique se Chrome ou Chromium estão instalados.") 
\ No newline at end of file
+    raise Exception("Não foi possível configurar o WebDriver. Verifique se Chrome ou Chromium estão instalados.")
+
+def diagnosticar(abrir_navegador=True):
+    """
+    Executa cada etapa da detecção do navegador e mede quanto tempo cada uma leva.
+    
+    Returns:
+        list: Um dicionário por etapa com 'etapa', 'duracao_ms', 'resultado' e 'erro'
+    """
+    etapas = []
+    
+    def medir(nome, funcao):
+        inicio = time.perf_counter()
+        resultado, erro = None, None
+        try:
+            resultado = funcao()
+        except Exception as e:
+            erro = str(e)
+        etapas.append({
+            'etapa': nome,
+            'duracao_ms': round((time.perf_counter() - inicio) * 1000, 1),
+            'resultado': resultado if isinstance(resultado, (str, int, float, bool, dict, list, tuple, type(None))) else type(resultado).__name__,
+            'erro': erro
+        })
+        return resultado
+    
+    medir('cache_driver', carregar_cache_driver)
+    navegador = medir('detectar_navegador', detectar_navegador)
+    medir('versao_chrome', lambda: versao_chrome(navegador[1] if navegador else None))
+    medir('verificar_driver_sistema', verificar_driver_sistema)
+    
+    if abrir_navegador:
+        driver = medir('configurar_driver', configurar_driver)
+        if driver:
+            medir('pagina_teste', lambda: driver.get("data:text/html,<html><body><h1>Teste</h1></body></html>") or 'ok')
+            medir('fechar_driver', driver.quit)
+    
+    return etapas
+
+if __name__ == "__main__":
+    import sys
+    if '--diagnostico' in sys.argv:
+        for etapa in diagnosticar(abrir_navegador='--sem-navegador' not in sys.argv):
+            situacao = f"ERRO: {etapa['erro']}" if etapa['erro'] else etapa['resultado']
+            print(f"{etapa['etapa']:<26} {etapa['duracao_ms']:>9.1f} ms  {situacao}")
+    else:
+        print("Uso: python browser_config.py --diagnostico [--sem-navegador]")
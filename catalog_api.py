@@ -0,0 +1,287 @@
+import os
+import json
+import base64
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+from scraping_log import logger
+from resource_blocking import ler_log_rede
+from rate_budget import orcamento_hosts
+
+# Descoberta da API de listagem ligada/desligada (API_CATALOGO=0 usa sempre a rolagem)
+API_CATALOGO_ATIVA = os.getenv('API_CATALOGO', '1') != '0'
+
+# Parâmetros de paginação reconhecidos nas requisições da página de categoria
+PARAMETROS_PAGINA = ('page', 'p', 'pagina', 'pagenumber', 'currentpage')
+PARAMETROS_DESLOCAMENTO = ('offset', 'start', 'skip', 'from', '_from')
+
+# Parâmetro que acompanha o deslocamento e marca o fim da faixa (ex.: VTEX ?_from=0&_to=11)
+PARES_DESLOCAMENTO = {'from': 'to', '_from': '_to'}
+
+# Chaves com a URL e o nome do produto nos itens da resposta, em ordem de prioridade
+CHAVES_URL = ('urlDetails', 'url', 'link', 'href', 'productUrl', 'linkText', 'slug')
+CHAVES_NOME = ('name', 'nome', 'productName', 'title', 'titulo', 'description')
+
+# Cabeçalhos da requisição original que não são repetidos (o navegador define os seus)
+CABECALHOS_IGNORADOS = (
+    'host', 'origin', 'referer', 'cookie', 'content-length', 'user-agent',
+    'accept-encoding', 'connection'
+)
+
+# Repete uma requisição de dentro da página, com os cookies e a origem do site.
+# Retorna [true, corpo] ou [false, erro].
+SCRIPT_BUSCA = """
+const [url, metodo, corpo, cabecalhos] = arguments;
+const pronto = arguments[arguments.length - 1];
+fetch(url, {method: metodo, body: corpo, headers: cabecalhos, credentials: 'include'})
+    .then(resposta => resposta.ok ? resposta.text() : Promise.reject(new Error('HTTP ' + resposta.status)))
+    .then(texto => pronto([true, texto]), erro => pronto([false, String(erro)]));
+"""
+
+
+def _produto(item, base):
+    """(url, nome) de um item da resposta, ou None se o item não for um produto."""
+    url = None
+    for chave in CHAVES_URL:
+        valor = item.get(chave)
+        if isinstance(valor, str) and '/produto/' in valor:
+            url = valor
+            break
+    if url is None:
+        url = next((valor for valor in item.values() if isinstance(valor, str) and '/produto/' in valor), None)
+    if url is None:
+        return None
+    nome = next((item[chave] for chave in CHAVES_NOME if isinstance(item.get(chave), str) and item[chave].strip()), '')
+    return urljoin(base, url.strip()), nome.strip()
+
+
+def produtos_do_json(dados, base):
+    """
+    Produtos de uma resposta JSON de listagem.
+
+    A estrutura muda de site para site, então a resposta é percorrida e vale
+    a lista com mais itens que parecem produtos (têm um link /produto/).
+
+    Returns:
+        list: (url, nome) de cada produto, na ordem da resposta
+    """
+    melhor = []
+    pilha = [dados]
+    while pilha:
+        no = pilha.pop()
+        if isinstance(no, dict):
+            pilha.extend(no.values())
+        elif isinstance(no, list):
+            produtos = [produto for produto in (_produto(item, base) for item in no if isinstance(item, dict)) if produto]
+            if len(produtos) > len(melhor):
+                melhor = produtos
+            pilha.extend(no)
+    return melhor
+
+
+def _parametro_paginacao(nomes):
+    """Primeiro nome de parâmetro de paginação reconhecido, com o tipo ('pagina' ou 'deslocamento')."""
+    for nome in nomes:
+        if nome.lower() in PARAMETROS_PAGINA:
+            return nome, 'pagina'
+        if nome.lower() in PARAMETROS_DESLOCAMENTO:
+            return nome, 'deslocamento'
+    return None, None
+
+
+def _inteiro(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+class EndpointCatalogo:
+    """
+    Requisição de listagem de produtos feita pela página de categoria,
+    com o parâmetro que a pagina.
+
+    A paginação pode estar na query string (GET) ou no corpo JSON (POST, no
+    primeiro nível ou em 'variables' de uma consulta GraphQL). O parâmetro é
+    um número de página ou um deslocamento (em itens); com deslocamento o
+    passo é o número de produtos da primeira resposta.
+    """
+
+    def __init__(self, url, metodo, corpo, cabecalhos, local, parametro, tipo, passo, produtos, base):
+        self.url = url
+        self.metodo = metodo
+        self.corpo = corpo
+        self.cabecalhos = cabecalhos
+        self.local = local
+        self.parametro = parametro
+        self.tipo = tipo
+        self.passo = passo
+        self.produtos = produtos
+        self.base = base
+
+    @classmethod
+    def da_requisicao(cls, requisicao, produtos, base):
+        """
+        Monta o endpoint a partir da requisição capturada no log de rede.
+
+        Args:
+            base: URL da página de categoria, para resolver links relativos dos produtos
+
+        Returns:
+            EndpointCatalogo, ou None se a paginação não for reconhecida
+        """
+        metodo = requisicao.get('method', 'GET').upper()
+        url = requisicao.get('url', '')
+        corpo = requisicao.get('postData')
+        cabecalhos = {
+            nome: valor for nome, valor in (requisicao.get('headers') or {}).items()
+            if nome.lower() not in CABECALHOS_IGNORADOS and not nome.lower().startswith('sec-')
+        }
+
+        consulta = parse_qsl(urlsplit(url).query, keep_blank_values=True)
+        parametro, tipo = _parametro_paginacao(nome for nome, _ in consulta)
+        if parametro is not None:
+            local = 'query'
+            valor = _inteiro(dict(consulta)[parametro])
+        elif metodo == 'POST' and corpo:
+            try:
+                dados = json.loads(corpo)
+            except ValueError:
+                return None
+            if not isinstance(dados, dict):
+                return None
+            escopo = dados.get('variables') if isinstance(dados.get('variables'), dict) else dados
+            parametro, tipo = _parametro_paginacao(escopo)
+            local = 'variables' if escopo is not dados else 'corpo'
+            valor = _inteiro(escopo.get(parametro)) if parametro else None
+        else:
+            return None
+
+        if parametro is None or valor is None:
+            return None
+        passo = 1 if tipo == 'pagina' else len(produtos)
+        return cls(url, metodo, corpo, cabecalhos, local, parametro, tipo, passo, produtos, base)
+
+    def _alterar(self, valores, deslocamento):
+        """Aplica o deslocamento ao parâmetro de paginação (e ao fim da faixa, se houver)."""
+        for nome in list(valores):
+            if nome == self.parametro or nome == PARES_DESLOCAMENTO.get(self.parametro.lower()):
+                atual = _inteiro(valores[nome])
+                if atual is not None:
+                    valores[nome] = atual + deslocamento
+        return valores
+
+    def requisicao(self, indice):
+        """URL e corpo da página `indice` (0 é a página capturada)."""
+        deslocamento = indice * self.passo
+        if self.local == 'query':
+            partes = urlsplit(self.url)
+            consulta = parse_qsl(partes.query, keep_blank_values=True)
+            valores = self._alterar(dict(consulta), deslocamento)
+            consulta = [(nome, valores[nome] if nome in valores else valor) for nome, valor in consulta]
+            return urlunsplit(partes._replace(query=urlencode(consulta))), self.corpo
+
+        dados = json.loads(self.corpo)
+        escopo = dados['variables'] if self.local == 'variables' else dados
+        self._alterar(escopo, deslocamento)
+        return self.url, json.dumps(dados)
+
+    def buscar(self, driver, indice):
+        """
+        Busca uma página da listagem de dentro do navegador.
+
+        Returns:
+            list: (url, nome) dos produtos da página
+
+        Raises:
+            RuntimeError: Se a requisição falhar ou a resposta não for JSON
+        """
+        url, corpo = self.requisicao(indice)
+        orcamento_hosts.aguardar(url)
+        ok, texto = driver.execute_async_script(SCRIPT_BUSCA, url, self.metodo, corpo, self.cabecalhos)
+        if not ok:
+            raise RuntimeError(texto)
+        try:
+            return produtos_do_json(json.loads(texto), self.base)
+        except ValueError:
+            raise RuntimeError("Resposta da API não é JSON")
+
+    def paginas(self, driver, max_paginas=None):
+        """
+        Percorre a listagem a partir da página capturada.
+
+        Gera (número da página, produtos) até uma página vir vazia ou até
+        `max_paginas`. Erros de requisição são propagados.
+        """
+        numero = 1
+        produtos = self.produtos
+        while produtos:
+            yield numero, produtos
+            if max_paginas and numero >= max_paginas:
+                return
+            produtos = self.buscar(driver, numero)
+            numero += 1
+
+
+def _corpo_resposta(driver, id_requisicao):
+    resposta = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': id_requisicao})
+    corpo = resposta.get('body', '')
+    if resposta.get('base64Encoded'):
+        corpo = base64.b64decode(corpo).decode('utf-8', errors='replace')
+    return corpo
+
+
+def descobrir_endpoint(driver):
+    """
+    Procura, no log de rede da página de categoria carregada, a requisição
+    JSON que trouxe a listagem de produtos.
+
+    O log é esvaziado nesta leitura; os eventos são devolvidos para que o
+    chamador os repasse ao registro de economia do bloqueio de recursos.
+
+    Returns:
+        (EndpointCatalogo ou None, eventos lidos do log)
+    """
+    eventos = ler_log_rede(driver)
+    if not API_CATALOGO_ATIVA:
+        return None, eventos
+
+    requisicoes = {}
+    candidatos = []
+    for evento in eventos:
+        params = evento.get('params', {})
+        if evento.get('method') == 'Network.requestWillBeSent':
+            requisicoes[params.get('requestId')] = params.get('request', {})
+        elif evento.get('method') == 'Network.responseReceived':
+            resposta = params.get('response', {})
+            if params.get('type') in ('XHR', 'Fetch') and 'json' in resposta.get('mimeType', ''):
+                candidatos.append(params.get('requestId'))
+
+    base = driver.current_url
+    encontrados = []
+    for id_requisicao in candidatos:
+        requisicao = requisicoes.get(id_requisicao)
+        if not requisicao:
+            continue
+        try:
+            produtos = produtos_do_json(json.loads(_corpo_resposta(driver, id_requisicao)), base)
+        except Exception:
+            continue
+        if produtos:
+            encontrados.append((requisicao, produtos))
+
+    # A resposta com mais produtos é a listagem; as menores costumam ser vitrines e recomendações
+    encontrados.sort(key=lambda encontrado: len(encontrado[1]), reverse=True)
+    for requisicao, produtos in encontrados:
+        endpoint = EndpointCatalogo.da_requisicao(requisicao, produtos, base)
+        if endpoint:
+            logger.info(
+                f"API de listagem encontrada: {endpoint.metodo} {urlsplit(endpoint.url).path} "
+                f"({len(produtos)} produtos por página, paginação por '{endpoint.parametro}')"
+            )
+            return endpoint, eventos
+    if encontrados:
+        logger.info("Listagem JSON encontrada, mas sem paginação reconhecida; usando a rolagem")
+    return None, eventos
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
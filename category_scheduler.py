@@ -0,0 +1,83 @@
+import os
+import asyncio
+from url_collector import URLCollector
+from job_runner import JobRunner
+from scraping_log import logger
+
+# Categorias percorridas ao mesmo tempo (cada uma ocupa um navegador e uma thread de executor_categorias)
+MAX_CATEGORIAS_SIMULTANEAS = int(os.getenv('MAX_CATEGORIAS_SIMULTANEAS', '2'))
+
+# Threads próprias das categorias: uma coleta longa (ou parada esperando a fila
+# dos workers) não ocupa o job_runner que atende as leituras da API
+executor_categorias = JobRunner(MAX_CATEGORIAS_SIMULTANEAS, prefixo='categoria')
+
+
+class AgendadorCategorias:
+    """
+    Percorre várias categorias ao mesmo tempo, com um limite global de
+    categorias simultâneas.
+
+    Cada categoria recebe o seu próprio URLCollector, e o trabalho bloqueante
+    de `coletar` deve rodar em executor_categorias. O resultado de cada uma
+    (ou o erro que a interrompeu) é entregue a `ao_concluir` assim que ela
+    termina, na ordem de conclusão, sem esperar as demais.
+
+    Os métodos devem ser chamados de dentro do loop de eventos.
+    """
+
+    def __init__(self, coletar, ao_concluir, max_simultaneas=MAX_CATEGORIAS_SIMULTANEAS):
+        """
+        Args:
+            coletar: Corrotina coletar(categoria, coletor) que percorre a categoria e
+                retorna o seu resultado (em api.py, a contagem de produtos encontrados)
+            ao_concluir: Função ao_concluir(categoria, resultado, erro) chamada ao fim
+                de cada categoria; com erro, resultado é None
+        """
+        self.coletar = coletar
+        self.ao_concluir = ao_concluir
+        self.max_simultaneas = max(1, max_simultaneas)
+        self._semaforo = asyncio.Semaphore(self.max_simultaneas)
+        self._coletores = set()
+        self._tarefas = []
+        self.cancelado = False
+
+    def iniciar(self, categorias):
+        """Agenda as categorias; no máximo `max_simultaneas` ficam em andamento."""
+        loop = asyncio.get_running_loop()
+        self._tarefas = [loop.create_task(self._executar(categoria)) for categoria in categorias]
+
+    async def _executar(self, categoria):
+        resultado, erro = None, None
+        async with self._semaforo:
+            if self.cancelado:
+                return
+            coletor = URLCollector()
+            self._coletores.add(coletor)
+            try:
+                resultado = await self.coletar(categoria, coletor)
+            except Exception as e:
+                erro = e
+            finally:
+                self._coletores.discard(coletor)
+        if not self.cancelado:
+            self.ao_concluir(categoria, resultado, erro)
+
+    def pendentes(self):
+        """Quantas categorias ainda não terminaram."""
+        return sum(1 for tarefa in self._tarefas if not tarefa.done())
+
+    def em_andamento(self):
+        """Quantas categorias estão sendo percorridas agora."""
+        return len(self._coletores)
+
+    def cancelar(self):
+        """Interrompe as categorias em andamento e descarta as que ainda não começaram."""
+        self.cancelado = True
+        for coletor in list(self._coletores):
+            coletor.cancelar()
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,238 @@
+import os
+import json
+import threading
+from datetime import datetime
+from scraping_log import logger
+
+
+class CrawlJournal:
+    """
+    Diário durável de uma coleta em andamento.
+
+    Cada acontecimento da coleta é gravado como uma linha JSON assim que
+    ocorre: os lotes de URLs descobertos em cada categoria e o fim de cada
+    categoria (fase 1), os produtos entregues a um worker e os produtos
+    concluídos (fase 2). Se o processo morrer no meio da coleta, o diário é
+    relido na próxima execução e a coleta continua de onde parou, sem abrir
+    de novo as páginas de categoria já percorridas nem repetir produtos já
+    processados. Uma categoria interrompida no meio é percorrida de novo.
+
+    Durante a coleta as URLs dos lotes só vão para o arquivo; elas são
+    carregadas em memória apenas ao reler o diário para uma retomada.
+
+    Eventos gravados:
+        {"evento": "inicio", "modo": ..., "categorias": [...], "workers": ...}
+        {"evento": "urls", "id": ..., "urls": [...]}
+        {"evento": "categoria", "id": ..., "nome": ...}
+        {"evento": "iniciado", "url": ...}
+        {"evento": "concluido", "url": ..., "sucesso": true|false}
+        {"evento": "fim"}
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._arquivo = None
+        self._limpar_estado()
+
+    def _limpar_estado(self):
+        self.modo = None
+        self.categorias = []
+        self.workers = None
+        self.iniciado_em = None
+        self.urls_categorias = {}
+        self._urls_parciais = {}
+        self.urls_descobertas = 0
+        self.em_andamento = set()
+        self.concluidas = set()
+        self.finalizado = False
+
+    def _aplicar(self, evento, guardar_urls=True):
+        """Atualiza o estado em memória com um evento do diário."""
+        tipo = evento.get('evento')
+        if tipo == 'inicio':
+            self.modo = evento.get('modo')
+            self.categorias = evento.get('categorias', [])
+            self.workers = evento.get('workers')
+            self.iniciado_em = evento.get('data')
+            self.finalizado = False
+        elif tipo == 'urls':
+            self.urls_descobertas += len(evento.get('urls', []))
+            if guardar_urls:
+                self._urls_parciais.setdefault(str(evento['id']), []).extend(evento.get('urls', []))
+        elif tipo == 'categoria':
+            id_categoria = str(evento['id'])
+            # Diários compactados (e os mais antigos) trazem as URLs no próprio evento
+            if 'urls' in evento:
+                self.urls_categorias[id_categoria] = evento['urls']
+                self.urls_descobertas += len(evento['urls'])
+            else:
+                self.urls_categorias[id_categoria] = self._urls_parciais.pop(id_categoria, [])
+        elif tipo == 'iniciado':
+            self.em_andamento.add(evento['url'])
+        elif tipo == 'concluido':
+            self.em_andamento.discard(evento['url'])
+            # Produtos que falharam são tentados de novo na retomada
+            if evento.get('sucesso', True):
+                self.concluidas.add(evento['url'])
+        elif tipo == 'fim':
+            self.finalizado = True
+
+    def carregar(self):
+        """
+        Relê o diário do disco.
+
+        Uma última linha incompleta (processo interrompido durante a escrita)
+        é ignorada.
+
+        Returns:
+            bool: True se existe uma coleta interrompida que pode ser retomada
+        """
+        with self._lock:
+            self._limpar_estado()
+            if not os.path.exists(self.caminho):
+                return False
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        self._aplicar(json.loads(linha))
+                    except (ValueError, KeyError):
+                        continue
+            return self.pendente()
+
+    def pendente(self):
+        """Indica se há uma coleta iniciada e não finalizada no diário."""
+        return self.modo is not None and not self.finalizado
+
+    def _gravar(self, evento, sincronizar=False):
+        with self._lock:
+            self._aplicar(evento, guardar_urls=False)
+            if self._arquivo is None:
+                os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+                self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+            self._arquivo.write(json.dumps(evento, ensure_ascii=False) + '\n')
+            self._arquivo.flush()
+            if sincronizar:
+                os.fsync(self._arquivo.fileno())
+
+    def iniciar(self, modo, categorias, workers, retomar=True):
+        """
+        Abre o diário para uma coleta.
+
+        Se houver uma coleta interrompida no mesmo modo e `retomar` for True,
+        as categorias e produtos já registrados são mantidos. Caso contrário o
+        diário anterior é descartado.
+
+        Returns:
+            bool: True se a coleta está sendo retomada
+        """
+        retomando = retomar and self.carregar() and self.modo == modo
+        with self._lock:
+            self._fechar_arquivo()
+            if retomando:
+                estado = self._estado_compacto()
+            else:
+                self._limpar_estado()
+                estado = []
+            # Reescreve o diário compactado, sem os eventos que já não importam
+            temporario = self.caminho + '.tmp'
+            os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+            with open(temporario, 'w', encoding='utf-8') as f:
+                for evento in estado:
+                    f.write(json.dumps(evento, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho)
+            # Produtos que estavam com algum worker quando o processo parou voltam para a fila
+            self.em_andamento = set()
+            # Categorias interrompidas no meio não entram no diário compactado
+            self._urls_parciais = {}
+            self.urls_descobertas = sum(len(urls) for urls in self.urls_categorias.values())
+
+        categorias_totais = list(dict.fromkeys(
+            (self.categorias if retomando else []) + [str(c) for c in categorias]
+        ))
+        self._gravar({
+            'evento': 'inicio',
+            'modo': modo,
+            'categorias': categorias_totais,
+            'workers': workers,
+            'data': datetime.now().isoformat()
+        }, sincronizar=True)
+        if retomando:
+            logger.info(
+                f"Retomando coleta: {len(self.urls_categorias)} categorias já percorridas, "
+                f"{len(self.concluidas)} produtos já processados"
+            )
+        return retomando
+
+    def _estado_compacto(self):
+        """Eventos mínimos que reproduzem o estado atual do diário."""
+        eventos = [
+            {'evento': 'categoria', 'id': id_categoria, 'urls': urls}
+            for id_categoria, urls in self.urls_categorias.items()
+        ]
+        eventos.extend({'evento': 'concluido', 'url': url, 'sucesso': True} for url in self.concluidas)
+        return eventos
+
+    def categoria_coletada(self, id_categoria):
+        """URLs já descobertas para a categoria, ou None se ela ainda não foi percorrida."""
+        return self.urls_categorias.get(str(id_categoria))
+
+    def registrar_urls(self, id_categoria, urls):
+        """Grava um lote de URLs descobertas em uma categoria ainda em andamento."""
+        self._gravar({'evento': 'urls', 'id': str(id_categoria), 'urls': urls})
+
+    def registrar_categoria(self, id_categoria, nome):
+        """Marca a categoria como percorrida por inteiro (fim da fase 1 para ela)."""
+        self._gravar({'evento': 'categoria', 'id': str(id_categoria), 'nome': nome}, sincronizar=True)
+
+    def registrar_inicio_produto(self, url):
+        """Marca um produto como entregue a um worker."""
+        self._gravar({'evento': 'iniciado', 'url': url})
+
+    def registrar_produto(self, url, sucesso):
+        """Marca um produto como processado, com ou sem sucesso."""
+        self._gravar({'evento': 'concluido', 'url': url, 'sucesso': bool(sucesso)})
+
+    def concluido(self, url):
+        """Indica se o produto já foi processado nesta coleta."""
+        return url in self.concluidas
+
+    def finalizar(self):
+        """Marca a coleta como concluída; ela não será mais retomada."""
+        self._gravar({'evento': 'fim'}, sincronizar=True)
+        self.fechar()
+
+    def _fechar_arquivo(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def fechar(self):
+        """Fecha o arquivo do diário, mantendo o estado para uma retomada futura."""
+        with self._lock:
+            self._fechar_arquivo()
+
+    def resumo(self):
+        """Situação da coleta registrada no diário."""
+        with self._lock:
+            return {
+                'pendente': self.pendente(),
+                'modo': self.modo,
+                'categorias': self.categorias,
+                'workers': self.workers,
+                'iniciado_em': self.iniciado_em,
+                'categorias_coletadas': len(self.urls_categorias),
+                'urls_descobertas': self.urls_descobertas,
+                'produtos_concluidos': len(self.concluidas),
+                'produtos_em_andamento': len(self.em_andamento)
+            }
+
+
+# Cria uma instância global do diário, ao lado dos dados armazenados
+diario_coleta = CrawlJournal(os.path.join(os.getenv('DADOS_DIR', 'dados'), 'coleta.journal.jsonl'))
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,216 @@
+import io
+import os
+import hashlib
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+from product_store import COLUNAS, FORMATO_DATA
+from product_serializer import serializar_produtos, codificar_json
+from scraping_log import logger
+
+# Linhas convertidas por vez: limita a memória usada por cada exportação
+LINHAS_POR_BLOCO = 5000
+
+# Formato -> (tipo de conteúdo, extensão do arquivo)
+FORMATOS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+def _blocos(df, posicoes, tamanho=LINHAS_POR_BLOCO):
+    """Fatias do frame nas posições informadas, um bloco por vez."""
+    for inicio in range(0, len(posicoes), tamanho):
+        yield df.iloc[posicoes[inicio:inicio + tamanho]]
+
+
+def gerar_csv(df, posicoes):
+    """Gera o CSV em blocos, sem montar o arquivo inteiro em memória."""
+    for numero, bloco in enumerate(_blocos(df, posicoes)):
+        yield bloco.to_csv(index=False, header=(numero == 0), date_format=FORMATO_DATA).encode('utf-8')
+
+
+def gerar_ndjson(df, posicoes):
+    """Gera um produto JSON por linha, em blocos."""
+    for bloco in _blocos(df, posicoes):
+        yield b''.join(codificar_json(produto) + b'\n' for produto in serializar_produtos(bloco))
+
+
+class _SaidaDrenavel(io.RawIOBase):
+    """Arquivo só de escrita cujo conteúdo é retirado aos pedaços (usado pelo ParquetWriter)."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def esquema_parquet(df):
+    """
+    Esquema Parquet do frame de produtos.
+
+    Inferido de um frame vazio, uma coluna de objetos (ex.: sku) sairia
+    como null e recusaria os blocos com valores; essas colunas são texto.
+    """
+    esquema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    for indice, campo in enumerate(esquema):
+        if pa.types.is_null(campo.type):
+            esquema = esquema.set(indice, pa.field(campo.name, pa.string()))
+    return esquema
+
+
+def gerar_parquet(df, posicoes):
+    """Gera o Parquet com um row group por bloco, enviando cada um assim que é escrito."""
+    saida = _SaidaDrenavel()
+    esquema = esquema_parquet(df)
+    with pq.ParquetWriter(saida, esquema) as writer:
+        for bloco in _blocos(df, posicoes):
+            writer.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+            dados = saida.drenar()
+            if dados:
+                yield dados
+    dados = saida.drenar()
+    if dados:
+        yield dados
+
+
+def escrever_excel(df, posicoes, caminho):
+    """
+    Escreve o Excel em disco com o modo constant_memory do xlsxwriter: cada
+    linha é gravada em arquivo temporário assim que é escrita, então a memória
+    usada não cresce com o tamanho da base.
+    """
+    temporario = caminho + '.tmp'
+    workbook = xlsxwriter.Workbook(temporario, {'constant_memory': True})
+    try:
+        planilha = workbook.add_worksheet('Dados Nutricionais')
+        formato_data = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        planilha.write_row(0, 0, COLUNAS)
+        coluna_data = COLUNAS.index('data_coleta')
+        linha = 1
+        for bloco in _blocos(df, posicoes):
+            colunas = [bloco[coluna].tolist() for coluna in COLUNAS]
+            for valores in zip(*colunas):
+                planilha.write_row(linha, 0, valores[:coluna_data])
+                if not pd.isna(valores[coluna_data]):
+                    planilha.write_datetime(linha, coluna_data, valores[coluna_data], formato_data)
+                planilha.write_row(linha, coluna_data + 1, valores[coluna_data + 1:])
+                linha += 1
+    finally:
+        workbook.close()
+    os.replace(temporario, caminho)
+
+
+def ler_arquivo(arquivo, tamanho=64 * 1024):
+    """Lê um arquivo já aberto em pedaços para a resposta em streaming, fechando-o no fim."""
+    with arquivo as f:
+        while True:
+            pedaco = f.read(tamanho)
+            if not pedaco:
+                break
+            yield pedaco
+
+
+class CacheExcel:
+    """
+    Planilhas Excel já geradas, guardadas em disco até os dados mudarem.
+
+    A chave inclui a geração do DatasetCache, que muda a cada alteração da
+    base; arquivos de gerações anteriores são apagados quando uma nova
+    planilha é gerada. A planilha é entregue já aberta, então um download em
+    andamento continua lendo o arquivo mesmo que ele seja apagado no meio.
+    """
+
+    def __init__(self, diretorio, max_arquivos=8):
+        self.diretorio = diretorio
+        self.max_arquivos = max_arquivos
+        self._lock = threading.Lock()
+        self._arquivos = {}
+
+    def limpar(self):
+        """Apaga as planilhas deixadas por uma execução anterior (chamado na inicialização da API)."""
+        with self._lock:
+            self._arquivos = {}
+            if not os.path.isdir(self.diretorio):
+                return
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith(('.xlsx', '.tmp')):
+                    try:
+                        os.remove(os.path.join(self.diretorio, nome))
+                    except OSError:
+                        pass
+
+    def _nome(self, geracao, filtros):
+        chave = '_'.join(''.join(c if c.isalnum() else '-' for c in str(f or ''))[:40] for f in filtros)
+        # Resumo estável entre execuções (o hash() do Python muda a cada processo)
+        resumo = hashlib.sha1(repr(filtros).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.diretorio, f"dados_{geracao}_{resumo}_{chave}.xlsx")
+
+    def obter(self, df, posicoes, geracao, filtros):
+        """
+        Abre a planilha para os filtros, gerando-a se necessário.
+
+        Deve ser chamado fora do loop de eventos (a geração pode levar alguns segundos).
+
+        Returns:
+            O arquivo aberto para leitura binária; quem chamou deve fechá-lo
+        """
+        with self._lock:
+            chave = (geracao, filtros)
+            caminho = self._arquivos.get(chave)
+            if caminho and os.path.exists(caminho):
+                # Aberto ainda dentro do lock, antes que outra exportação possa apagá-lo
+                return open(caminho, 'rb')
+
+            os.makedirs(self.diretorio, exist_ok=True)
+            caminho = self._nome(geracao, filtros)
+            escrever_excel(df, posicoes, caminho)
+            logger.info(f"Planilha gerada com {len(posicoes)} produtos: {caminho}")
+
+            # Remove planilhas de dados antigos e as excedentes
+            for antiga in [c for c in self._arquivos if c[0] != geracao]:
+                self._remover(antiga)
+            while len(self._arquivos) >= self.max_arquivos:
+                self._remover(next(iter(self._arquivos)))
+            self._arquivos[chave] = caminho
+            return open(caminho, 'rb')
+
+    def _remover(self, chave):
+        caminho = self._arquivos.pop(chave)
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+# Formatos gerados em streaming, bloco a bloco (o Excel vem do CacheExcel)
+GERADORES = {
+    'csv': gerar_csv,
+    'ndjson': gerar_ndjson,
+    'parquet': gerar_parquet
+}
+
+# Cria uma instância global do cache de planilhas, ao lado dos dados armazenados
+cache_excel = CacheExcel(os.path.join(os.getenv('DADOS_DIR', 'dados'), 'exportacoes'))
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,369 @@
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from product_store import store, normalizar_frame, deduplicar, id_produto
+from search_index import construir_indice
+from numeric_index import construir_indices_numericos, valores_da_base, filtrar_faixas, paginar_por_chaves
+from scraping_log import logger
+
+
+def chave_data(datas):
+    """Chave float crescente da listagem: data_coleta decrescente, com as linhas sem data no fim."""
+    valores = datas.to_numpy(dtype='datetime64[ns]').view('int64').astype(float)
+    return np.where(datas.isna().to_numpy(), np.inf, -valores)
+
+
+def ids_produtos(frame):
+    """Ids estáveis (ver product_store.id_produto) das linhas: o SKU ou, sem ele, o hash da URL."""
+    ids = pd.to_numeric(frame['sku'], errors='coerce')
+    sem_sku = ids.isna().to_numpy()
+    ids = ids.fillna(0).to_numpy(dtype=np.int64)
+    if sem_sku.any():
+        ids[sem_sku] = [id_produto(url) for url in frame['url'].to_numpy()[sem_sku]]
+    return ids
+
+
+def ordem_recente(chaves, ids):
+    """
+    Posições das linhas da coleta mais recente para a mais antiga.
+
+    Recebe as chaves de chave_data(); linhas sem data ficam no final e
+    empates são desfeitos pelo id do produto, para que a ordem não dependa da
+    posição das linhas na base.
+    """
+    return np.lexsort((ids, chaves))
+
+
+# Campos com índice de busca
+CAMPOS_BUSCA = ['nome', 'categoria']
+
+
+class DatasetCache:
+    """
+    Cópia em memória da base de produtos, compartilhada pelos endpoints de leitura.
+
+    A base é lida do disco uma única vez. Produtos gravados pelo próprio
+    processo chegam por notificação do ProductStore e são anexados ao frame
+    na próxima leitura, sem reler os arquivos. Escritas feitas por outro
+    processo (ex.: `python product_store.py migrar`) são detectadas pela
+    assinatura dos arquivos (tamanho e data de modificação), verificada no
+    máximo a cada `intervalo_verificacao` segundos; as escritas do próprio
+    processo não custam uma leitura da assinatura.
+
+    Junto com o frame são mantidos a ordem das linhas por data_coleta
+    decrescente, para que as listagens só precisem filtrar e fatiar, e
+    índices invertidos de nome e categoria para a busca e índices ordenados
+    das colunas numéricas para as consultas por faixa de valores.
+
+    O DataFrame devolvido é compartilhado entre as requisições e não deve ser
+    alterado; filtros e ordenações devem gerar novos frames.
+    """
+
+    def __init__(self, store, intervalo_verificacao=1.0):
+        self.store = store
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._frame = None
+        # Muda a cada alteração do conteúdo do frame (usada por caches derivados)
+        self.geracao = 0
+        # Identifica o processo: a geração recomeça do zero a cada reinício
+        self._instancia = f"{os.getpid():x}{time.time_ns():x}"
+        self._modificado_em = time.time()
+        self._ordem = None
+        self._posicao_na_ordem = None
+        self._chaves_ordem = None
+        self._indices = {}
+        self._indices_numericos = {}
+        # Por posição: id estável de cada produto e chave de data da listagem
+        self._ids = None
+        self._chave_data = None
+        self._posicao_por_id = {}
+        self._data_maxima = pd.NaT
+        self._versao = -1
+        self._ultima_verificacao = 0.0
+        # Preenchidos pelo ouvinte do store, que roda dentro do lock do store:
+        # por isso não usam o lock do cache (evita inversão de locks)
+        self._pendentes = deque()
+        self._recarregar = False
+        store.ao_alterar(self._ao_alterar_store)
+
+    def _ao_alterar_store(self, tipo, versao, registros):
+        if tipo == 'adicionados':
+            self._pendentes.append((versao, registros))
+        elif tipo == 'substituidos':
+            self._recarregar = True
+
+    def _carregar(self):
+        self._recarregar = False
+        inicio = time.perf_counter()
+        self._frame, self._versao, assinatura = self.store.carregar_versionado()
+        self.geracao += 1
+        # Data da última escrita nos arquivos da base
+        self._modificado_em = max((mtime / 1e9 for _, _, mtime in assinatura), default=time.time())
+        self._indexar()
+        self._ultima_verificacao = time.monotonic()
+        logger.info(f"Base carregada em memória: {len(self._frame)} produtos em {time.perf_counter() - inicio:.2f}s")
+
+    def _indexar(self):
+        """Recalcula a partir do frame os ids, a ordem da listagem e os índices de busca."""
+        self._ids = ids_produtos(self._frame)
+        self._chave_data = chave_data(self._frame['data_coleta'])
+        self._atualizar_posicao_por_id(0)
+        self._ordem = ordem_recente(self._chave_data, self._ids)
+        self._atualizar_posicao_na_ordem()
+        self._data_maxima = self._frame['data_coleta'].max()
+        self._indices = {campo: construir_indice(self._frame[campo]) for campo in CAMPOS_BUSCA}
+        self._indices_numericos = construir_indices_numericos(self._frame)
+
+    def _aplicar_pendentes(self):
+        """
+        Aplica ao frame os produtos gravados desde a última leitura.
+
+        Produtos novos são anexados no fim, atualizando os índices sem
+        reconstruí-los. Uma nova coleta de um produto que já está no frame
+        (mesmo id) substitui a linha dele na mesma posição; como os índices
+        não removem entradas, nesse caso eles são recalculados.
+        """
+        registros = []
+        while self._pendentes:
+            versao, novos = self._pendentes.popleft()
+            # Registros gravados antes da carga completa já estão no frame
+            if versao > self._versao:
+                registros.extend(novos)
+                self._versao = versao
+        if not registros:
+            return
+        quantidade_anterior = len(self._frame)
+        novos = deduplicar(normalizar_frame(pd.DataFrame.from_records(registros)))
+        ids_novos = ids_produtos(novos)
+        self.geracao += 1
+        self._modificado_em = time.time()
+
+        posicoes = [self._posicao_por_id.get(produto_id) for produto_id in ids_novos.tolist()]
+        existentes = np.array([posicao is not None for posicao in posicoes], dtype=bool)
+        if existentes.any():
+            # O frame é compartilhado com requisições em andamento: a troca é feita em uma cópia
+            frame = self._frame.copy()
+            substitutos = novos[existentes]
+            frame.iloc[[posicao for posicao in posicoes if posicao is not None]] = substitutos
+            self._frame = pd.concat([frame, novos[~existentes]], ignore_index=True)
+            self._indexar()
+            return
+
+        self._frame = pd.concat([self._frame, novos], ignore_index=True)
+        chaves_novas = chave_data(novos['data_coleta'])
+        self._ids = np.concatenate([self._ids, ids_novos])
+        self._chave_data = np.concatenate([self._chave_data, chaves_novas])
+        self._atualizar_posicao_por_id(quantidade_anterior)
+
+        # Produtos recém-coletados costumam ser os mais recentes: basta colocá-los
+        # na frente da ordem atual. Caso contrário (ou com empate de data) a
+        # ordem é recalculada.
+        datas_novas = novos['data_coleta']
+        if not datas_novas.isna().any() and (
+            pd.isna(self._data_maxima) or datas_novas.min() > self._data_maxima
+        ):
+            self._ordem = np.concatenate([quantidade_anterior + ordem_recente(chaves_novas, ids_novos), self._ordem])
+        else:
+            self._ordem = ordem_recente(self._chave_data, self._ids)
+        self._atualizar_posicao_na_ordem()
+        self._data_maxima = self._frame['data_coleta'].max()
+        for campo, indice in self._indices.items():
+            indice.adicionar(novos[campo].tolist(), quantidade_anterior)
+        for (coluna, base), indice in self._indices_numericos.items():
+            indice.adicionar(valores_da_base(novos, coluna, base), quantidade_anterior)
+
+    def _atualizar_posicao_por_id(self, inicio):
+        """Indexa por id as linhas a partir de `inicio`."""
+        if inicio == 0:
+            self._posicao_por_id = {}
+        self._posicao_por_id.update(zip(self._ids[inicio:].tolist(), range(inicio, len(self._ids))))
+
+    def _atualizar_posicao_na_ordem(self):
+        """Inverso da ordem: em que lugar da listagem por data cada linha aparece."""
+        self._posicao_na_ordem = np.empty(len(self._ordem), dtype=np.int64)
+        self._posicao_na_ordem[self._ordem] = np.arange(len(self._ordem))
+        # Chaves da listagem sem busca, já na ordem (usadas pelo cursor)
+        self._chaves_ordem = [self._chave_data[self._ordem], self._ids[self._ordem].astype(float)]
+
+    def _atualizar(self):
+        if self._frame is None or self._recarregar:
+            self._pendentes.clear()
+            self._carregar()
+            return
+
+        if self._pendentes:
+            self._aplicar_pendentes()
+
+        agora = time.monotonic()
+        if agora - self._ultima_verificacao >= self.intervalo_verificacao:
+            self._ultima_verificacao = agora
+            if self.store.alterado_externamente():
+                logger.info("Arquivos da base alterados externamente; recarregando")
+                self._carregar()
+
+    def obter(self):
+        """Retorna o DataFrame atualizado da base (somente leitura)."""
+        with self._lock:
+            self._atualizar()
+            return self._frame
+
+    def consultar(self, nome=None, categoria=None):
+        """
+        Aplica os filtros de busca sobre a base.
+
+        A busca ignora acentos, plurais e stopwords e trata cada termo como
+        prefixo. Com busca por nome, os resultados vêm por relevância e, em
+        caso de empate, pela data de coleta; sem ela, apenas por data
+        decrescente.
+
+        Returns:
+            (DataFrame, posições) com as posições das linhas selecionadas, já ordenadas
+        """
+        return self.consultar_versionado(nome, categoria)[:2]
+
+    def _buscar_texto(self, nome, categoria):
+        """Posições (crescentes) e pontuação das linhas que atendem à busca, ou None se não houver filtro."""
+        posicoes = pontuacao = None
+        for campo, consulta in (('categoria', categoria), ('nome', nome)):
+            # Consultas vazias ou só com stopwords (ex.: "de") não filtram
+            encontrados = self._indices[campo].buscar(consulta) if consulta else None
+            if encontrados is None:
+                continue
+            encontradas, pontos = encontrados
+            if campo != 'nome':
+                pontos = np.zeros(len(encontradas))
+            if posicoes is None:
+                posicoes, pontuacao = encontradas, pontos
+            else:
+                posicoes, i1, i2 = np.intersect1d(posicoes, encontradas, assume_unique=True, return_indices=True)
+                pontuacao = pontuacao[i1] + pontos[i2]
+        if posicoes is None:
+            return None
+        return posicoes, pontuacao
+
+    def consultar_versionado(self, nome=None, categoria=None):
+        """Igual a consultar(), mas retorna também a geração dos dados: (DataFrame, posições, geração)."""
+        with self._lock:
+            self._atualizar()
+            encontrados = self._buscar_texto(nome, categoria)
+            if encontrados is None:
+                return self._frame, self._ordem, self.geracao
+            posicoes, pontuacao = encontrados
+            ordem = np.lexsort((self._posicao_na_ordem[posicoes], -pontuacao))
+            return self._frame, posicoes[ordem], self.geracao
+
+    def consultar_faixas(self, faixas, base='porcao', nome=None, categoria=None):
+        """
+        Seleciona os produtos cujos valores numéricos estão dentro das faixas.
+
+        As faixas são resolvidas pelos índices ordenados das colunas e podem
+        ser combinadas com a busca por nome e categoria.
+
+        Args:
+            faixas: {coluna: (mínimo, máximo)}, com None para lado aberto
+            base: 'porcao' (valores como coletados) ou '100g'
+
+        Returns:
+            (DataFrame, posições em ordem crescente, ids de todas as linhas, geração)
+        """
+        with self._lock:
+            self._atualizar()
+            posicoes = filtrar_faixas(self._frame, self._indices_numericos, faixas, base)
+            encontrados = self._buscar_texto(nome, categoria)
+            if encontrados is not None:
+                posicoes = np.intersect1d(posicoes, encontrados[0], assume_unique=True)
+            return self._frame, posicoes, self._ids, self.geracao
+
+    def listar_pagina(self, nome=None, categoria=None, limite=10, cursor=None, anterior=False):
+        """
+        Uma página da listagem de consultar(), paginada por cursor (keyset).
+
+        A listagem é ordenada por (data_coleta decrescente, id) — precedida da
+        relevância quando há busca por nome — e o cursor guarda esses valores
+        para a linha de referência. Produtos coletados enquanto o usuário
+        navega não deslocam as páginas seguintes. Sem busca, a ordem já está
+        pronta e a página sai por busca binária, com o mesmo custo em qualquer
+        profundidade; com busca, as linhas encontradas são ordenadas a cada
+        requisição (O(n log n) no número de resultados).
+
+        Args:
+            cursor: Valores das chaves recebidos em uma página anterior
+            anterior: Se True, retorna a página antes do cursor
+
+        Returns:
+            (DataFrame, posições da página, ids da página, total,
+            cursor da próxima página, cursor da página anterior)
+
+        Raises:
+            ValueError: Se o cursor não corresponder à listagem pedida
+        """
+        with self._lock:
+            self._atualizar()
+            encontrados = self._buscar_texto(nome, categoria)
+            if encontrados is None:
+                posicoes = self._ordem
+                chaves = self._chaves_ordem
+            else:
+                posicoes, pontuacao = encontrados
+                ordem = np.lexsort((self._posicao_na_ordem[posicoes], -pontuacao))
+                posicoes = posicoes[ordem]
+                chaves = [-pontuacao[ordem], self._chave_data[posicoes], self._ids[posicoes].astype(float)]
+            if cursor is not None and len(cursor) != len(chaves):
+                raise ValueError("Cursor de outra listagem")
+
+            inicio, fim, proximo, previo = paginar_por_chaves(chaves, limite, cursor, anterior)
+            pagina = posicoes[inicio:fim]
+            return self._frame, pagina, self._ids[pagina], len(posicoes), proximo, previo
+
+    def obter_por_id(self, produto_id):
+        """Retorna (DataFrame, posição) do produto com o id, ou (DataFrame, None) se não existir."""
+        with self._lock:
+            self._atualizar()
+            return self._frame, self._posicao_por_id.get(produto_id)
+
+    def validadores(self):
+        """
+        Versão dos dados para validação de caches HTTP.
+
+        Returns:
+            (versão, data da última alteração em segundos desde a época); a
+            versão muda a cada alteração e entre reinícios do processo
+        """
+        with self._lock:
+            self._atualizar()
+            return f"{self._instancia}-{self.geracao}", self._modificado_em
+
+    def validadores_em_memoria(self):
+        """
+        Os mesmos validadores de validadores(), sem ler nada do disco, para
+        uso direto no loop de eventos.
+
+        Returns:
+            (versão, data da última alteração), ou None se a base ainda
+            precisa ser carregada, atualizada ou conferida, ou se outra
+            thread está usando o cache; nesse caso use validadores() no job_runner
+        """
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if (self._frame is None or self._recarregar or self._pendentes
+                    or time.monotonic() - self._ultima_verificacao >= self.intervalo_verificacao):
+                return None
+            return f"{self._instancia}-{self.geracao}", self._modificado_em
+        finally:
+            self._lock.release()
+
+    def invalidar(self):
+        """Força a releitura da base na próxima chamada de obter()."""
+        self._recarregar = True
+
+
+# Cria uma instância global do cache da base
+dataset = DatasetCache(store)
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,191 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from browser_config import configurar_driver
+from scraping_log import logger
+
+# Máximo de navegadores abertos ao mesmo tempo (workers + categorias percorridas em paralelo)
+MAX_DRIVERS = int(os.getenv('MAX_DRIVERS', int(os.getenv('MAX_WORKERS', '4')) + 2))
+
+# Quantidade de páginas que um navegador carrega antes de ser reciclado
+PAGINAS_POR_DRIVER = int(os.getenv('PAGINAS_POR_DRIVER', '200'))
+
+# Navegadores abertos na inicialização da API
+DRIVERS_AQUECIDOS = int(os.getenv('DRIVERS_AQUECIDOS', '1'))
+
+
+class DriverLeaseManager:
+    """
+    Mantém navegadores abertos e os empresta ao coletor de URLs e ao scraper.
+
+    O custo de abrir o Chrome (detecção do navegador, do driver e a página de
+    teste) é pago uma vez por navegador, e não mais a cada categoria. Um
+    navegador é reciclado depois de PAGINAS_POR_DRIVER páginas ou quando deixa
+    de responder.
+    """
+
+    def __init__(self, max_drivers=None, paginas_por_driver=None, criar_driver=configurar_driver):
+        self.max_drivers = max_drivers or MAX_DRIVERS
+        self.paginas_por_driver = paginas_por_driver or PAGINAS_POR_DRIVER
+        self.criar_driver = criar_driver
+        self._condicao = threading.Condition()
+        self._livres = []
+        self._paginas = {}
+        self._total = 0
+        self._encerrado = False
+
+    def _abrir(self):
+        """Abre um novo navegador (fora do lock, pois leva alguns segundos)."""
+        try:
+            driver = self.criar_driver()
+        except Exception:
+            with self._condicao:
+                self._total -= 1
+                self._condicao.notify()
+            raise
+        with self._condicao:
+            self._paginas[id(driver)] = 0
+        return driver
+
+    def _fechar(self, driver):
+        """Fecha o navegador e libera a vaga para outro."""
+        with self._condicao:
+            if self._paginas.pop(id(driver), None) is None:
+                return
+            self._total -= 1
+            self._condicao.notify()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _saudavel(driver):
+        """Verifica se o navegador ainda responde."""
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def aquecer(self, quantidade=DRIVERS_AQUECIDOS):
+        """Abre navegadores antecipadamente e os deixa disponíveis."""
+        drivers = []
+        for _ in range(quantidade):
+            with self._condicao:
+                if self._total >= self.max_drivers:
+                    break
+                self._total += 1
+            try:
+                drivers.append(self._abrir())
+            except Exception as e:
+                logger.error(f"Erro ao aquecer navegador: {str(e)}")
+                break
+        with self._condicao:
+            self._livres.extend(drivers)
+            self._condicao.notify_all()
+        if drivers:
+            logger.info(f"{len(drivers)} navegador(es) aquecido(s)")
+        return len(drivers)
+
+    def adquirir(self, timeout=300):
+        """
+        Empresta um navegador, reaproveitando um livre ou abrindo um novo se
+        houver vaga. Aguarda até `timeout` segundos se todos estiverem em uso.
+        """
+        limite = time.monotonic() + timeout
+        while True:
+            with self._condicao:
+                if self._encerrado:
+                    raise Exception("Gerenciador de navegadores encerrado")
+                if self._livres:
+                    driver = self._livres.pop()
+                elif self._total < self.max_drivers:
+                    self._total += 1
+                    driver = None
+                else:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        raise Exception("Nenhum navegador disponível no momento")
+                    self._condicao.wait(restante)
+                    continue
+
+            if driver is None:
+                return self._abrir()
+            if self._saudavel(driver):
+                return driver
+            logger.warning("Navegador ocioso não responde; abrindo outro")
+            self._fechar(driver)
+
+    def registrar_pagina(self, driver):
+        """
+        Conta uma página carregada pelo navegador.
+
+        Returns:
+            bool: True se o navegador atingiu o limite de páginas e deve ser devolvido
+        """
+        with self._condicao:
+            if id(driver) not in self._paginas:
+                return False
+            self._paginas[id(driver)] += 1
+            return self._paginas[id(driver)] >= self.paginas_por_driver
+
+    def devolver(self, driver):
+        """Devolve o navegador; ele é reciclado se estiver gasto ou travado."""
+        if driver is None:
+            return
+        with self._condicao:
+            paginas = self._paginas.get(id(driver))
+        if paginas is None:
+            return
+        if self._encerrado or paginas >= self.paginas_por_driver or not self._saudavel(driver):
+            logger.info(f"Reciclando navegador após {paginas} páginas")
+            self._fechar(driver)
+            return
+        with self._condicao:
+            self._livres.append(driver)
+            self._condicao.notify()
+
+    def descartar(self, driver):
+        """Fecha um navegador emprestado que travou ou precisa ser interrompido."""
+        if driver is not None:
+            self._fechar(driver)
+
+    @contextmanager
+    def emprestar(self, timeout=300):
+        """Empresta um navegador dentro de um bloco with, descartando-o se houver erro."""
+        driver = self.adquirir(timeout)
+        try:
+            yield driver
+        except Exception:
+            self.descartar(driver)
+            raise
+        else:
+            self.devolver(driver)
+
+    def encerrar(self):
+        """Fecha todos os navegadores livres e impede novos empréstimos."""
+        with self._condicao:
+            self._encerrado = True
+            livres, self._livres = self._livres, []
+            self._condicao.notify_all()
+        for driver in livres:
+            self._fechar(driver)
+
+    def status(self):
+        """Resumo de quantos navegadores estão abertos, livres e em uso."""
+        with self._condicao:
+            return {
+                'abertos': self._total,
+                'livres': len(self._livres),
+                'em_uso': self._total - len(self._livres),
+                'max_drivers': self.max_drivers
+            }
+
+
+# Cria uma instância global do gerenciador de navegadores
+driver_manager = DriverLeaseManager()
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,212 @@
+import re
+import json
+import urllib.request
+from bs4 import BeautifulSoup
+from browser_config import USER_AGENT
+from nutrition_extraction import MAPA_NOMES
+from rate_budget import orcamento_hosts
+from scraping_log import logger
+
+try:
+    import lxml  # noqa: F401
+    PARSER_HTML = 'lxml'
+except ImportError:
+    PARSER_HTML = 'html.parser'
+
+# Mesmas regras do SCRIPT_EXTRACAO, em Python
+_ALTERNATIVAS = '|'.join(re.escape(s) for s in sorted(MAPA_NOMES, key=len, reverse=True))
+RE_ROTULO = re.compile(f'({_ALTERNATIVAS})', re.IGNORECASE)
+RE_TEXTO = re.compile(rf'({_ALTERNATIVAS})[:\s]*(\d+[,.]?\d*)', re.IGNORECASE)
+RE_PORCAO = re.compile(r'por[cç][aã]o[:\s]+(?:de\s+)?(\d+)\s*(?:g|gr|grama|gramas)\b', re.IGNORECASE)
+RE_NUMERO = re.compile(r'(\d+[,.]?\d*)')
+RE_NUTRICIONAL = re.compile(r'valor energ[eé]tico|valor cal[oó]rico|carboidrato|prote[ií]na', re.IGNORECASE)
+
+CAMPOS_NUTRICIONAIS = [
+    'calorias', 'carboidratos', 'proteinas', 'gorduras',
+    'gorduras_saturadas', 'fibras', 'acucares', 'sodio'
+]
+
+# Chaves comuns para rótulo e valor em estados JSON embutidos na página
+CHAVES_ROTULO = ('name', 'label', 'nome', 'title', 'description', 'descricao')
+CHAVES_VALOR = ('value', 'valor', 'quantity', 'quantidade', 'amount')
+
+
+def baixar_html(url, timeout=15):
+    """Baixa o HTML bruto de uma página sem usar o navegador, no ritmo permitido para o domínio."""
+    orcamento_hosts.aguardar(url)
+    requisicao = urllib.request.Request(url, headers={
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml',
+        'Accept-Language': 'pt-BR,pt;q=0.9'
+    })
+    with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+        charset = resposta.headers.get_content_charset() or 'utf-8'
+        return resposta.read().decode(charset, errors='replace')
+
+
+def _valor_numerico(texto):
+    match = RE_NUMERO.search(str(texto))
+    return match.group(1).replace(',', '.') if match else "0"
+
+
+def _campo(sinonimo):
+    return MAPA_NOMES.get(sinonimo.lower())
+
+
+def _dados_vazios(url, nome="Sem informação"):
+    dados = {'nome': nome, 'url': url, 'porcao': "0"}
+    dados.update({campo: "0" for campo in CAMPOS_NUTRICIONAIS})
+    return dados
+
+
+def _encontrar_escopo(soup):
+    """Localiza a subárvore da tabela nutricional (ou o body se não encontrar)."""
+    corpo = soup.body or soup
+    ancora = None
+    for tabela in corpo.find_all('table'):
+        if RE_NUTRICIONAL.search(tabela.get_text(' ')):
+            ancora = tabela
+            break
+    if ancora is None:
+        titulo = corpo.find(
+            ['h2', 'h3', 'button'],
+            string=lambda texto: texto and 'tabela nutricional' in texto.lower()
+        )
+        ancora = titulo.parent if titulo else None
+    if ancora is None:
+        return corpo
+
+    # Sobe alguns níveis para incluir a porção, que costuma ficar acima da tabela
+    escopo = ancora
+    for _ in range(4):
+        if RE_PORCAO.search(escopo.get_text(' ')) or escopo.parent is None:
+            break
+        escopo = escopo.parent
+    return escopo
+
+
+def extrair_de_html(html, url):
+    """
+    Extrai os dados nutricionais do HTML bruto de uma página de produto.
+
+    Returns:
+        dict: Mesmo formato retornado por SCRIPT_EXTRACAO, ou None se nenhum
+        valor nutricional for encontrado.
+    """
+    soup = BeautifulSoup(html, PARSER_HTML)
+    for elemento in soup(['script', 'style', 'noscript']):
+        elemento.decompose()
+
+    titulo = soup.find('h1')
+    dados = _dados_vazios(url, titulo.get_text(strip=True) if titulo else "Sem informação")
+
+    escopo = _encontrar_escopo(soup)
+    texto_escopo = escopo.get_text(' ', strip=True)
+
+    match_porcao = RE_PORCAO.search(texto_escopo)
+    if not match_porcao and soup.body is not None and escopo is not soup.body:
+        match_porcao = RE_PORCAO.search(soup.body.get_text(' ', strip=True))
+    if match_porcao:
+        dados['porcao'] = match_porcao.group(1)
+
+    # Linhas da tabela: o primeiro valor encontrado para cada campo é mantido
+    tabelas = [escopo] if escopo.name == 'table' else escopo.find_all('table')
+    for tabela in tabelas:
+        for linha in tabela.find_all('tr'):
+            celulas = linha.find_all(['td', 'th'], recursive=False)
+            if len(celulas) < 2:
+                continue
+            match = RE_ROTULO.search(celulas[0].get_text(' ', strip=True))
+            campo = _campo(match.group(1)) if match else None
+            if campo and dados[campo] == "0":
+                dados[campo] = _valor_numerico(celulas[1].get_text(' ', strip=True))
+
+    # Texto livre: preenche apenas os campos que a tabela não trouxe
+    for match in RE_TEXTO.finditer(texto_escopo):
+        campo = _campo(match.group(1))
+        if campo and dados[campo] == "0":
+            dados[campo] = match.group(2).replace(',', '.')
+
+    if all(dados[campo] == "0" for campo in CAMPOS_NUTRICIONAIS):
+        return None
+    return dados
+
+
+def _nutrientes_do_json(obj, dados, profundidade=0):
+    """Procura pares rótulo/valor nutricionais em qualquer nível do JSON."""
+    if profundidade > 40:
+        return
+    if isinstance(obj, dict):
+        rotulo = next((obj[c] for c in CHAVES_ROTULO if isinstance(obj.get(c), str)), None)
+        valor = next((obj[c] for c in CHAVES_VALOR if obj.get(c) not in (None, '')), None)
+        if rotulo and valor is not None and not isinstance(valor, (dict, list)):
+            match_porcao = RE_PORCAO.search(f"{rotulo} {valor}")
+            if match_porcao and dados['porcao'] == "0":
+                dados['porcao'] = match_porcao.group(1)
+            match = RE_ROTULO.search(rotulo)
+            campo = _campo(match.group(1)) if match else None
+            if campo and dados[campo] == "0":
+                dados[campo] = _valor_numerico(valor)
+        for valor_filho in obj.values():
+            _nutrientes_do_json(valor_filho, dados, profundidade + 1)
+    elif isinstance(obj, list):
+        for item in obj:
+            _nutrientes_do_json(item, dados, profundidade + 1)
+
+
+def extrair_de_estado_json(html, url):
+    """
+    Extrai os dados nutricionais do estado JSON embutido na página
+    (__NEXT_DATA__, ld+json e outros scripts application/json).
+
+    Returns:
+        dict: Mesmo formato de extrair_de_html, ou None se o estado não tiver
+        pelo menos dois valores nutricionais.
+    """
+    soup = BeautifulSoup(html, PARSER_HTML)
+    scripts = soup.find_all('script', type=['application/json', 'application/ld+json'])
+    if not scripts:
+        return None
+
+    titulo = soup.find('h1')
+    dados = _dados_vazios(url, titulo.get_text(strip=True) if titulo else "Sem informação")
+    for script in scripts:
+        try:
+            estado = json.loads(script.string or '')
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if dados['nome'] == "Sem informação" and isinstance(estado, dict) and isinstance(estado.get('name'), str):
+            dados['nome'] = estado['name'].strip()
+        _nutrientes_do_json(estado, dados)
+
+    # Um único valor pode ser coincidência em outro objeto do estado
+    encontrados = sum(1 for campo in CAMPOS_NUTRICIONAIS if dados[campo] != "0")
+    return dados if encontrados >= 2 else None
+
+
+def extrair_sem_navegador(url, html=None, timeout=15):
+    """
+    Extrai os dados nutricionais sem abrir o navegador.
+
+    Usa o HTML informado (ou baixa a página) e tenta primeiro a tabela do
+    HTML e depois o estado JSON embutido.
+
+    Returns:
+        dict ou None se a extração estática não encontrar os dados.
+    """
+    try:
+        if html is None:
+            html = baixar_html(url, timeout)
+    except Exception as e:
+        logger.warning(f"Falha ao baixar HTML de {url}: {str(e)}")
+        return None
+
+    try:
+        return extrair_de_html(html, url) or extrair_de_estado_json(html, url)
+    except Exception as e:
+        logger.warning(f"Falha ao interpretar HTML de {url}: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,54 @@
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi.responses import Response
+from scraping_log import logger
+
+
+def formatar_etag(versao):
+    """ETag forte a partir de uma versão dos dados."""
+    return f'"{versao}"'
+
+
+def cabecalhos_cache(etag, modificado_em):
+    """
+    Cabeçalhos de validação de uma resposta.
+
+    `no-cache` permite guardar a resposta, mas obriga o cliente a revalidá-la
+    a cada uso; com os dados inalterados a revalidação é um 304 sem corpo.
+    """
+    return {
+        'ETag': etag,
+        'Last-Modified': formatdate(modificado_em, usegmt=True),
+        'Cache-Control': 'no-cache'
+    }
+
+
+def nao_modificado(cabecalhos, etag, modificado_em):
+    """
+    Indica se a requisição condicional pode ser respondida com 304.
+
+    If-None-Match tem precedência sobre If-Modified-Since (RFC 9110).
+    """
+    if_none_match = cabecalhos.get('if-none-match')
+    if if_none_match is not None:
+        candidatos = [candidato.strip() for candidato in if_none_match.split(',')]
+        # A comparação fraca ignora o prefixo W/ (ex.: respostas recomprimidas por um proxy)
+        return '*' in candidatos or any(candidato.removeprefix('W/') == etag for candidato in candidatos)
+
+    if_modified_since = cabecalhos.get('if-modified-since')
+    if if_modified_since:
+        try:
+            data = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified tem resolução de segundos
+        return int(modificado_em) <= int(data.timestamp())
+    return False
+
+
+def resposta_nao_modificada(etag, modificado_em):
+    """Resposta 304, sem corpo, com os mesmos validadores."""
+    return Response(status_code=304, headers=cabecalhos_cache(etag, modificado_em))
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,82 @@
+import os
+import asyncio
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from scraping_log import logger
+
+# Número de threads reservadas para trabalho bloqueante (Selenium, leitura de arquivos)
+JOB_THREADS = int(os.getenv('JOB_THREADS', '4'))
+
+
+class _EncaminhadorLog(logging.Handler):
+    """Encaminha os logs de uma thread específica para uma corrotina no loop principal."""
+
+    def __init__(self, thread_id, ao_log, loop):
+        super().__init__(level=logging.INFO)
+        self.thread_id = thread_id
+        self.ao_log = ao_log
+        self.loop = loop
+
+    def emit(self, record):
+        if record.thread != self.thread_id:
+            return
+        if record.levelno >= logging.ERROR:
+            tipo = 'error'
+        elif record.levelno >= logging.WARNING:
+            tipo = 'warning'
+        else:
+            tipo = 'info'
+        try:
+            asyncio.run_coroutine_threadsafe(self.ao_log(record.getMessage(), tipo), self.loop)
+        except RuntimeError:
+            # O loop já foi encerrado; o log continua indo para o arquivo normalmente
+            pass
+
+
+class JobRunner:
+    """
+    Executa funções bloqueantes em um pool de threads dedicado, mantendo o
+    loop do asyncio (API e Socket.IO) livre enquanto o navegador trabalha.
+    """
+
+    def __init__(self, max_threads=None, prefixo='job'):
+        self.max_threads = max_threads or JOB_THREADS
+        self.executor = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix=prefixo)
+
+    async def executar(self, func, *args, ao_log=None, **kwargs):
+        """
+        Executa func(*args, **kwargs) no pool e aguarda o resultado.
+
+        Args:
+            func: Função bloqueante a executar
+            ao_log: Corrotina opcional ao_log(mensagem, tipo) que recebe, no loop
+                principal, os logs emitidos pela thread durante a execução
+        """
+        loop = asyncio.get_running_loop()
+        chamada = functools.partial(func, *args, **kwargs)
+
+        if ao_log is None:
+            return await loop.run_in_executor(self.executor, chamada)
+
+        def executar_com_log():
+            encaminhador = _EncaminhadorLog(threading.get_ident(), ao_log, loop)
+            logger.addHandler(encaminhador)
+            try:
+                return chamada()
+            finally:
+                logger.removeHandler(encaminhador)
+
+        return await loop.run_in_executor(self.executor, executar_com_log)
+
+    def desligar(self, aguardar=False):
+        """Encerra o pool de threads."""
+        self.executor.shutdown(wait=aguardar, cancel_futures=True)
+
+
+# Cria uma instância global do executor de jobs
+job_runner = JobRunner()
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,275 @@
+import json
+import base64
+import numpy as np
+from product_store import COLUNAS_NUMERICAS
+from scraping_log import logger
+
+# Bases de comparação: valores como coletados (por porção) ou convertidos para 100 g
+BASES = ('porcao', '100g')
+
+# Colunas aceitas na ordenação, além das numéricas
+COLUNAS_ORDENACAO = COLUNAS_NUMERICAS + ['data_coleta']
+
+
+def valores_da_base(frame, coluna, base):
+    """
+    Valores de uma coluna na base pedida, como float.
+
+    Em '100g' os nutrientes são convertidos pela porção; produtos sem porção
+    informada ficam como NaN e não atendem a nenhuma faixa.
+    """
+    if coluna == 'data_coleta':
+        datas = frame['data_coleta']
+        valores = datas.to_numpy(dtype='datetime64[ns]').view('int64').astype(float)
+        valores[datas.isna().to_numpy()] = np.nan
+        return valores
+    valores = frame[coluna].to_numpy(dtype=float)
+    if base == '100g' and coluna != 'porcao':
+        porcao = frame['porcao'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valores = np.where(porcao > 0, valores * 100.0 / porcao, np.nan)
+    return valores
+
+
+class IndiceNumerico:
+    """
+    Índice ordenado de uma coluna numérica: valores em ordem crescente e a
+    posição da linha correspondente. Uma faixa [mínimo, máximo] vira duas
+    buscas binárias, e linhas novas são intercaladas sem reordenar tudo.
+    """
+
+    def __init__(self, valores):
+        ordem = np.argsort(valores, kind='stable')
+        self.valores = valores[ordem]
+        self.posicoes = ordem.astype(np.int64)
+
+    def adicionar(self, valores, inicio):
+        """Intercala os valores das linhas novas, que começam na posição `inicio`."""
+        ordem = np.argsort(valores, kind='stable')
+        novos = valores[ordem]
+        lugares = np.searchsorted(self.valores, novos, side='right')
+        self.valores = np.insert(self.valores, lugares, novos)
+        self.posicoes = np.insert(self.posicoes, lugares, ordem + inicio)
+
+    def _limites(self, minimo=None, maximo=None):
+        # NaN fica no fim do índice e nunca entra em uma faixa
+        inicio = 0 if minimo is None else np.searchsorted(self.valores, minimo, side='left')
+        fim = np.searchsorted(self.valores, np.inf if maximo is None else maximo, side='right')
+        return inicio, max(inicio, fim)
+
+    def contar(self, minimo=None, maximo=None):
+        inicio, fim = self._limites(minimo, maximo)
+        return fim - inicio
+
+    def faixa(self, minimo=None, maximo=None):
+        """Posições (em ordem crescente) das linhas com valor entre mínimo e máximo."""
+        inicio, fim = self._limites(minimo, maximo)
+        return np.sort(self.posicoes[inicio:fim])
+
+
+def construir_indices_numericos(frame):
+    """Um IndiceNumerico por coluna numérica e por base."""
+    return {
+        (coluna, base): IndiceNumerico(valores_da_base(frame, coluna, base))
+        for base in BASES
+        for coluna in COLUNAS_NUMERICAS
+    }
+
+
+def filtrar_faixas(frame, indices, faixas, base):
+    """
+    Seleciona as linhas que atendem a todas as faixas.
+
+    A faixa mais seletiva é resolvida pelo índice (busca binária); as demais
+    são conferidas só nas linhas candidatas.
+
+    Args:
+        faixas: {coluna: (mínimo, máximo)}, com None para lado aberto
+
+    Returns:
+        Posições das linhas selecionadas, em ordem crescente
+    """
+    if not faixas:
+        return np.arange(len(frame), dtype=np.int64)
+    colunas = sorted(faixas, key=lambda coluna: indices[(coluna, base)].contar(*faixas[coluna]))
+    candidatos = indices[(colunas[0], base)].faixa(*faixas[colunas[0]])
+    for coluna in colunas[1:]:
+        if not len(candidatos):
+            break
+        minimo, maximo = faixas[coluna]
+        valores = valores_da_base(frame.iloc[candidatos], coluna, base)
+        mascara = ~np.isnan(valores)
+        if minimo is not None:
+            mascara &= valores >= minimo
+        if maximo is not None:
+            mascara &= valores <= maximo
+        candidatos = candidatos[mascara]
+    return candidatos
+
+
+def _chaves_ordenacao(frame, posicoes, ordenacao, base):
+    """Chaves float de ordenação (crescentes) para as linhas; valores ausentes vão para o fim."""
+    chaves = []
+    linhas = frame.iloc[posicoes]
+    for coluna, descendente in ordenacao:
+        valores = valores_da_base(linhas, coluna, base)
+        if descendente:
+            valores = -valores
+        chaves.append(np.where(np.isnan(valores), np.inf, valores))
+    return chaves
+
+
+def _linhas_antes(chaves, valores, inclusivo=False):
+    """
+    Quantas linhas, já ordenadas pelas chaves, vêm antes dos valores do cursor.
+
+    Como as linhas estão em ordem, as que vêm antes formam um prefixo: cada
+    chave é uma busca binária dentro do trecho em que as anteriores empatam
+    com o cursor, em O(k log n) para k chaves.
+    """
+    inicio, fim = 0, len(chaves[0])
+    for chave, valor in zip(chaves, valores):
+        trecho = chave[inicio:fim]
+        esquerda = inicio + int(np.searchsorted(trecho, valor, side='left'))
+        direita = inicio + int(np.searchsorted(trecho, valor, side='right'))
+        if esquerda == direita:
+            return esquerda
+        inicio, fim = esquerda, direita
+    return fim if inclusivo else inicio
+
+
+def _depois_do_cursor(chaves, valores):
+    """Máscara das linhas (em qualquer ordem) que vêm depois dos valores do cursor."""
+    depois = np.zeros(len(chaves[0]), dtype=bool)
+    for chave, valor in reversed(list(zip(chaves, valores))):
+        depois = (chave > valor) | ((chave == valor) & depois)
+    return depois
+
+
+def _primeiras(chaves, quantidade):
+    """
+    Índices das `quantidade` primeiras linhas pela ordem das chaves, já ordenados.
+
+    Só as linhas que empatam ou ficam antes da `quantidade`-ésima na primeira
+    chave são ordenadas por inteiro; a seleção delas é linear.
+    """
+    total = len(chaves[0])
+    if total > quantidade > 0:
+        corte = np.partition(chaves[0], quantidade - 1)[quantidade - 1]
+        candidatas = np.flatnonzero(chaves[0] <= corte)
+    else:
+        candidatas = np.arange(total)
+    ordem = np.lexsort([chave[candidatas] for chave in chaves[::-1]])
+    return candidatas[ordem[:quantidade]]
+
+
+def paginar_por_chaves(chaves, limite, cursor=None, anterior=False):
+    """
+    Página de linhas já ordenadas pelas chaves (keyset), a partir de um cursor.
+
+    A última chave deve identificar a linha (ex.: id do produto), para que a
+    ordem seja total. O cursor guarda os valores das chaves da linha de
+    referência, então linhas adicionadas entre uma página e outra não
+    deslocam a paginação. O início da página é encontrado por busca binária,
+    então o custo não depende de quantas linhas vêm antes dela.
+
+    Args:
+        chaves: Arrays float, um por chave, alinhados com as linhas
+        cursor: Valores das chaves da última (ou, com anterior=True, da
+            primeira) linha da página vista antes
+        anterior: Se True, retorna a página que termina antes do cursor
+
+    Returns:
+        (início, fim, cursor da próxima página, cursor da página anterior),
+        com os cursores None quando não há mais páginas naquela direção
+    """
+    total = len(chaves[0]) if chaves else 0
+    if cursor is None:
+        inicio = 0
+        fim = min(total, limite)
+    elif anterior:
+        fim = _linhas_antes(chaves, cursor)
+        inicio = max(0, fim - limite)
+    else:
+        inicio = _linhas_antes(chaves, cursor, inclusivo=True)
+        fim = min(total, inicio + limite)
+
+    def valores_da_linha(linha):
+        return [float(chave[linha]) for chave in chaves]
+
+    proximo = valores_da_linha(fim - 1) if fim < total and fim > inicio else None
+    previo = valores_da_linha(inicio) if inicio > 0 and fim > inicio else None
+    return inicio, fim, proximo, previo
+
+
+def ordenar_pagina(frame, posicoes, ids, ordenacao, base, limite, cursor=None):
+    """
+    Ordena as linhas selecionadas por várias chaves e devolve uma página.
+
+    O desempate final é o id do produto, então a ordem é total e o cursor
+    identifica exatamente onde a próxima página começa, mesmo que linhas
+    novas sejam adicionadas entre uma página e outra.
+
+    As linhas selecionadas não têm uma ordem pronta (a ordenação é escolhida
+    na requisição), então cada página custa O(n) nas n linhas selecionadas:
+    as que vêm depois do cursor são separadas e só as primeiras delas são
+    ordenadas. O custo cresce com o tamanho do resultado, não com a
+    profundidade da página.
+
+    Args:
+        ids: Ids estáveis de todas as linhas do frame
+
+    Returns:
+        (posições da página, cursor da próxima página ou None)
+    """
+    chaves = _chaves_ordenacao(frame, posicoes, ordenacao, base)
+    chaves.append(ids[posicoes].astype(float))
+    if cursor is not None:
+        depois = np.flatnonzero(_depois_do_cursor(chaves, cursor))
+        posicoes = posicoes[depois]
+        chaves = [chave[depois] for chave in chaves]
+    pagina = _primeiras(chaves, limite)
+    proximo = [float(chave[pagina[-1]]) for chave in chaves] if len(pagina) and len(posicoes) > limite else None
+    return posicoes[pagina], proximo
+
+
+def interpretar_ordenacao(texto):
+    """
+    Converte 'calorias,-proteinas' em [('calorias', False), ('proteinas', True)].
+
+    Raises:
+        ValueError: Se alguma coluna não puder ser usada na ordenação
+    """
+    ordenacao = []
+    for parte in (texto or '').split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        descendente = parte.startswith('-')
+        coluna = parte.lstrip('+-')
+        if coluna not in COLUNAS_ORDENACAO:
+            raise ValueError(f"Coluna de ordenação inválida: {coluna}")
+        ordenacao.append((coluna, descendente))
+    return ordenacao or [('data_coleta', True)]
+
+
+def codificar_cursor(dados):
+    """Transforma o estado da paginação em um token opaco para a URL."""
+    return base64.urlsafe_b64encode(json.dumps(dados, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(token):
+    """
+    Recupera o estado da paginação de um token.
+
+    Raises:
+        ValueError: Se o token for inválido
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,284 @@
+import json
+from scraping_log import logger
+
+# Mapeamento de nomes alternativos para nomes padronizados
+MAPA_NOMES = {
+    'valor calórico': 'calorias',
+    'valor energético': 'calorias',
+    'calorias': 'calorias',
+    'energia': 'calorias',
+    'kcal': 'calorias',
+    'carboidrato': 'carboidratos',
+    'carboidratos totais': 'carboidratos',
+    'carboidratos': 'carboidratos',
+    'proteína': 'proteinas',
+    'proteínas': 'proteinas',
+    'gordura total': 'gorduras',
+    'gorduras totais': 'gorduras',
+    'gordura': 'gorduras',
+    'gorduras': 'gorduras',
+    'gordura saturada': 'gorduras_saturadas',
+    'gorduras saturadas': 'gorduras_saturadas',
+    'fibra': 'fibras',
+    'fibras': 'fibras',
+    'fibra alimentar': 'fibras',
+    'fibras alimentares': 'fibras',
+    'sódio': 'sodio',
+    'açúcar': 'acucares',
+    'açúcares': 'acucares',
+    'açucares': 'acucares',
+    'acucar': 'acucares',
+    'açucar': 'acucares'
+}
+
+# Script de extração em passada única.
+#
+# Em vez de varrer document.querySelectorAll('*') e compilar uma RegExp por
+# sinônimo e por elemento, limita a busca à subárvore da tabela nutricional,
+# lê os nós de texto uma única vez e usa expressões combinadas pré-compiladas.
+# Retorna o mesmo dicionário `dados` do script anterior.
+SCRIPT_EXTRACAO = r"""
+const mapaNomes = __MAPA_NOMES__;
+
+// Sinônimos do mais longo para o mais curto: "gorduras saturadas" vence "gordura"
+const sinonimos = Object.keys(mapaNomes).sort((a, b) => b.length - a.length);
+const alternativas = sinonimos
+    .map(s => s.replace(/[.*+?^${}()|[\]\\]/g, '\\$&'))
+    .join('|');
+
+// Expressões compiladas uma única vez por página
+const reRotulo = new RegExp('(' + alternativas + ')', 'iu');
+const reTexto = new RegExp('(' + alternativas + ')[:\\s]*(\\d+[,.]?\\d*)', 'giu');
+const rePorcao = /por[cç][aã]o[:\s]+(?:de\s+)?(\d+)\s*(?:g|gr|grama|gramas)\b/i;
+const reNumero = /(\d+[,.]?\d*)/;
+const reNutricional = /valor energ[eé]tico|valor cal[oó]rico|carboidrato|prote[ií]na/i;
+
+function campoDe(sinonimo) {
+    return mapaNomes[sinonimo.toLowerCase()] || null;
+}
+
+function extrairValorNumerico(texto) {
+    const match = texto.match(reNumero);
+    return match ? match[1].replace(',', '.') : "0";
+}
+
+// Localiza a subárvore da tabela nutricional (ou usa o body se não encontrar)
+function encontrarEscopo() {
+    let ancora = null;
+    for (const tabela of document.querySelectorAll('table')) {
+        if (reNutricional.test(tabela.textContent)) {
+            ancora = tabela;
+            break;
+        }
+    }
+    if (!ancora) {
+        const titulo = document.evaluate(
+            "//*[self::h2 or self::h3 or self::button][contains(translate(text(), 'TABELANUTRICIONAL', 'tabelanutricional'), 'tabela nutricional')]",
+            document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        ancora = titulo && titulo.parentElement;
+    }
+    if (!ancora) return document.body;
+
+    // Sobe alguns níveis para incluir a porção, que costuma ficar acima da tabela
+    let escopo = ancora;
+    for (let nivel = 0; nivel < 4 && escopo.parentElement; nivel++) {
+        if (/por[cç][aã]o/i.test(escopo.textContent)) break;
+        escopo = escopo.parentElement;
+    }
+    return escopo;
+}
+
+// Percorre os nós de texto uma única vez, ignorando scripts e estilos
+function textoDe(raiz) {
+    const partes = [];
+    const walker = document.createTreeWalker(raiz, NodeFilter.SHOW_TEXT, {
+        acceptNode: no => /^(SCRIPT|STYLE|NOSCRIPT)$/.test(no.parentElement?.tagName || '')
+            ? NodeFilter.FILTER_REJECT
+            : NodeFilter.FILTER_ACCEPT
+    });
+    let no;
+    while ((no = walker.nextNode())) {
+        const texto = no.nodeValue.trim();
+        if (texto) partes.push(texto);
+    }
+    return partes.join(' ');
+}
+
+const escopo = encontrarEscopo();
+const textoEscopo = textoDe(escopo);
+
+let matchPorcao = textoEscopo.match(rePorcao);
+if (!matchPorcao && escopo !== document.body) {
+    matchPorcao = textoDe(document.body).match(rePorcao);
+}
+
+const dados = {
+    nome: document.querySelector('h1')?.textContent?.trim() || "Sem informação",
+    url: window.location.href,
+    porcao: matchPorcao ? matchPorcao[1] : "0",
+    calorias: "0",
+    carboidratos: "0",
+    proteinas: "0",
+    gorduras: "0",
+    gorduras_saturadas: "0",
+    fibras: "0",
+    acucares: "0",
+    sodio: "0"
+};
+
+// Linhas da tabela: o primeiro valor encontrado para cada campo é mantido
+const tabelas = escopo.tagName === 'TABLE' ? [escopo] : escopo.querySelectorAll('table');
+for (const tabela of tabelas) {
+    for (const linha of tabela.rows) {
+        const celulas = linha.cells;
+        if (celulas.length < 2) continue;
+        const match = reRotulo.exec(celulas[0].textContent);
+        if (!match) continue;
+        const campo = campoDe(match[1]);
+        if (!campo || dados[campo] !== "0") continue;
+        dados[campo] = extrairValorNumerico(celulas[1].textContent);
+    }
+}
+
+// Texto livre: preenche apenas os campos que a tabela não trouxe
+for (const match of textoEscopo.matchAll(reTexto)) {
+    const campo = campoDe(match[1]);
+    if (campo && dados[campo] === "0") {
+        dados[campo] = match[2].replace(',', '.');
+    }
+}
+
+return dados;
+""".replace('__MAPA_NOMES__', json.dumps(MAPA_NOMES, ensure_ascii=False))
+
+# Script original, mantido apenas para comparação no benchmark
+SCRIPT_EXTRACAO_LEGADO = """
+// Mapeamento de nomes alternativos para nomes padronizados
+const mapaNomes = {
+    'valor calórico': 'calorias',
+    'valor energético': 'calorias',
+    'calorias': 'calorias',
+    'energia': 'calorias',
+    'kcal': 'calorias',
+    'carboidrato': 'carboidratos',
+    'carboidratos totais': 'carboidratos',
+    'carboidratos': 'carboidratos',
+    'proteína': 'proteinas',
+    'proteínas': 'proteinas',
+    'gordura total': 'gorduras',
+    'gorduras totais': 'gorduras',
+    'gordura': 'gorduras',
+    'gorduras': 'gorduras',
+    'gordura saturada': 'gorduras_saturadas',
+    'gorduras saturadas': 'gorduras_saturadas',
+    'fibra': 'fibras',
+    'fibras': 'fibras',
+    'fibra alimentar': 'fibras',
+    'fibras alimentares': 'fibras',
+    'sódio': 'sodio',
+    'açúcar': 'acucares',
+    'açúcares': 'acucares',
+    'açucares': 'acucares',
+    'acucar': 'acucares',
+    'açucar': 'acucares'
+};
+
+// Função para padronizar o nome do item
+function padronizarNome(nome) {
+    nome = nome.toLowerCase().trim();
+    return mapaNomes[nome] || nome;
+}
+
+// Função para extrair apenas o valor numérico
+function extrairValorNumerico(texto) {
+    const match = texto.match(/(\\d+[,.]?\\d*)/);
+    if (match) {
+        // Substitui vírgula por ponto para garantir formato numérico
+        return match[1].replace(',', '.');
+    }
+    return "0";
+}
+
+// Extrai o nome do produto
+const nome = document.querySelector('h1')?.textContent?.trim() || "Sem informação";
+
+// Extrai a porção
+let porcao = "0";
+const elementos = document.querySelectorAll('*');
+for (const elemento of elementos) {
+    const texto = elemento.textContent;
+    if (texto.toLowerCase().includes('porção') || texto.toLowerCase().includes('porcao')) {
+        console.log('Texto com porção:', texto);
+        const match = texto.match(/[Pp]or[cç][aã]o\\s+(?:de\\s+)?(\\d+)\\s*(?:g|G|gr|GR|grama|gramas|GRAMAS)(?:\\s*[-]\\s*.*)?/);
+        if (match) {
+            porcao = match[1];
+            console.log('Porção encontrada:', porcao);
+            break;
+        }
+    }
+}
+
+// Inicializa dados com valores zerados
+const dados = {
+    nome: nome,
+    url: window.location.href,
+    porcao: porcao,
+    calorias: "0",
+    carboidratos: "0",
+    proteinas: "0",
+    gorduras: "0",
+    gorduras_saturadas: "0",
+    fibras: "0",
+    acucares: "0",
+    sodio: "0"
+};
+
+// Procura por tabelas e elementos que podem conter informações nutricionais
+document.querySelectorAll('table').forEach(tabela => {
+    const linhas = tabela.querySelectorAll('tr');
+    linhas.forEach(linha => {
+        const colunas = linha.querySelectorAll('td, th');
+        if (colunas.length >= 2) {
+            const textoColuna = colunas[0].textContent.trim();
+            const valorColuna = colunas[1].textContent.trim();
+
+            Object.keys(mapaNomes).forEach(nomeAlternativo => {
+                if (textoColuna.toLowerCase().includes(nomeAlternativo.toLowerCase())) {
+                    const nomePadronizado = padronizarNome(nomeAlternativo);
+                    const valorNumerico = extrairValorNumerico(valorColuna);
+                    if (valorNumerico !== "0") {
+                        dados[nomePadronizado] = valorNumerico;
+                    }
+                }
+            });
+        }
+    });
+});
+
+// Procura também por elementos de texto
+document.querySelectorAll('*').forEach(elemento => {
+    const texto = elemento.textContent?.trim();
+    if (!texto) return;
+
+    Object.keys(mapaNomes).forEach(nomeAlternativo => {
+        if (texto.toLowerCase().includes(nomeAlternativo.toLowerCase())) {
+            const padrao = new RegExp(`${nomeAlternativo}[:\\s]*(\\d+[,.]?\\d*)`, 'i');
+            const match = texto.match(padrao);
+            if (match) {
+                const valorNumerico = match[1].replace(',', '.');
+                const nomePadronizado = padronizarNome(nomeAlternativo);
+                if (dados[nomePadronizado] === "0") {
+                    dados[nomePadronizado] = valorNumerico;
+                }
+            }
+        }
+    });
+});
+
+console.log("Dados extraídos:", dados);
+return dados;
+"""
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,250 @@
+import time
+import threading
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from scraping_log import logger
+
+# Seletor usado para contar os cards de produto nas páginas de categoria
+SELETOR_CARDS = "div[data-testid='product-card'], a[href*='/produto/']"
+
+# Monitor injetado na página: conta requisições fetch/XHR pendentes e registra
+# o instante da última mutação do DOM e da última atividade de rede.
+SCRIPT_MONITOR = """
+(function() {
+    if (window.__prontidao) return;
+    const p = window.__prontidao = {
+        pendentes: 0,
+        ultimaAtividade: performance.now(),
+        ultimaMutacao: performance.now()
+    };
+    const atividade = () => { p.ultimaAtividade = performance.now(); };
+
+    if (window.fetch) {
+        const fetchOriginal = window.fetch;
+        window.fetch = function() {
+            p.pendentes++;
+            atividade();
+            return fetchOriginal.apply(this, arguments).finally(() => {
+                p.pendentes = Math.max(0, p.pendentes - 1);
+                atividade();
+            });
+        };
+    }
+
+    const sendOriginal = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        p.pendentes++;
+        atividade();
+        this.addEventListener('loadend', () => {
+            p.pendentes = Math.max(0, p.pendentes - 1);
+            atividade();
+        });
+        return sendOriginal.apply(this, arguments);
+    };
+
+    try {
+        new PerformanceObserver(atividade).observe({type: 'resource'});
+    } catch (e) {}
+
+    new MutationObserver(() => { p.ultimaMutacao = performance.now(); })
+        .observe(document, {childList: true, subtree: true, characterData: true});
+})();
+"""
+
+# Estado atual da página (instala o monitor se ele ainda não existir)
+SCRIPT_ESTADO = SCRIPT_MONITOR + """
+const p = window.__prontidao;
+const agora = performance.now();
+return {
+    completo: document.readyState === 'complete',
+    pendentes: p.pendentes,
+    semMutacao: agora - p.ultimaMutacao,
+    semRede: agora - p.ultimaAtividade
+};
+"""
+
+# Indica se a tabela nutricional (ou o bloco de texto equivalente) já está no DOM
+SCRIPT_TABELA_NUTRICIONAL = """
+for (const tabela of document.querySelectorAll('table')) {
+    const texto = tabela.textContent.toLowerCase();
+    if (texto.includes('valor energético') || texto.includes('valor calórico') ||
+        texto.includes('carboidrato') || texto.includes('proteína')) {
+        return true;
+    }
+}
+const titulo = document.evaluate(
+    "//*[self::h2 or self::h3 or self::button][contains(translate(text(), 'TABELANUTRICIONAL', 'tabelanutricional'), 'tabela nutricional')]",
+    document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+return !!(titulo && titulo.parentElement && /\\d/.test(titulo.parentElement.textContent));
+"""
+
+
+class MetricasEspera:
+    """Acumula quanto tempo cada tipo de espera realmente levou."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._esperas = {}
+
+    def registrar(self, nome, duracao, sucesso):
+        with self._lock:
+            dados = self._esperas.setdefault(nome, {
+                'quantidade': 0, 'total': 0.0, 'maximo': 0.0, 'timeouts': 0
+            })
+            dados['quantidade'] += 1
+            dados['total'] += duracao
+            dados['maximo'] = max(dados['maximo'], duracao)
+            if not sucesso:
+                dados['timeouts'] += 1
+
+    def resumo(self):
+        """Retorna, para cada espera, quantidade, tempo médio, máximo e timeouts."""
+        with self._lock:
+            return {
+                nome: {
+                    'quantidade': dados['quantidade'],
+                    'tempo_medio': round(dados['total'] / dados['quantidade'], 3),
+                    'tempo_maximo': round(dados['maximo'], 3),
+                    'tempo_total': round(dados['total'], 3),
+                    'timeouts': dados['timeouts']
+                }
+                for nome, dados in self._esperas.items()
+            }
+
+
+# Cria uma instância global das métricas de espera
+metricas_espera = MetricasEspera()
+
+
+def instalar_monitor(driver):
+    """
+    Registra o monitor de prontidão para ser injetado antes dos scripts da
+    página em todas as navegações seguintes deste driver.
+    """
+    if getattr(driver, '_monitor_prontidao', False):
+        return
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': SCRIPT_MONITOR})
+    except Exception as e:
+        # Sem CDP o monitor é injetado sob demanda por SCRIPT_ESTADO
+        logger.debug(f"Monitor de prontidão via CDP indisponível: {e}")
+    driver._monitor_prontidao = True
+
+
+def estado_pagina(driver):
+    """Retorna o estado de carregamento, mutações e rede da página atual."""
+    return driver.execute_script(SCRIPT_ESTADO)
+
+
+def pagina_estavel(estado, janela=0.5):
+    """Documento carregado, sem requisições pendentes e sem mutações na janela informada."""
+    janela_ms = janela * 1000
+    return bool(
+        estado
+        and estado['completo']
+        and estado['pendentes'] == 0
+        and estado['semMutacao'] >= janela_ms
+        and estado['semRede'] >= janela_ms
+    )
+
+
+def aguardar(driver, condicao, nome, timeout=10, intervalo=0.2):
+    """
+    Aguarda até a condição retornar um valor verdadeiro e registra o tempo gasto.
+
+    Returns:
+        O valor retornado pela condição, ou None em caso de timeout.
+    """
+    inicio = time.monotonic()
+    resultado = None
+    try:
+        resultado = WebDriverWait(
+            driver, timeout, poll_frequency=intervalo, ignored_exceptions=(WebDriverException,)
+        ).until(condicao)
+    except TimeoutException:
+        pass
+    duracao = time.monotonic() - inicio
+    metricas_espera.registrar(nome, duracao, resultado is not None)
+    logger.debug(f"Espera '{nome}': {duracao:.2f}s ({'ok' if resultado is not None else 'timeout'})")
+    return resultado
+
+
+def aguardar_quiescencia(driver, janela=0.5, timeout=10):
+    """Aguarda o DOM parar de mudar e a rede ficar ociosa."""
+    instalar_monitor(driver)
+    return aguardar(
+        driver,
+        lambda d: pagina_estavel(estado_pagina(d), janela) or None,
+        'quiescencia',
+        timeout
+    ) is not None
+
+
+def aguardar_tabela_nutricional(driver, timeout=15, janela=1.0):
+    """
+    Aguarda a tabela nutricional aparecer na página do produto.
+
+    Retorna assim que a tabela estiver no DOM. Se a página estabilizar
+    (sem mutações nem requisições durante `janela` segundos) sem tabela,
+    retorna False em vez de esperar o timeout inteiro.
+    """
+    instalar_monitor(driver)
+
+    def condicao(d):
+        if d.execute_script(SCRIPT_TABELA_NUTRICIONAL):
+            return 'tabela'
+        if pagina_estavel(estado_pagina(d), janela):
+            return 'sem_tabela'
+        return None
+
+    return aguardar(driver, condicao, 'tabela_nutricional', timeout) == 'tabela'
+
+
+def contar_cards(driver):
+    """Conta os cards de produto presentes na página."""
+    return driver.execute_script(
+        "return document.querySelectorAll(arguments[0]).length;", SELETOR_CARDS
+    )
+
+
+def aguardar_cards(driver, timeout=10, janela=1.0):
+    """
+    Aguarda os primeiros cards de produto de uma página de categoria.
+
+    Returns:
+        int: Quantidade de cards encontrados (0 se a página estabilizou sem cards)
+    """
+    instalar_monitor(driver)
+
+    # A condição devolve uma tupla para que uma contagem 0 também encerre a espera
+    def condicao(d):
+        quantidade = contar_cards(d)
+        if quantidade or pagina_estavel(estado_pagina(d), janela):
+            return (quantidade,)
+        return None
+
+    resultado = aguardar(driver, condicao, 'cards', timeout)
+    return resultado[0] if resultado else 0
+
+
+def aguardar_novos_cards(driver, quantidade_anterior, timeout=5, janela=1.0):
+    """
+    Aguarda novos cards aparecerem após uma rolagem ou clique em "Carregar mais".
+
+    Retorna assim que a quantidade passar de `quantidade_anterior`, ou quando a
+    página estabilizar sem novos cards.
+
+    Returns:
+        int: Quantidade atual de cards
+    """
+    instalar_monitor(driver)
+
+    def condicao(d):
+        quantidade = contar_cards(d)
+        if quantidade > quantidade_anterior or pagina_estavel(estado_pagina(d), janela):
+            return (quantidade,)
+        return None
+
+    resultado = aguardar(driver, condicao, 'novos_cards', timeout)
+    return resultado[0] if resultado else contar_cards(driver)
@@ -0,0 +1,71 @@
+import json
+from fastapi.responses import Response
+from product_store import COLUNAS_NUMERICAS, FORMATO_DATA
+from scraping_log import logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Campos de DadoNutricional, na ordem em que aparecem nas respostas
+CAMPOS_PRODUTO = ['url', 'nome', 'categoria'] + COLUNAS_NUMERICAS + ['data_coleta']
+
+# Ordem dos campos nas respostas da API usada pelo frontend (/api/produtos)
+CAMPOS_API = [
+    'id', 'sku', 'nome', 'categoria', 'url', 'porcao', 'calorias', 'energia',
+    'carboidratos', 'proteinas', 'gorduras', 'gorduras_saturadas',
+    'fibras', 'acucares', 'sodio', 'data_coleta'
+]
+
+
+def serializar_produtos(df, formato_api=False, ids=None):
+    """
+    Converte as linhas de produtos em dicionários prontos para JSON, por colunas.
+
+    Os tipos já garantidos pelo ProductStore (floats e datetime) permitem
+    converter o frame inteiro de uma vez, sem iterrows() nem validação
+    linha a linha.
+
+    Args:
+        df: Frame de produtos (pode ser uma fatia do cache)
+        formato_api: Se True, inclui `id`, `sku` e `energia` (alias de
+            calorias), como esperado pelo frontend
+        ids: Array com os ids estáveis das linhas (ver DatasetCache), usado no formato da API
+
+    Returns:
+        list: Um dicionário por produto
+    """
+    # tolist() devolve tipos nativos do Python (float, str), prontos para o JSON
+    colunas = {coluna: df[coluna].tolist() for coluna in ['nome', 'url', 'categoria'] + COLUNAS_NUMERICAS}
+    datas = df['data_coleta']
+    colunas['data_coleta'] = datas.dt.strftime(FORMATO_DATA).astype(object).where(datas.notna(), None).tolist()
+    if formato_api:
+        colunas['id'] = ids.tolist() if ids is not None else df.index.tolist()
+        colunas['sku'] = df['sku'].tolist()
+        colunas['energia'] = colunas['calorias']
+        campos = CAMPOS_API
+    else:
+        campos = CAMPOS_PRODUTO
+    return [dict(zip(campos, linha)) for linha in zip(*(colunas[campo] for campo in campos))]
+
+
+def codificar_json(conteudo):
+    """Codifica o conteúdo em JSON, com orjson quando disponível."""
+    if orjson is not None:
+        return orjson.dumps(conteudo)
+    return json.dumps(conteudo, ensure_ascii=False).encode('utf-8')
+
+
+def resposta_json(conteudo, status_code=200):
+    """
+    Resposta JSON já codificada.
+
+    Dispensa a revalidação do response_model pelo FastAPI, que repetiria a
+    construção de um modelo pydantic por produto.
+    """
+    return Response(content=codificar_json(conteudo), status_code=status_code, media_type="application/json")
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,440 @@
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+from scraping_log import logger
+from url_frontier import RE_SKU, sku_da_url, limpar_sku, chave_produto, normalizar_url
+
+# Colunas persistidas para cada produto, na mesma ordem do antigo dados_nutricionais.csv
+COLUNAS = [
+    'nome', 'url', 'porcao', 'calorias',
+    'carboidratos', 'proteinas', 'gorduras',
+    'gorduras_saturadas', 'fibras', 'acucares', 'sodio',
+    'data_coleta', 'categoria', 'sku'
+]
+
+COLUNAS_NUMERICAS = [
+    'porcao', 'calorias', 'carboidratos', 'proteinas', 'gorduras',
+    'gorduras_saturadas', 'fibras', 'acucares', 'sodio'
+]
+
+CSV_LEGADO = 'dados_nutricionais.csv'
+
+# Formato único de data_coleta gravado no log de inserções
+FORMATO_DATA = '%Y-%m-%d %H:%M:%S'
+
+
+def normalizar_data(valor):
+    """Converte um data_coleta em qualquer formato para FORMATO_DATA (ou None se inválido)."""
+    if valor is None or valor == '':
+        return None
+    data = pd.to_datetime(valor, errors='coerce')
+    if pd.isna(data):
+        return None
+    if data.tzinfo is not None:
+        data = data.tz_convert(None)
+    return data.strftime(FORMATO_DATA)
+
+
+def id_produto(url, sku=None):
+    """
+    Id estável e numérico de um produto: o próprio SKU.
+
+    Produtos sem SKU na URL usam um hash de 48 bits da URL canônica, que
+    cabe sem perda em um número do JavaScript.
+    """
+    sku = limpar_sku(sku) or sku_da_url(url)
+    if sku:
+        return int(sku)
+    return int.from_bytes(hashlib.blake2b(normalizar_url(url).encode('utf-8'), digest_size=6).digest(), 'big')
+
+
+def normalizar_frame(df):
+    """Garante as colunas esperadas e os tipos corretos em um DataFrame de produtos."""
+    df = df.copy()
+    for coluna in COLUNAS:
+        if coluna not in df.columns:
+            df[coluna] = None
+    df = df[COLUNAS]
+    for coluna in COLUNAS_NUMERICAS:
+        df[coluna] = pd.to_numeric(df[coluna], errors='coerce').fillna(0.0).astype(float)
+    for coluna in ['nome', 'url', 'categoria']:
+        df[coluna] = df[coluna].fillna('').astype(str)
+    # SKU numérico como texto; registros antigos, gravados sem ele, recebem o da URL
+    skus = pd.to_numeric(df['sku'], errors='coerce').astype('Int64').astype('string')
+    skus = skus.fillna(df['url'].str.extract(RE_SKU, expand=False).astype('string'))
+    df['sku'] = skus.astype(object).where(skus.notna(), None)
+    # Datas antigas em formatos mistos são convertidas uma única vez, na leitura
+    try:
+        datas = pd.to_datetime(df['data_coleta'], format='mixed', errors='coerce')
+    except ValueError:
+        # Mistura de datas com e sem fuso horário
+        datas = pd.to_datetime(df['data_coleta'], format='mixed', errors='coerce', utc=True)
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_convert(None)
+    df['data_coleta'] = datas.astype('datetime64[ns]')
+    return df.reset_index(drop=True)
+
+
+def deduplicar(df):
+    """
+    Mantém uma linha por produto (mesmo SKU ou, sem SKU, mesma URL): a da
+    gravação mais recente, que é a que aparece por último.
+    """
+    chaves = pd.Series([chave_produto(url, sku) for url, sku in zip(df['url'], df['sku'])], index=df.index)
+    repetidas = chaves.duplicated(keep='last')
+    if not repetidas.any():
+        return df
+    return df[~repetidas.to_numpy()].reset_index(drop=True)
+
+
+class ProductStore:
+    """
+    Armazenamento append-only dos dados nutricionais.
+
+    Cada produto novo é gravado como uma linha JSON no segmento de log atual
+    (custo O(1), sem reler o arquivo). Quando o log fica grande em relação à
+    base, os segmentos são compactados em um único arquivo Parquet. Como o
+    limite de compactação cresce junto com a base, o custo amortizado de cada
+    inserção continua constante.
+
+    O SKU identifica o produto: uma nova coleta de um produto já gravado
+    substitui a anterior. No log as duas gravações coexistem; na leitura e na
+    compactação vale a última.
+
+    Estrutura no disco:
+        <diretorio>/base.parquet          base compactada
+        <diretorio>/segmentos/000001.jsonl  segmentos do log de inserções
+    """
+
+    def __init__(self, diretorio=None, csv_legado=CSV_LEGADO, linhas_por_segmento=500,
+                 min_linhas_compactacao=2000):
+        self.diretorio = diretorio or os.getenv('DADOS_DIR', 'dados')
+        self.csv_legado = csv_legado
+        self.dir_segmentos = os.path.join(self.diretorio, 'segmentos')
+        self.arquivo_base = os.path.join(self.diretorio, 'base.parquet')
+        self.linhas_por_segmento = linhas_por_segmento
+        self.min_linhas_compactacao = min_linhas_compactacao
+        self._lock = threading.RLock()
+        # Incrementada a cada escrita; permite que caches saibam se estão atualizados
+        self.versao = 0
+        self._ouvintes = []
+        # Chaves (SKU ou URL) de todos os produtos gravados, carregadas na primeira consulta
+        self._chaves = None
+
+        os.makedirs(self.dir_segmentos, exist_ok=True)
+
+        self._linhas_base = self._contar_linhas_base()
+        self._linhas_log = 0
+        self._segmento_atual = None
+        self._linhas_segmento = 0
+        for caminho in self._listar_segmentos():
+            linhas = self._contar_linhas_arquivo(caminho)
+            self._linhas_log += linhas
+            self._segmento_atual, self._linhas_segmento = caminho, linhas
+        # Estado dos arquivos como o processo os deixou (ver alterado_externamente)
+        self._assinatura_conhecida = self._ler_assinatura()
+
+    def migrar(self):
+        """
+        Migra o CSV antigo na primeira execução (base ainda vazia).
+
+        Chamado na inicialização da API, e não ao criar o store, para que
+        importar o módulo não leia nem grave arquivos de dados.
+
+        Returns:
+            int: Produtos importados (0 se não havia o que migrar)
+        """
+        with self._lock:
+            if not self.vazio() or not self.csv_legado or not os.path.exists(self.csv_legado):
+                return 0
+            return self.migrar_csv(self.csv_legado)
+
+    def _listar_segmentos(self):
+        """Lista os segmentos do log em ordem de criação."""
+        return [
+            os.path.join(self.dir_segmentos, nome)
+            for nome in sorted(os.listdir(self.dir_segmentos))
+            if nome.endswith('.jsonl')
+        ]
+
+    def _contar_linhas_base(self):
+        """Conta as linhas da base compactada sem carregar os dados."""
+        if not os.path.exists(self.arquivo_base):
+            return 0
+        try:
+            import pyarrow.parquet as pq
+            return pq.read_metadata(self.arquivo_base).num_rows
+        except Exception as e:
+            logger.warning(f"Não foi possível ler os metadados da base: {e}")
+            return len(pd.read_parquet(self.arquivo_base))
+
+    @staticmethod
+    def _contar_linhas_arquivo(caminho):
+        with open(caminho, 'rb') as f:
+            return sum(1 for linha in f if linha.strip())
+
+    def _novo_segmento(self):
+        """Cria o caminho do próximo segmento do log."""
+        segmentos = self._listar_segmentos()
+        numero = int(os.path.basename(segmentos[-1]).split('.')[0]) + 1 if segmentos else 1
+        return os.path.join(self.dir_segmentos, f"{numero:06d}.jsonl")
+
+    def ao_alterar(self, ouvinte):
+        """
+        Registra uma função chamada a cada alteração da base, ainda dentro do lock.
+
+        O ouvinte recebe (tipo, versao, registros): tipo 'adicionados' traz os
+        registros inseridos; 'compactados' não altera o conteúdo; 'substituidos'
+        indica que a base deve ser relida por inteiro. O ouvinte deve ser rápido
+        e não pode bloquear.
+        """
+        self._ouvintes.append(ouvinte)
+
+    def _notificar(self, tipo, registros=None):
+        self.versao += 1
+        for ouvinte in self._ouvintes:
+            try:
+                ouvinte(tipo, self.versao, registros)
+            except Exception as e:
+                logger.warning(f"Erro ao notificar alteração da base: {e}")
+
+    def _ler_assinatura(self):
+        """{nome: (tamanho, data de modificação)} de cada arquivo da base, lidos do disco."""
+        arquivos = [self.arquivo_base] if os.path.exists(self.arquivo_base) else []
+        arquivos.extend(self._listar_segmentos())
+        assinatura = {}
+        for caminho in arquivos:
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            assinatura[os.path.basename(caminho)] = (info.st_size, info.st_mtime_ns)
+        return assinatura
+
+    def _registrar_arquivo(self, caminho):
+        """Atualiza a assinatura conhecida de um arquivo gravado pelo próprio processo."""
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return
+        self._assinatura_conhecida[os.path.basename(caminho)] = (info.st_size, info.st_mtime_ns)
+
+    def assinatura(self):
+        """Nome, tamanho e data de modificação dos arquivos da base."""
+        with self._lock:
+            return tuple((nome,) + info for nome, info in self._ler_assinatura().items())
+
+    def alterado_externamente(self):
+        """
+        Indica se outro processo alterou os arquivos da base desde a última verificação.
+
+        As escritas do próprio processo mantêm a assinatura conhecida
+        consultando só o arquivo gravado; apenas esta verificação lê a
+        assinatura de todos os arquivos.
+        """
+        with self._lock:
+            atual = self._ler_assinatura()
+            alterado = atual != self._assinatura_conhecida
+            self._assinatura_conhecida = atual
+            return alterado
+
+    def total(self):
+        """Número de linhas gravadas (novas coletas de um produto contam até a compactação)."""
+        return self._linhas_base + self._linhas_log
+
+    def vazio(self):
+        """Indica se ainda não há nenhum produto armazenado."""
+        return self.total() == 0
+
+    def adicionar(self, registro):
+        """Adiciona um produto ao log de inserções."""
+        self.adicionar_varios([registro])
+
+    def adicionar_varios(self, registros):
+        """Adiciona vários produtos ao log de inserções de uma só vez."""
+        if not registros:
+            return
+        with self._lock:
+            linhas = []
+            gravados = []
+            arquivo = None
+            try:
+                for registro in registros:
+                    if self._segmento_atual is None or self._linhas_segmento >= self.linhas_por_segmento:
+                        self._segmento_atual = self._novo_segmento()
+                        self._linhas_segmento = 0
+                    # O segmento é aberto uma vez por lote (e de novo só se o lote passar para o próximo)
+                    if not gravados or gravados[-1] != self._segmento_atual:
+                        if arquivo is not None:
+                            arquivo.close()
+                        arquivo = open(self._segmento_atual, 'a', encoding='utf-8')
+                        gravados.append(self._segmento_atual)
+                    linha = {coluna: registro.get(coluna) for coluna in COLUNAS}
+                    linha['data_coleta'] = normalizar_data(linha['data_coleta'])
+                    linha['sku'] = limpar_sku(linha['sku']) or sku_da_url(linha['url'])
+                    if self._chaves is not None:
+                        self._chaves.add(chave_produto(linha['url'], linha['sku']))
+                    arquivo.write(json.dumps(linha, ensure_ascii=False, default=str) + '\n')
+                    self._linhas_segmento += 1
+                    self._linhas_log += 1
+                    linhas.append(linha)
+            finally:
+                if arquivo is not None:
+                    arquivo.close()
+            for caminho in gravados:
+                self._registrar_arquivo(caminho)
+            self._notificar('adicionados', linhas)
+
+            if self._linhas_log >= max(self.min_linhas_compactacao, self._linhas_base // 2):
+                self.compactar()
+
+    def _ler_segmento(self, caminho):
+        """Lê um segmento do log, ignorando uma eventual linha incompleta no final."""
+        registros = []
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    registros.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    logger.warning(f"Linha inválida ignorada no segmento {caminho}")
+        return registros
+
+    def _carregar_sem_lock(self):
+        partes = []
+        if os.path.exists(self.arquivo_base):
+            partes.append(pd.read_parquet(self.arquivo_base))
+        registros = []
+        for caminho in self._listar_segmentos():
+            registros.extend(self._ler_segmento(caminho))
+        if registros:
+            partes.append(pd.DataFrame.from_records(registros))
+        if not partes:
+            return normalizar_frame(pd.DataFrame(columns=COLUNAS))
+        return deduplicar(normalizar_frame(pd.concat(partes, ignore_index=True)))
+
+    def carregar(self):
+        """Retorna todos os produtos (base + log) como um DataFrame."""
+        with self._lock:
+            return self._carregar_sem_lock()
+
+    def carregar_versionado(self):
+        """Retorna (DataFrame, versão, assinatura) lidos de forma consistente."""
+        with self._lock:
+            assinatura = self._ler_assinatura()
+            self._assinatura_conhecida = dict(assinatura)
+            return self._carregar_sem_lock(), self.versao, tuple((nome,) + info for nome, info in assinatura.items())
+
+    def urls(self):
+        """Retorna o conjunto de URLs já armazenadas."""
+        return set(self.carregar()['url'])
+
+    def _ler_chaves(self):
+        """Lê só as colunas de identificação (url e sku) e monta o conjunto de chaves."""
+        chaves = set()
+        if os.path.exists(self.arquivo_base):
+            import pyarrow.parquet as pq
+            colunas = [c for c in ('url', 'sku') if c in pq.read_schema(self.arquivo_base).names]
+            base = pd.read_parquet(self.arquivo_base, columns=colunas)
+            # SKUs ausentes voltam do Parquet como NaN, que não pode virar chave
+            skus = base['sku'].astype(object).where(base['sku'].notna(), None) if 'sku' in base else [None] * len(base)
+            chaves.update(chave_produto(url, sku) for url, sku in zip(base['url'], skus))
+        for caminho in self._listar_segmentos():
+            chaves.update(chave_produto(r.get('url'), r.get('sku')) for r in self._ler_segmento(caminho))
+        return chaves
+
+    def chaves(self):
+        """
+        Conjunto das chaves (SKU ou, na falta dele, URL) dos produtos armazenados.
+
+        O conjunto é lido do disco uma única vez e mantido a cada inserção;
+        a cópia retornada pode ser alterada por quem chamou.
+        """
+        with self._lock:
+            if self._chaves is None:
+                self._chaves = self._ler_chaves()
+            return set(self._chaves)
+
+    def contem(self, url, sku=None):
+        """Indica, em O(1), se o produto já está armazenado."""
+        with self._lock:
+            if self._chaves is None:
+                self._chaves = self._ler_chaves()
+            return chave_produto(url, sku) in self._chaves
+
+    def compactar(self):
+        """Funde a base e os segmentos do log em um novo arquivo Parquet."""
+        with self._lock:
+            segmentos = self._listar_segmentos()
+            if not segmentos:
+                return
+            df = self._carregar_sem_lock()
+            temporario = self.arquivo_base + '.tmp'
+            df.to_parquet(temporario, index=False)
+            os.replace(temporario, self.arquivo_base)
+            for caminho in segmentos:
+                os.remove(caminho)
+
+            self._linhas_base = len(df)
+            self._linhas_log = 0
+            self._segmento_atual = None
+            self._linhas_segmento = 0
+            self._assinatura_conhecida = self._ler_assinatura()
+            self._notificar('compactados')
+            logger.info(f"Base compactada: {len(df)} produtos em {self.arquivo_base}")
+
+    def migrar_csv(self, caminho_csv=CSV_LEGADO, tamanho_bloco=10000):
+        """
+        Importa um dados_nutricionais.csv no formato antigo para a base.
+
+        O CSV original não é alterado; os produtos são somados ao que já existe,
+        ignorando os que já estão na base (mesmo SKU ou, sem SKU, mesma URL).
+        """
+        with self._lock:
+            logger.info(f"Migrando dados de {caminho_csv} para {self.diretorio}...")
+            blocos = [
+                normalizar_frame(bloco)
+                for bloco in pd.read_csv(caminho_csv, chunksize=tamanho_bloco)
+            ]
+            if not blocos:
+                return 0
+            df_csv = deduplicar(pd.concat(blocos, ignore_index=True))
+
+            df_atual = self._carregar_sem_lock()
+            if len(df_atual):
+                existentes = {chave_produto(url, sku) for url, sku in zip(df_atual['url'], df_atual['sku'])}
+                chaves_csv = [chave_produto(url, sku) for url, sku in zip(df_csv['url'], df_csv['sku'])]
+                df_csv = df_csv[[chave not in existentes for chave in chaves_csv]]
+                df = pd.concat([df_atual, df_csv], ignore_index=True)
+            else:
+                df = df_csv
+            temporario = self.arquivo_base + '.tmp'
+            df.to_parquet(temporario, index=False)
+            os.replace(temporario, self.arquivo_base)
+            for segmento in self._listar_segmentos():
+                os.remove(segmento)
+
+            self._linhas_base = len(df)
+            self._linhas_log = 0
+            self._segmento_atual = None
+            self._linhas_segmento = 0
+            self._chaves = None
+            self._assinatura_conhecida = self._ler_assinatura()
+            self._notificar('substituidos')
+            logger.info(f"Migração concluída: {len(df_csv)} produtos importados")
+            return len(df_csv)
+
+
+# Cria uma instância global do armazenamento
+store = ProductStore()
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 2 and sys.argv[1] == 'migrar':
+        store.migrar_csv(sys.argv[2])
+    else:
+        logger.info("Uso: python product_store.py migrar <arquivo.csv>")
@@ -0,0 +1,123 @@
+import os
+import asyncio
+from collections import deque
+from scraping_log import logger
+
+# Intervalo (segundos) entre os envios de lotes de log para o frontend
+INTERVALO_PROGRESSO = float(os.getenv('INTERVALO_PROGRESSO', '0.25'))
+
+# Quantas mensagens recentes ficam guardadas para clientes que reconectam
+HISTORICO_PROGRESSO = int(os.getenv('HISTORICO_PROGRESSO', '500'))
+
+
+class BarramentoProgresso:
+    """
+    Agrupa as mensagens de progresso da coleta antes de enviá-las ao frontend.
+
+    Em vez de um emit por mensagem, as mensagens publicadas são acumuladas e
+    enviadas em um único lote ('log_batch') a cada `intervalo` segundos. As
+    estatísticas vão como delta: só as chaves que mudaram desde o último
+    lote. Cada mensagem recebe um número de sequência e as últimas
+    `capacidade` ficam em um buffer circular, de onde um cliente que
+    reconecta recupera, em uma única resposta, o que perdeu.
+
+    Os métodos devem ser chamados de dentro do loop de eventos.
+    """
+
+    def __init__(self, emitir, intervalo=INTERVALO_PROGRESSO, capacidade=HISTORICO_PROGRESSO):
+        """
+        Args:
+            emitir: Corrotina chamada com (evento, dados) para enviar um lote
+        """
+        self.emitir = emitir
+        self.intervalo = intervalo
+        self.sequencia = 0
+        self._historico = deque(maxlen=capacidade)
+        self._pendentes = []
+        self._descartadas = 0
+        self._estatisticas = {}
+        self._estatisticas_alteradas = set()
+        self._tarefa = None
+
+    def publicar(self, mensagem, estatisticas=None):
+        """
+        Enfileira uma mensagem de log para o próximo lote.
+
+        Args:
+            mensagem: Dicionário com message, type, timestamp e campos opcionais
+            estatisticas: Estatísticas da coleta; só as alterações são enviadas
+        """
+        self.sequencia += 1
+        mensagem = dict(mensagem, seq=self.sequencia)
+        self._historico.append(mensagem)
+        self._pendentes.append(mensagem)
+        # Um lote nunca passa do tamanho do histórico: o excesso seria descartado pelo navegador
+        if len(self._pendentes) > self._historico.maxlen:
+            del self._pendentes[0]
+            self._descartadas += 1
+
+        for chave, valor in (estatisticas or {}).items():
+            if self._estatisticas.get(chave, object()) != valor:
+                self._estatisticas[chave] = valor
+                self._estatisticas_alteradas.add(chave)
+
+        self._garantir_envio()
+
+    def _garantir_envio(self):
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.get_running_loop().create_task(self._enviar_periodicamente())
+
+    async def _enviar_periodicamente(self):
+        # Encerra quando não há mais nada a enviar; a próxima publicação reinicia a tarefa
+        while self._pendentes or self._estatisticas_alteradas:
+            await asyncio.sleep(self.intervalo)
+            await self.descarregar()
+
+    async def descarregar(self):
+        """Envia imediatamente o que estiver pendente."""
+        if not self._pendentes and not self._estatisticas_alteradas:
+            return
+        lote = {
+            'seq': self.sequencia,
+            'logs': self._pendentes,
+            'estatisticas': {chave: self._estatisticas[chave] for chave in self._estatisticas_alteradas}
+        }
+        if self._descartadas:
+            lote['descartadas'] = self._descartadas
+        self._pendentes = []
+        self._descartadas = 0
+        self._estatisticas_alteradas = set()
+        try:
+            await self.emitir('log_batch', lote)
+        except Exception as e:
+            logger.warning(f"Erro ao enviar lote de progresso: {e}")
+
+    def sincronizar(self, ultima_sequencia=0):
+        """
+        Tudo o que um cliente precisa para se atualizar após (re)conectar.
+
+        Args:
+            ultima_sequencia: Sequência da última mensagem que o cliente recebeu
+
+        Returns:
+            dict com as mensagens posteriores ainda no histórico, as
+            estatísticas completas e `completo`, False se parte das mensagens
+            perdidas já saiu do histórico
+        """
+        logs = [mensagem for mensagem in self._historico if mensagem['seq'] > ultima_sequencia]
+        primeira_guardada = self._historico[0]['seq'] if self._historico else self.sequencia + 1
+        return {
+            'seq': self.sequencia,
+            'logs': logs,
+            'estatisticas': dict(self._estatisticas),
+            'completo': ultima_sequencia + 1 >= primeira_guardada
+        }
+
+    def reiniciar_estatisticas(self):
+        """Esquece as estatísticas da coleta anterior (o histórico de mensagens é mantido)."""
+        self._estatisticas = {}
+        self._estatisticas_alteradas = set()
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
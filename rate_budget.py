@@ -0,0 +1,54 @@
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+from scraping_log import logger
+
+# Requisições por segundo permitidas em cada domínio (0 desliga o limite)
+REQUISICOES_POR_SEGUNDO = float(os.getenv('REQUISICOES_POR_SEGUNDO', '2'))
+
+# Requisições que podem sair de uma vez antes de o ritmo ser imposto
+RAJADA_REQUISICOES = int(os.getenv('RAJADA_REQUISICOES', '4'))
+
+
+class OrcamentoHosts:
+    """
+    Ritmo máximo de requisições por domínio, compartilhado entre as threads.
+
+    Funciona como um balde de fichas: até `rajada` requisições saem de uma
+    vez e depois o ritmo fica em `por_segundo`. Cada chamada reserva a sua
+    vez antes de esperar, então threads concorrentes não furam a fila.
+    """
+
+    def __init__(self, por_segundo=REQUISICOES_POR_SEGUNDO, rajada=RAJADA_REQUISICOES):
+        self.por_segundo = por_segundo
+        self.rajada = max(1, rajada)
+        self._lock = threading.Lock()
+        self._proxima_vez = {}
+
+    def aguardar(self, url):
+        """
+        Bloqueia até a requisição para `url` caber no orçamento do domínio.
+
+        Returns:
+            float: Segundos esperados
+        """
+        if self.por_segundo <= 0:
+            return 0.0
+        host = urlsplit(url).netloc.lower()
+        intervalo = 1.0 / self.por_segundo
+        with self._lock:
+            agora = time.monotonic()
+            vez = max(self._proxima_vez.get(host, agora), agora)
+            espera = max(0.0, vez - (self.rajada - 1) * intervalo - agora)
+            self._proxima_vez[host] = vez + intervalo
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+
+# Cria uma instância global do orçamento de requisições
+orcamento_hosts = OrcamentoHosts()
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,177 @@
+import os
+import json
+import threading
+from scraping_log import logger
+
+# Bloqueio de recursos ligado/desligado (BLOQUEIO_RECURSOS=0 desliga)
+BLOQUEIO_ATIVO = os.getenv('BLOQUEIO_RECURSOS', '1') != '0'
+
+# Padrões de URL (curingas do Network.setBlockedURLs) por grupo de recursos
+GRUPOS_BLOQUEIO = {
+    'imagens': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+    'fontes': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+    'midia': ['*.mp4', '*.webm', '*.mp3', '*.m3u8', '*.ogg'],
+    'rastreadores': [
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*googleadservices.com*', '*googlesyndication.com*', '*connect.facebook.net*',
+        '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*', '*criteo.*',
+        '*taboola.com*', '*outbrain.com*', '*tiktok.com*', '*bing.com/bat*',
+        '*nr-data.net*', '*newrelic.com*', '*segment.io*', '*dynatrace*'
+    ],
+    'estilos': ['*.css']
+}
+
+# Grupos bloqueados em cada etapa da coleta (sobrescritos por BLOQUEIO_<PERFIL>=grupo1,grupo2)
+PERFIS_BLOQUEIO = {
+    'categoria': os.getenv('BLOQUEIO_CATEGORIA', 'imagens,fontes,midia,rastreadores').split(','),
+    'produto': os.getenv('BLOQUEIO_PRODUTO', 'imagens,fontes,midia,rastreadores').split(',')
+}
+
+# Tamanho médio estimado por tipo de recurso bloqueado (bytes), para o relatório
+TAMANHO_MEDIO = {
+    'Image': 45_000,
+    'Font': 35_000,
+    'Media': 500_000,
+    'Script': 60_000,
+    'Stylesheet': 25_000,
+    'XHR': 2_000,
+    'Fetch': 2_000,
+    'Other': 5_000
+}
+
+
+def padroes_do_perfil(perfil):
+    """Lista os padrões de URL bloqueados em um perfil."""
+    padroes = []
+    for grupo in PERFIS_BLOQUEIO.get(perfil, []):
+        padroes.extend(GRUPOS_BLOQUEIO.get(grupo.strip(), []))
+    return padroes
+
+
+def aplicar_perfil(driver, perfil):
+    """
+    Aplica no navegador o perfil de bloqueio da etapa ('categoria' ou 'produto').
+
+    Como os navegadores são reaproveitados entre etapas, o perfil é trocado via
+    CDP sem reiniciar o Chrome. Não faz nada se o perfil já estiver aplicado.
+    """
+    if not BLOQUEIO_ATIVO or getattr(driver, '_perfil_bloqueio', None) == perfil:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': padroes_do_perfil(perfil)})
+        driver._perfil_bloqueio = perfil
+        # Descarta o log de rede da etapa anterior para não contabilizá-lo neste perfil
+        driver.get_log('performance')
+        logger.debug(f"Perfil de bloqueio '{perfil}' aplicado")
+    except Exception as e:
+        logger.warning(f"Não foi possível aplicar o perfil de bloqueio '{perfil}': {e}")
+
+
+class EconomiaRecursos:
+    """Acumula requisições e bytes economizados pelo bloqueio, por perfil."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._perfis = {}
+
+    def registrar(self, perfil, relatorio):
+        with self._lock:
+            dados = self._perfis.setdefault(perfil, {
+                'paginas': 0,
+                'requisicoes_bloqueadas': 0,
+                'bytes_economizados_estimados': 0,
+                'requisicoes_carregadas': 0,
+                'bytes_transferidos': 0
+            })
+            dados['paginas'] += 1
+            for chave in relatorio:
+                if chave in dados:
+                    dados[chave] += relatorio[chave]
+
+    def resumo(self):
+        """Totais e médias por página de cada perfil."""
+        with self._lock:
+            resumo = {}
+            for perfil, dados in self._perfis.items():
+                paginas = max(dados['paginas'], 1)
+                resumo[perfil] = dict(dados, **{
+                    'requisicoes_bloqueadas_por_pagina': round(dados['requisicoes_bloqueadas'] / paginas, 1),
+                    'bytes_economizados_por_pagina': int(dados['bytes_economizados_estimados'] / paginas)
+                })
+            return resumo
+
+
+# Cria uma instância global do acumulador de economia
+economia_recursos = EconomiaRecursos()
+
+
+def ler_log_rede(driver):
+    """
+    Lê (e esvazia) o log de performance do Chrome.
+
+    Returns:
+        list: Eventos do CDP ({'method': ..., 'params': {...}}) na ordem em que ocorreram
+    """
+    try:
+        entradas = driver.get_log('performance')
+    except Exception:
+        return []
+    eventos = []
+    for entrada in entradas:
+        try:
+            eventos.append(json.loads(entrada['message'])['message'])
+        except (KeyError, ValueError, TypeError):
+            continue
+    return eventos
+
+
+def registrar_pagina(driver, perfil, eventos=None):
+    """
+    Lê o log de rede da página carregada e contabiliza o que foi bloqueado.
+
+    O log de performance do Chrome é esvaziado a cada leitura, então esta
+    função deve ser chamada uma vez por página. Quem já leu parte do log da
+    página (ex.: a descoberta da API do catálogo) repassa esses eventos em
+    `eventos` para que também sejam contabilizados.
+
+    Returns:
+        dict: Requisições bloqueadas, bytes economizados (estimados),
+        requisições carregadas e bytes transferidos na página
+    """
+    relatorio = {
+        'requisicoes_bloqueadas': 0,
+        'bytes_economizados_estimados': 0,
+        'requisicoes_carregadas': 0,
+        'bytes_transferidos': 0
+    }
+    # O log é esvaziado mesmo sem bloqueio, para não acumular eventos no navegador
+    novos_eventos = ler_log_rede(driver)
+    if not BLOQUEIO_ATIVO:
+        return relatorio
+    eventos = list(eventos or []) + novos_eventos
+
+    tipos = {}
+    for mensagem in eventos:
+        metodo = mensagem.get('method')
+        params = mensagem.get('params', {})
+        if metodo == 'Network.requestWillBeSent':
+            tipos[params.get('requestId')] = params.get('type', 'Other')
+        elif metodo == 'Network.loadingFinished':
+            relatorio['requisicoes_carregadas'] += 1
+            relatorio['bytes_transferidos'] += int(params.get('encodedDataLength', 0))
+        elif metodo == 'Network.loadingFailed' and params.get('blockedReason'):
+            tipo = params.get('type') or tipos.get(params.get('requestId'), 'Other')
+            relatorio['requisicoes_bloqueadas'] += 1
+            relatorio['bytes_economizados_estimados'] += TAMANHO_MEDIO.get(tipo, TAMANHO_MEDIO['Other'])
+
+    economia_recursos.registrar(perfil, relatorio)
+    logger.debug(
+        f"Bloqueio '{perfil}': {relatorio['requisicoes_bloqueadas']} requisições "
+        f"(~{relatorio['bytes_economizados_estimados'] // 1024} KB) economizadas"
+    )
+    return relatorio
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -4,7 +4,15 @@ from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 import pandas as pd
 from browser_config import configurar_driver
+from driver_lease import driver_manager
 from scraping_log import logger
+from product_store import store
+from url_frontier import sku_da_url
+from page_readiness import aguardar_tabela_nutricional
+from resource_blocking import aplicar_perfil, registrar_pagina as registrar_economia
+from nutrition_extraction import SCRIPT_EXTRACAO
+from html_extractor import extrair_sem_navegador
+from rate_budget import orcamento_hosts
 import time
 from datetime import datetime
 import re
@@ -14,29 +22,46 @@ import os
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
+
+# Modo de extração padrão:
+#   auto       - tenta o HTML estático e usa o navegador apenas se falhar
+#   estatico   - apenas HTML estático, sem abrir o navegador
+#   navegador  - sempre usa o navegador
+MODO_EXTRACAO = os.getenv('MODO_EXTRACAO', 'auto')
+
+# No modo auto, após esta quantidade de falhas seguidas do HTML estático o
+# scraper passa a usar direto o navegador (o site provavelmente mudou)
+LIMITE_FALHAS_ESTATICAS = 20
 
 class Scraper:
-    def __init__(self):
+    def __init__(self, modo_extracao=None):
         self.driver = None
         self.cancelado = False
-        self.configurar_driver()
+        self.modo_extracao = modo_extracao or MODO_EXTRACAO
+        self.falhas_estaticas_seguidas = 0
+        # No modo navegador o driver é aberto já na criação; nos outros, só se precisar
+        if self.modo_extracao == 'navegador':
+            self.configurar_driver()
     
     def cancelar(self):
         """Marca o scraper para cancelamento"""
         self.cancelado = True
-        self.fechar_driver()
+        # Fecha o navegador para interromper uma página em carregamento
+        driver, self.driver = self.driver, None
+        driver_manager.descartar(driver)
     
     def configurar_driver(self):
-        """Inicializa o driver do navegador."""
+        """Obtém um navegador do gerenciador de navegadores."""
         if not self.driver:
-            self.driver = configurar_driver()
+            self.driver = driver_manager.adquirir()
         return self.driver
     
     def fechar_driver(self):
-        """Fecha o driver do navegador."""
+        """Devolve o navegador ao gerenciador para ser reaproveitado."""
         if self.driver:
-            self.driver.quit()
-            self.driver = None
+            driver, self.driver = self.driver, None
+            driver_manager.devolver(driver)
 
     def extrair_nome_da_url(self, url):
         """Extrai o nome do produto da URL."""
@@ -75,140 +100,14 @@ class Scraper:
             return None
             
         try:
-            if not self.driver:
-                self.configurar_driver()
-
             logger.info(f"Processando URL: {url}")
-            self.driver.get(url)
-            time.sleep(10)  # Espera a página carregar
-
-            # Executa o JavaScript para extrair os dados
-            resultado = self.driver.execute_script("""
-                // Mapeamento de nomes alternativos para nomes padronizados
-                const mapaNomes = {
-                    'valor calórico': 'calorias',
-                    'valor energético': 'calorias',
-                    'calorias': 'calorias',
-                    'energia': 'calorias',
-                    'kcal': 'calorias',
-                    'carboidrato': 'carboidratos',
-                    'carboidratos totais': 'carboidratos',
-                    'carboidratos': 'carboidratos',
-                    'proteína': 'proteinas',
-                    'proteínas': 'proteinas',
-                    'gordura total': 'gorduras',
-                    'gorduras totais': 'gorduras',
-                    'gordura': 'gorduras',
-                    'gorduras': 'gorduras',
-                    'gordura saturada': 'gorduras_saturadas',
-                    'gorduras saturadas': 'gorduras_saturadas',
-                    'fibra': 'fibras',
-                    'fibras': 'fibras',
-                    'fibra alimentar': 'fibras',
-                    'fibras alimentares': 'fibras',
-                    'sódio': 'sodio',
-                    'açúcar': 'acucares',
-                    'açúcares': 'acucares',
-                    'açucares': 'acucares',
-                    'acucar': 'acucares',
-                    'açucar': 'acucares'
-                };
-
-                // Função para padronizar o nome do item
-                function padronizarNome(nome) {
-                    nome = nome.toLowerCase().trim();
-                    return mapaNomes[nome] || nome;
-                }
-
-                // Função para extrair apenas o valor numérico
-                function extrairValorNumerico(texto) {
-                    const match = texto.match(/(\\d+[,.]?\\d*)/);
-                    if (match) {
-                        // Substitui vírgula por ponto para garantir formato numérico
-                        return match[1].replace(',', '.');
-                    }
-                    return "0";
-                }
-
-                // Extrai o nome do produto
-                const nome = document.querySelector('h1')?.textContent?.trim() || "Sem informação";
-
-                // Extrai a porção
-                let porcao = "0";
-                const elementos = document.querySelectorAll('*');
-                for (const elemento of elementos) {
-                    const texto = elemento.textContent;
-                    if (texto.toLowerCase().includes('porção') || texto.toLowerCase().includes('porcao')) {
-                        console.log('Texto com porção:', texto);
-                        const match = texto.match(/[Pp]or[cç][aã]o\\s+(?:de\\s+)?(\\d+)\\s*(?:g|G|gr|GR|grama|gramas|GRAMAS)(?:\\s*[-]\\s*.*)?/);
-                        if (match) {
-                            porcao = match[1];
-                            console.log('Porção encontrada:', porcao);
-                            break;
-                        }
-                    }
-                }
-
-                // Inicializa dados com valores zerados
-                const dados = {
-                    nome: nome,
-                    url: window.location.href,
-                    porcao: porcao,
-                    calorias: "0",
-                    carboidratos: "0",
-                    proteinas: "0",
-                    gorduras: "0",
-                    gorduras_saturadas: "0",
-                    fibras: "0",
-                    acucares: "0",
-                    sodio: "0"
-                };
-
-                // Procura por tabelas e elementos que podem conter informações nutricionais
-                document.querySelectorAll('table').forEach(tabela => {
-                    const linhas = tabela.querySelectorAll('tr');
-                    linhas.forEach(linha => {
-                        const colunas = linha.querySelectorAll('td, th');
-                        if (colunas.length >= 2) {
-                            const textoColuna = colunas[0].textContent.trim();
-                            const valorColuna = colunas[1].textContent.trim();
-                            
-                            Object.keys(mapaNomes).forEach(nomeAlternativo => {
-                                if (textoColuna.toLowerCase().includes(nomeAlternativo.toLowerCase())) {
-                                    const nomePadronizado = padronizarNome(nomeAlternativo);
-                                    const valorNumerico = extrairValorNumerico(valorColuna);
-                                    if (valorNumerico !== "0") {
-                                        dados[nomePadronizado] = valorNumerico;
-                                    }
-                                }
-                            });
-                        }
-                    });
-                });
-
-                // Procura também por elementos de texto
-                document.querySelectorAll('*').forEach(elemento => {
-                    const texto = elemento.textContent?.trim();
-                    if (!texto) return;
-
-                    Object.keys(mapaNomes).forEach(nomeAlternativo => {
-                        if (texto.toLowerCase().includes(nomeAlternativo.toLowerCase())) {
-                            const padrao = new RegExp(`${nomeAlternativo}[:\\s]*(\\d+[,.]?\\d*)`, 'i');
-                            const match = texto.match(padrao);
-                            if (match) {
-                                const valorNumerico = match[1].replace(',', '.');
-                                const nomePadronizado = padronizarNome(nomeAlternativo);
-                                if (dados[nomePadronizado] === "0") {
-                                    dados[nomePadronizado] = valorNumerico;
-                                }
-                            }
-                        }
-                    });
-                });
-
-                console.log("Dados extraídos:", dados);
-                return dados;
-            """)
+            resultado = None
+            
+            if self.modo_extracao in ('auto', 'estatico'):
+                resultado = self.extrair_sem_navegador(url)
+            
+            if resultado is None and self.modo_extracao in ('auto', 'navegador') and not self.cancelado:
+                resultado = self.extrair_com_navegador(url)
 
             if resultado:
                 logger.info(f"Dados extraídos com sucesso para: {resultado['nome']}")
@@ -222,11 +121,14 @@ class Scraper:
                             'gorduras_saturadas', 'fibras', 'acucares', 'sodio']:
                     resultado[chave] = float(resultado[chave])
                 
+                # SKU do produto, usado como chave na base
+                resultado['sku'] = sku_da_url(resultado['url']) or sku_da_url(url)
+                
                 # Adiciona data de coleta
                 data_coleta = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 
-                # Cria DataFrame com os dados já no formato final
-                df_novo = pd.DataFrame([{
+                # Grava o produto no armazenamento append-only
+                store.adicionar({
                     'nome': resultado['nome'],
                     'url': resultado['url'],
                     'porcao': resultado['porcao'],
@@ -239,21 +141,9 @@ class Scraper:
                     'acucares': resultado['acucares'],
                     'sodio': resultado['sodio'],
                     'data_coleta': data_coleta,
-                    'categoria': categoria if categoria else 'Não especificada'
-                }])
-                
-                # Verifica se o arquivo já existe
-                if os.path.exists('dados_nutricionais.csv'):
-                    # Lê o CSV existente
-                    df_existente = pd.read_csv('dados_nutricionais.csv')
-                    
-                    # Apenas adiciona o novo registro (não substitui)
-                    df_final = pd.concat([df_existente, df_novo], ignore_index=True)
-                else:
-                    df_final = df_novo
-                
-                # Salva no CSV
-                df_final.to_csv('dados_nutricionais.csv', index=False)
+                    'categoria': categoria if categoria else 'Não especificada',
+                    'sku': resultado['sku']
+                })
                 
                 return resultado
             else:
@@ -264,6 +154,50 @@ class Scraper:
             logger.error(f"Erro ao processar URL {url}: {str(e)}")
             return None
 
+    def extrair_sem_navegador(self, url):
+        """Extrai os dados do HTML estático da página, sem abrir o navegador."""
+        resultado = extrair_sem_navegador(url)
+        if resultado:
+            self.falhas_estaticas_seguidas = 0
+            logger.info("Dados extraídos do HTML estático")
+            return resultado
+        
+        self.falhas_estaticas_seguidas += 1
+        if self.modo_extracao == 'auto' and self.falhas_estaticas_seguidas >= LIMITE_FALHAS_ESTATICAS:
+            logger.warning(
+                f"HTML estático falhou {self.falhas_estaticas_seguidas} vezes seguidas; "
+                "usando apenas o navegador a partir de agora"
+            )
+            self.modo_extracao = 'navegador'
+        return None
+
+    def extrair_com_navegador(self, url):
+        """Carrega a página no navegador e executa o script de extração."""
+        driver = self.configurar_driver()
+        
+        try:
+            aplicar_perfil(driver, 'produto')
+            orcamento_hosts.aguardar(url)
+            driver.get(url)
+            # Espera a tabela nutricional aparecer (ou a página estabilizar sem ela)
+            if not aguardar_tabela_nutricional(driver):
+                logger.info("Tabela nutricional não encontrada após a página estabilizar")
+            
+            # Executa o JavaScript para extrair os dados
+            resultado = driver.execute_script(SCRIPT_EXTRACAO)
+            registrar_economia(driver, 'produto')
+        except WebDriverException:
+            # Navegador travado: descarta para que o próximo produto use outro
+            if self.driver is driver:
+                self.driver = None
+            driver_manager.descartar(driver)
+            raise
+        
+        # Devolve o navegador gasto para ser reciclado
+        if driver_manager.registrar_pagina(driver):
+            self.fechar_driver()
+        return resultado
+
     def processar_arquivo_urls(self, arquivo_urls):
         """
         Processa um arquivo CSV contendo URLs dos produtos.
@@ -280,9 +214,6 @@ class Scraper:
             # Lista para armazenar os dados coletados
             dados_coletados = []
             
-            # Configura e abre o navegador
-            driver = self.configurar_driver()
-            
             # Processa cada URL
             for idx, row in df_urls.iterrows():
                 try:
@@ -292,11 +223,7 @@ class Scraper:
                     # Log detalhado do progresso
                     logging.info(f"Coletando dados do produto: {nome} ({idx + 1} de {total_produtos})")
                     
-                    # Acessa a URL do produto
-                    driver.get(url)
-                    time.sleep(3)  # Espera o carregamento
-                    
-                    # Coleta os dados nutricionais
+                    # Acessa a página e coleta os dados nutricionais
                     dados = self.extrair_dados_nutricionais(url)
                     if dados:
                         dados['URL'] = url
@@ -310,14 +237,8 @@ class Scraper:
             # Fecha o navegador
             self.fechar_driver()
             
-            # Cria o DataFrame com os dados coletados
+            # Cada produto já é gravado no armazenamento por extrair_dados_nutricionais
             if dados_coletados:
-                df_dados = pd.DataFrame(dados_coletados)
-                
-                # Salva os dados
-                modo_arquivo = 'a' if os.path.exists('dados_nutricionais.csv') else 'w'
-                df_dados.to_csv('dados_nutricionais.csv', mode=modo_arquivo, header=(modo_arquivo == 'w'), index=False)
-                
                 logging.info(f"Dados coletados com sucesso para {len(dados_coletados)} produtos")
             else:
                 logging.warning("Nenhum dado foi coletado")
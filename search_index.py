@@ -0,0 +1,135 @@
+import re
+import bisect
+import unicodedata
+from array import array
+import numpy as np
+from scraping_log import logger
+
+RE_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Palavras muito comuns em nomes de produtos que não ajudam na busca
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'na', 'no',
+    'nas', 'nos', 'com', 'sem', 'para', 'pra', 'por', 'um', 'uma', 'ao', 'mais'
+}
+
+# Plurais do português reduzidos ao singular (ordem importa: sufixos maiores primeiro)
+SUFIXOS_PLURAL = [
+    ('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'),
+    ('uis', 'ul'), ('res', 'r'), ('zes', 'z'), ('ns', 'm'), ('s', '')
+]
+
+
+def remover_acentos(texto):
+    """Remove acentos e cedilha ('Pão de Açúcar' -> 'Pao de Acucar')."""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def radical(token):
+    """Reduz o plural de um termo ao singular (ex.: 'paes' -> 'pao', 'biscoitos' -> 'biscoito')."""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    for sufixo, troca in SUFIXOS_PLURAL:
+        # 'paes' -> 'pao' tem radical de uma letra; os demais precisam de pelo menos duas
+        if token.endswith(sufixo) and len(token) - len(sufixo) >= (1 if troca == 'ao' else 2):
+            return token[:-len(sufixo)] + troca
+    return token
+
+
+def tokenizar(texto):
+    """Quebra o texto em termos normalizados: sem acento, minúsculos, no singular e sem stopwords."""
+    termos = RE_TOKEN.findall(remover_acentos(str(texto)).lower())
+    return [radical(termo) for termo in termos if termo not in STOPWORDS]
+
+
+class IndiceInvertido:
+    """
+    Índice invertido de um campo de texto, por posição da linha na base.
+
+    Cada termo aponta para as posições (em ordem crescente) das linhas que o
+    contêm. O vocabulário ordenado permite buscar por prefixo, de modo que
+    'choc' encontra 'chocolate' enquanto o usuário ainda digita. Linhas novas
+    são adicionadas no fim, sem reconstruir o índice.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._vocabulario = []
+        self.total = 0
+
+    def adicionar(self, textos, inicio=None):
+        """Indexa os textos a partir da posição `inicio` (por padrão, o fim do índice)."""
+        inicio = self.total if inicio is None else inicio
+        # Textos repetidos (ex.: categorias) são quebrados em termos uma única vez
+        termos_por_texto = {}
+        for deslocamento, texto in enumerate(textos):
+            posicao = inicio + deslocamento
+            termos = termos_por_texto.get(texto)
+            if termos is None:
+                termos = termos_por_texto[texto] = set(tokenizar(texto))
+            for termo in termos:
+                lista = self._postings.get(termo)
+                if lista is None:
+                    lista = self._postings[termo] = array('q')
+                    bisect.insort(self._vocabulario, termo)
+                lista.append(posicao)
+        self.total = max(self.total, inicio + len(textos))
+
+    def _termos_com_prefixo(self, prefixo):
+        i = bisect.bisect_left(self._vocabulario, prefixo)
+        while i < len(self._vocabulario) and self._vocabulario[i].startswith(prefixo):
+            yield self._vocabulario[i]
+            i += 1
+
+    def buscar(self, consulta):
+        """
+        Busca as linhas que contêm todos os termos da consulta (cada um como prefixo).
+
+        Returns:
+            (posições, pontuações) em arrays numpy, com as posições em ordem
+            crescente. Um termo igual ao da consulta vale 2 pontos e um termo
+            que apenas começa com ele vale 1. Retorna None se a consulta não
+            tiver nenhum termo indexável (ex.: só stopwords).
+        """
+        termos_consulta = list(dict.fromkeys(tokenizar(consulta)))
+        if not termos_consulta:
+            return None
+
+        posicoes = pontuacao = None
+        for termo_consulta in termos_consulta:
+            partes, pesos = [], []
+            for termo in self._termos_com_prefixo(termo_consulta):
+                lista = np.frombuffer(self._postings[termo], dtype=np.int64)
+                partes.append(lista)
+                pesos.append(np.full(len(lista), 2.0 if termo == termo_consulta else 1.0))
+            if not partes:
+                return np.empty(0, dtype=np.int64), np.empty(0)
+
+            encontradas = np.concatenate(partes)
+            peso = np.concatenate(pesos)
+            del partes
+            # Uma linha com vários termos do mesmo prefixo fica com o maior peso
+            ordem = np.lexsort((-peso, encontradas))
+            encontradas, indices = np.unique(encontradas[ordem], return_index=True)
+            peso = peso[ordem][indices]
+
+            if posicoes is None:
+                posicoes, pontuacao = encontradas, peso
+            else:
+                posicoes, i1, i2 = np.intersect1d(posicoes, encontradas, assume_unique=True, return_indices=True)
+                pontuacao = pontuacao[i1] + peso[i2]
+            if not len(posicoes):
+                break
+        return posicoes, pontuacao
+
+
+def construir_indice(textos):
+    """Cria um índice invertido com todos os textos, a partir da posição 0."""
+    indice = IndiceInvertido()
+    indice.adicionar(list(textos), 0)
+    return indice
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+import api
+from product_store import ProductStore
+from dataset_cache import DatasetCache
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    """Cliente da API sobre uma base temporária, sem os eventos de inicialização (navegadores)."""
+    store = ProductStore(str(tmp_path), csv_legado=None)
+    store.adicionar_varios([
+        {
+            'nome': f'Produto {i}', 'url': f'https://www.paodeacucar.com/produto/{7000 + i}/item',
+            'calorias': i, 'categoria': 'Mercearia',
+            # Datas repetidas: a ordem por data precisa do desempate pelo id
+            'data_coleta': f'2024-01-0{1 + i % 4} 10:00:00'
+        }
+        for i in range(23)
+    ])
+    dataset = DatasetCache(store)
+    monkeypatch.setattr(api, 'store', store)
+    monkeypatch.setattr(api, 'dataset', dataset)
+    return TestClient(api.app)
+
+
+def test_cursores_percorrem_a_listagem_nos_dois_sentidos(cliente):
+    paginas, params = [], {'limit': 5}
+    while True:
+        resposta = cliente.get('/api/produtos', params=params).json()
+        assert resposta['total'] == 23
+        paginas.append([produto['id'] for produto in resposta['produtos']])
+        if not resposta['proximo_cursor']:
+            break
+        params = {'limit': 5, 'cursor': resposta['proximo_cursor']}
+
+    ids = [produto_id for pagina in paginas for produto_id in pagina]
+    assert sorted(ids) == list(range(7000, 7023))
+    assert [len(pagina) for pagina in paginas] == [5, 5, 5, 5, 3]
+
+    # Da última página, cursor_anterior devolve a penúltima
+    anterior = cliente.get('/api/produtos', params={'limit': 5, 'cursor': resposta['cursor_anterior']}).json()
+    assert [produto['id'] for produto in anterior['produtos']] == paginas[-2]
+
+
+def test_cursor_invalido(cliente):
+    assert cliente.get('/api/produtos', params={'cursor': 'nao-e-um-cursor'}).status_code == 400
+
+
+def test_304_com_if_none_match_igual(cliente):
+    primeira = cliente.get('/api/produtos')
+    etag = primeira.headers['etag']
+    assert primeira.status_code == 200 and primeira.headers['cache-control'] == 'no-cache'
+
+    revalidada = cliente.get('/api/produtos', headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304
+    assert revalidada.content == b''
+    assert revalidada.headers['etag'] == etag
+    assert cliente.get('/api/produtos', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+    assert cliente.get('/api/produtos', headers={'If-Modified-Since': primeira.headers['last-modified']}).status_code == 304
+
+    # Um produto novo muda a versão: o mesmo ETag volta a receber o conteúdo
+    api.store.adicionar({
+        'nome': 'Novo', 'url': 'https://www.paodeacucar.com/produto/7999/novo',
+        'data_coleta': '2024-02-01 10:00:00'
+    })
+    atualizada = cliente.get('/api/produtos', headers={'If-None-Match': etag})
+    assert atualizada.status_code == 200
+    assert atualizada.headers['etag'] != etag
+    assert atualizada.json()['total'] == 24
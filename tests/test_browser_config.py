@@ -0,0 +1,33 @@
+import os
+import browser_config
+
+
+def versao_nao_consultada(binario):
+    raise AssertionError('a versão do navegador não deveria ser consultada')
+
+
+def test_cache_do_driver_reaproveitado_enquanto_o_binario_nao_muda(tmp_path, monkeypatch):
+    monkeypatch.setattr(browser_config, 'CACHE_DRIVER', str(tmp_path / '.driver_cache.json'))
+    monkeypatch.setattr(browser_config, '_configuracao_em_memoria', None)
+    driver, binario = tmp_path / 'chromedriver', tmp_path / 'chrome'
+    driver.write_text('')
+    binario.write_text('')
+    configuracao = {
+        'driver_path': str(driver), 'binario': str(binario),
+        'mtime_binario': os.path.getmtime(binario), 'versao_chrome': 'Google Chrome 131'
+    }
+    browser_config.salvar_cache_driver(configuracao)
+
+    # Outro processo: lê do arquivo sem consultar a versão do navegador
+    monkeypatch.setattr(browser_config, '_configuracao_em_memoria', None)
+    monkeypatch.setattr(browser_config, 'versao_chrome', versao_nao_consultada)
+    assert browser_config.obter_configuracao_cache() == configuracao
+
+    # Navegador atualizado: o cache deixa de valer
+    monkeypatch.setattr(browser_config, '_configuracao_em_memoria', None)
+    os.utime(binario, (0, 0))
+    monkeypatch.setattr(browser_config, 'versao_chrome', lambda binario: 'Google Chrome 132')
+    assert browser_config.obter_configuracao_cache() is None
+
+    browser_config.invalidar_cache_driver()
+    assert not os.path.exists(browser_config.CACHE_DRIVER)
@@ -0,0 +1,46 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+from catalog_api import EndpointCatalogo, produtos_do_json
+
+BASE = 'https://www.paodeacucar.com/categoria/alimentos'
+
+
+def test_lista_com_mais_produtos_na_resposta():
+    resposta = {
+        'menu': [{'url': '/produto/1/destaque', 'name': 'Destaque'}],
+        'data': {'products': [
+            {'name': 'Leite', 'urlDetails': '/produto/10/leite'},
+            {'title': 'Café', 'link': 'https://www.paodeacucar.com/produto/11/cafe'},
+            {'name': 'Banner', 'image': '/img/banner.png'},
+        ]}
+    }
+    assert produtos_do_json(resposta, BASE) == [
+        ('https://www.paodeacucar.com/produto/10/leite', 'Leite'),
+        ('https://www.paodeacucar.com/produto/11/cafe', 'Café'),
+    ]
+
+
+def test_paginacao_por_pagina_na_query_string():
+    endpoint = EndpointCatalogo.da_requisicao(
+        {'method': 'GET', 'url': 'https://api.site.com/busca?q=x&page=1', 'headers': {'Accept': 'application/json', 'Cookie': 'a=1'}},
+        [('u', 'n')], BASE
+    )
+    assert endpoint.tipo == 'pagina' and endpoint.cabecalhos == {'Accept': 'application/json'}
+    url, corpo = endpoint.requisicao(2)
+    assert parse_qs(urlsplit(url).query) == {'q': ['x'], 'page': ['3']} and corpo is None
+
+
+def test_paginacao_por_deslocamento_no_corpo_graphql():
+    corpo = json.dumps({'query': '{...}', 'variables': {'from': 0, 'to': 23, 'categoria': 'alimentos'}})
+    produtos = [(f'u{i}', 'n') for i in range(24)]
+    endpoint = EndpointCatalogo.da_requisicao({'method': 'POST', 'url': 'https://api.site.com/graphql', 'postData': corpo}, produtos, BASE)
+
+    assert (endpoint.local, endpoint.tipo, endpoint.passo) == ('variables', 'deslocamento', 24)
+    # O fim da faixa anda junto com o início
+    url, corpo = endpoint.requisicao(2)
+    assert json.loads(corpo)['variables'] == {'from': 48, 'to': 71, 'categoria': 'alimentos'}
+
+
+def test_requisicao_sem_paginacao_reconhecida():
+    assert EndpointCatalogo.da_requisicao({'method': 'GET', 'url': 'https://api.site.com/busca?q=x'}, [], BASE) is None
+    assert EndpointCatalogo.da_requisicao({'method': 'POST', 'url': 'https://api.site.com/', 'postData': 'x=1'}, [], BASE) is None
@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from category_scheduler import AgendadorCategorias
+from url_collector import URLCollector
+
+
+def test_categorias_entregues_na_ordem_de_conclusao():
+    duracoes = {'a': 0.15, 'b': 0.05, 'c': 0.01, 'd': 0.02}
+    concluidas = []
+    simultaneas = [0, 0]
+
+    async def coletar(categoria, coletor):
+        simultaneas[0] += 1
+        simultaneas[1] = max(simultaneas)
+        await asyncio.sleep(duracoes[categoria])
+        simultaneas[0] -= 1
+        if categoria == 'd':
+            raise RuntimeError('falhou')
+        return {'encontrados': len(categoria)}
+
+    async def executar():
+        agendador = AgendadorCategorias(
+            coletar, lambda categoria, resultado, erro: concluidas.append((categoria, resultado, erro)),
+            max_simultaneas=2
+        )
+        agendador.iniciar(list(duracoes))
+        while agendador.pendentes():
+            await asyncio.sleep(0.01)
+
+    asyncio.run(executar())
+
+    # 'b' termina antes de 'a'; 'c' e 'd' só começam quando uma vaga abre
+    assert [categoria for categoria, _, _ in concluidas] == ['b', 'c', 'd', 'a']
+    assert simultaneas[1] == 2
+    assert concluidas[0][1:] == ({'encontrados': 1}, None)
+    _, resultado, erro = concluidas[2]
+    assert resultado is None and isinstance(erro, RuntimeError)
+
+
+def test_erro_do_coletor_chega_ao_agendador():
+    coletor = URLCollector()
+    coletor.inicializar_driver = lambda: None
+
+    # Sem ao_lote o erro vira uma lista vazia; com ao_lote ele é propagado
+    assert coletor.coletar_urls('https://www.paodeacucar.com/categoria/alimentos/leite') == []
+    with pytest.raises(Exception, match='driver'):
+        coletor.coletar_urls('https://www.paodeacucar.com/categoria/alimentos/leite', ao_lote=lambda lote: None)
@@ -0,0 +1,18 @@
+from crawl_journal import CrawlJournal
+
+
+def test_produto_com_falha_volta_na_retomada(tmp_path):
+    caminho = str(tmp_path / 'diario.jsonl')
+    diario = CrawlJournal(caminho)
+    diario.iniciar('teste', ['1'], 2)
+    diario.registrar_produto('https://x.com/produto/1/ok', True)
+    diario.registrar_produto('https://x.com/produto/2/falha', False)
+    diario.fechar()
+
+    # A retomada compacta o diário; uma segunda retomada lê o arquivo compactado
+    for _ in range(2):
+        retomado = CrawlJournal(caminho)
+        assert retomado.iniciar('teste', ['1'], 2)
+        assert retomado.concluido('https://x.com/produto/1/ok')
+        assert not retomado.concluido('https://x.com/produto/2/falha')
+        retomado.fechar()
@@ -0,0 +1,56 @@
+import io
+import os
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from product_store import normalizar_frame
+from data_export import CacheExcel, gerar_parquet, ler_arquivo
+
+
+def test_parquet_exporta_produtos_com_sku():
+    # O sku é uma coluna de objetos: com e sem valor no mesmo arquivo
+    df = normalizar_frame(pd.DataFrame([
+        {'nome': 'Leite', 'url': 'https://www.paodeacucar.com/produto/298933/leite', 'calorias': 60,
+         'data_coleta': '2024-01-01 10:00:00', 'categoria': 'Laticínios'},
+        {'nome': 'Sem SKU', 'url': 'https://www.paodeacucar.com/outro/sem-sku', 'calorias': 10,
+         'data_coleta': '2024-01-02 10:00:00', 'categoria': 'Outros'}
+    ]))
+
+    conteudo = b''.join(gerar_parquet(df, np.arange(len(df))))
+    tabela = pq.read_table(io.BytesIO(conteudo))
+
+    assert tabela.num_rows == 2
+    assert tabela.column('sku').to_pylist() == ['298933', None]
+
+
+def test_planilha_em_download_sobrevive_a_outra_exportacao(tmp_path):
+    df = normalizar_frame(pd.DataFrame([
+        {'nome': f'Produto {i}', 'url': f'https://www.paodeacucar.com/produto/{i}/item', 'calorias': i,
+         'data_coleta': '2024-01-01 10:00:00', 'categoria': 'Mercearia'}
+        for i in range(1, 200)
+    ]))
+    cache = CacheExcel(str(tmp_path), max_arquivos=1)
+
+    conteudo = ler_arquivo(cache.obter(df, np.arange(len(df)), 1, (None, None)))
+    # Outra geração apaga a planilha antes que a resposta comece a ser enviada
+    cache.obter(df, np.arange(10), 2, ('leite', None)).close()
+    assert len(os.listdir(tmp_path)) == 1
+
+    planilha = b''.join(conteudo)
+    assert pd.read_excel(io.BytesIO(planilha)).shape[0] == len(df)
+
+
+def test_nome_da_planilha_estavel_entre_processos(tmp_path):
+    codigo = (
+        "from data_export import CacheExcel; "
+        f"print(CacheExcel({str(tmp_path)!r})._nome(3, ('leite', 'Laticínios')))"
+    )
+    nomes = {
+        subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, cwd=tmp_path,
+                       env=dict(os.environ, PYTHONHASHSEED=semente, DADOS_DIR=str(tmp_path),
+                                PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))).stdout
+        for semente in ('1', '2')
+    }
+    assert len(nomes) == 1 and nomes != {''}
@@ -0,0 +1,97 @@
+import os
+import numpy as np
+import pandas as pd
+from product_store import ProductStore, normalizar_data
+from dataset_cache import DatasetCache, chave_data, ordem_recente
+
+
+def produto(numero, nome='Produto', data='2024-01-01 10:00:00', calorias=10):
+    return {
+        'nome': nome, 'url': f'https://www.paodeacucar.com/produto/{numero}/item', 'calorias': calorias,
+        'data_coleta': data, 'categoria': 'Mercearia'
+    }
+
+
+def ids_da_listagem(cache, **filtros):
+    ids, cursor, total = [], None, None
+    while True:
+        _, _, pagina, total, cursor, _ = cache.listar_pagina(limite=7, cursor=cursor, **filtros)
+        ids.extend(pagina.tolist())
+        if cursor is None:
+            return ids, total
+
+
+def test_nova_coleta_do_mesmo_sku_substitui_o_produto(tmp_path):
+    store = ProductStore(str(tmp_path), csv_legado=None)
+    cache = DatasetCache(store)
+    store.adicionar_varios([produto(1000 + i, data=f'2024-01-01 10:{i:02d}:00') for i in range(30)])
+    cache.obter()
+
+    store.adicionar(produto(1000, nome='Produto Recoletado', data='2024-02-01 10:00:00', calorias=99))
+
+    ids, total = ids_da_listagem(cache)
+    assert total == 30
+    assert sorted(ids) == list(range(1000, 1030))
+    # A nova coleta é a mais recente e traz os valores atualizados
+    assert ids[0] == 1000
+    frame, posicao = cache.obter_por_id(1000)
+    assert frame.iloc[posicao]['calorias'] == 99
+    assert ids_da_listagem(cache, nome='recoletado') == ([1000], 1)
+
+    # A compactação e uma nova leitura mantêm só a última gravação
+    store.compactar()
+    assert len(store.carregar()) == 30
+    assert ids_da_listagem(DatasetCache(store)) == (ids, 30)
+
+
+def test_listagem_por_cursor_passa_por_todas_as_linhas(tmp_path):
+    store = ProductStore(str(tmp_path), csv_legado=None)
+    cache = DatasetCache(store)
+    # Datas repetidas: o desempate pelo id precisa manter a ordem total
+    store.adicionar_varios([produto(2000 + i, data=f'2024-01-0{1 + i % 3} 10:00:00') for i in range(40)])
+
+    ids, total = ids_da_listagem(cache)
+    assert total == 40
+    assert sorted(ids) == list(range(2000, 2040))
+
+    # Voltando pelos cursores da página anterior, as páginas são as mesmas
+    _, _, primeira, _, proximo, _ = cache.listar_pagina(limite=7)
+    _, _, segunda, _, _, previo = cache.listar_pagina(limite=7, cursor=proximo)
+    _, _, de_volta, _, _, _ = cache.listar_pagina(limite=7, cursor=previo, anterior=True)
+    assert de_volta.tolist() == primeira.tolist()
+    assert not set(primeira.tolist()) & set(segunda.tolist())
+
+
+def test_escritas_do_processo_nao_releem_a_assinatura(tmp_path, monkeypatch):
+    store = ProductStore(str(tmp_path), csv_legado=None, linhas_por_segmento=1, min_linhas_compactacao=1000)
+    cache = DatasetCache(store, intervalo_verificacao=0)
+    store.adicionar_varios([produto(3000 + i) for i in range(20)])
+    cache.obter()
+    geracao = cache.geracao
+
+    chamadas = []
+    stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda caminho, *args, **kwargs: chamadas.append(caminho) or stat(caminho, *args, **kwargs))
+    store.adicionar(produto(3020))
+    monkeypatch.undo()
+    # Só o segmento gravado é consultado, não os outros 20
+    assert len(chamadas) == 1
+
+    # A escrita do próprio processo é anexada, sem recarregar a base
+    cache.obter()
+    assert cache.geracao == geracao + 1
+    assert len(cache.obter()) == 21
+
+    # Outro processo (aqui, outra instância do store) grava na mesma base
+    ProductStore(str(tmp_path), csv_legado=None, linhas_por_segmento=1).adicionar(produto(3021))
+    assert len(cache.obter()) == 22
+
+
+def test_ordem_da_coleta_mais_recente_com_datas_em_formatos_mistos():
+    datas = pd.Series(pd.to_datetime(['2024-01-02 10:00:00', None, '2024-03-01 08:00:00', '2024-01-02 10:00:00']))
+    ids = np.array([40, 10, 30, 20])
+    # Mais recente primeiro, empate desfeito pelo id e linha sem data no fim
+    assert ordem_recente(chave_data(datas), ids).tolist() == [2, 3, 0, 1]
+
+    assert normalizar_data('2024-03-01T08:00:00-03:00') == '2024-03-01 11:00:00'
+    assert normalizar_data('ontem') is None and normalizar_data('') is None
@@ -0,0 +1,54 @@
+import json
+from html_extractor import extrair_sem_navegador
+
+URL = 'https://www.paodeacucar.com/produto/123/biscoito'
+
+
+def test_tabela_nutricional_do_html_salvo():
+    html = """
+    <html><body>
+      <h1>Biscoito Integral</h1>
+      <script>var calorias = 999;</script>
+      <section>
+        <h2>Tabela nutricional</h2>
+        <p>Porção de 30 g</p>
+        <table>
+          <tr><th>Valor energético</th><td>130 kcal</td></tr>
+          <tr><td>Carboidratos</td><td>20,5 g</td></tr>
+          <tr><td>Gorduras saturadas</td><td>1,2 g</td></tr>
+          <tr><td>Gorduras totais</td><td>4 g</td></tr>
+          <tr><td>Sódio</td><td>95 mg</td></tr>
+        </table>
+      </section>
+    </body></html>
+    """
+    dados = extrair_sem_navegador(URL, html=html)
+
+    assert dados['nome'] == 'Biscoito Integral'
+    assert dados['porcao'] == '30'
+    # O script é ignorado e "gorduras saturadas" não se confunde com "gorduras"
+    assert dados['calorias'] == '130'
+    assert dados['carboidratos'] == '20.5'
+    assert dados['gorduras_saturadas'] == '1.2'
+    assert dados['gorduras'] == '4'
+    assert dados['sodio'] == '95'
+    assert dados['fibras'] == '0'
+
+
+def test_estado_json_quando_o_html_nao_tem_tabela():
+    estado = {
+        'name': 'Leite Integral',
+        'additionalProperty': {'nutrition': [
+            {'label': 'Proteínas', 'value': '6,1'},
+            {'label': 'Carboidratos', 'value': 9},
+        ]}
+    }
+    html = f'<html><body><script type="application/ld+json">{json.dumps(estado)}</script></body></html>'
+    dados = extrair_sem_navegador(URL, html=html)
+
+    assert dados['nome'] == 'Leite Integral'
+    assert (dados['proteinas'], dados['carboidratos']) == ('6.1', '9')
+
+
+def test_pagina_sem_dados_nutricionais():
+    assert extrair_sem_navegador(URL, html='<html><body><h1>Sacola</h1></body></html>') is None
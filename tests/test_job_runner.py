@@ -0,0 +1,50 @@
+import time
+import asyncio
+import threading
+from job_runner import JobRunner
+from scraping_log import logger
+
+
+def test_trabalho_bloqueante_nao_trava_o_loop():
+    runner = JobRunner(max_threads=2)
+    batidas = []
+
+    async def batimento():
+        while True:
+            batidas.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def executar():
+        tarefa = asyncio.create_task(batimento())
+        resultado = await runner.executar(lambda a, b: time.sleep(0.2) or a + b, 1, b=2)
+        tarefa.cancel()
+        return resultado
+
+    assert asyncio.run(executar()) == 3
+    runner.desligar()
+    # O loop continuou batendo enquanto a thread dormia
+    assert len(batidas) >= 10
+
+
+def test_logs_da_thread_chegam_ao_loop():
+    runner = JobRunner(max_threads=2)
+    recebidos = []
+
+    async def ao_log(mensagem, tipo):
+        recebidos.append((mensagem, tipo))
+
+    def trabalho():
+        logger.info('abrindo categoria')
+        logger.warning('sem tabela')
+        return threading.get_ident()
+
+    async def executar():
+        thread = await runner.executar(trabalho, ao_log=ao_log)
+        # Log de outra thread não é encaminhado
+        logger.info('fora do job')
+        await asyncio.sleep(0.05)
+        return thread
+
+    assert asyncio.run(executar()) != threading.get_ident()
+    runner.desligar()
+    assert recebidos == [('abrindo categoria', 'info'), ('sem tabela', 'warning')]
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from product_store import normalizar_frame
+from numeric_index import (
+    construir_indices_numericos, filtrar_faixas, ordenar_pagina, paginar_por_chaves,
+    codificar_cursor, decodificar_cursor
+)
+
+
+def frame_de_teste(quantidade=300):
+    gerador = np.random.default_rng(7)
+    return normalizar_frame(pd.DataFrame({
+        'nome': [f'Produto {i}' for i in range(quantidade)],
+        'url': [f'https://www.paodeacucar.com/produto/{5000 + i}/item' for i in range(quantidade)],
+        # Poucos valores distintos: muitos empates para o desempate pelo id
+        'calorias': gerador.integers(0, 8, quantidade) * 50,
+        'proteinas': gerador.integers(0, 5, quantidade),
+        'porcao': gerador.choice([0, 30, 100], quantidade),
+        'data_coleta': '2024-01-01 10:00:00'
+    }))
+
+
+def test_faixas_pelos_indices_iguais_a_um_filtro_direto():
+    df = frame_de_teste()
+    indices = construir_indices_numericos(df)
+    faixas = {'calorias': (100, 250), 'proteinas': (2, None)}
+    esperado = np.flatnonzero(((df['calorias'] >= 100) & (df['calorias'] <= 250) & (df['proteinas'] >= 2)).to_numpy())
+    assert filtrar_faixas(df, indices, faixas, 'porcao').tolist() == esperado.tolist()
+
+
+def test_cursor_passa_por_todas_as_linhas_na_ordem():
+    df = frame_de_teste()
+    ids = np.arange(5000, 5000 + len(df))
+    posicoes = np.arange(len(df))[::2]
+    ordenacao = [('calorias', True), ('proteinas', False)]
+
+    vistas, cursor = [], None
+    while True:
+        pagina, proximo = ordenar_pagina(df, posicoes, ids, ordenacao, 'porcao', 17, cursor)
+        vistas.extend(pagina.tolist())
+        if proximo is None:
+            break
+        # O cursor vai e volta pela URL como um token opaco
+        cursor = decodificar_cursor(codificar_cursor({'k': proximo}))['k']
+
+    esperado = posicoes[np.lexsort((ids[posicoes], df['proteinas'].to_numpy()[posicoes], -df['calorias'].to_numpy()[posicoes]))]
+    assert vistas == esperado.tolist()
+
+
+def test_paginacao_por_chaves_ordenadas_em_ambas_as_direcoes():
+    gerador = np.random.default_rng(3)
+    primeira = np.sort(gerador.integers(0, 5, 100).astype(float))
+    chaves = [primeira, np.arange(100, dtype=float)]
+
+    inicios, cursor = [], None
+    while True:
+        inicio, fim, proximo, previo = paginar_por_chaves(chaves, 9, cursor)
+        inicios.append(inicio)
+        if proximo is None:
+            break
+        # Voltar uma página a partir desta devolve a anterior
+        if previo is not None:
+            assert paginar_por_chaves(chaves, 9, previo, anterior=True)[:2] == (inicio - 9, inicio)
+        cursor = proximo
+    assert inicios == list(range(0, 100, 9))
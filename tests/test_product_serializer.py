@@ -0,0 +1,29 @@
+import json
+import pandas as pd
+from product_store import normalizar_frame
+from product_serializer import CAMPOS_API, codificar_json, serializar_produtos
+
+
+def test_formato_da_api_com_tipos_nativos():
+    df = normalizar_frame(pd.DataFrame({
+        'nome': ['Leite', 'Pão'],
+        'url': ['https://www.paodeacucar.com/produto/10/leite', 'https://www.paodeacucar.com/produto/11/pao'],
+        'calorias': ['61', None],
+        'data_coleta': ['2024-01-02 10:00:00', 'data inválida']
+    }))
+    produtos = serializar_produtos(df, formato_api=True)
+
+    assert list(produtos[0]) == CAMPOS_API
+    assert produtos[0]['id'] == 0 and produtos[0]['sku'] == '10'
+    assert produtos[0]['calorias'] == produtos[0]['energia'] == 61.0
+    assert produtos[0]['data_coleta'] == '2024-01-02 10:00:00'
+    # Data inválida vira null, número ausente vira 0
+    assert produtos[1]['data_coleta'] is None and produtos[1]['calorias'] == 0.0
+    assert json.loads(codificar_json(produtos)) == produtos
+
+
+def test_ids_estaveis_e_formato_do_modelo():
+    df = normalizar_frame(pd.DataFrame({'nome': ['Leite'], 'url': ['https://www.paodeacucar.com/produto/10/leite']}))
+    assert serializar_produtos(df, formato_api=True, ids=pd.Series([10]).to_numpy())[0]['id'] == 10
+    produto = serializar_produtos(df)[0]
+    assert 'id' not in produto and 'energia' not in produto and produto['nome'] == 'Leite'
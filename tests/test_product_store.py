@@ -0,0 +1,66 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from product_store import ProductStore
+
+
+def produto(numero, nome='Produto', **campos):
+    return dict({
+        'nome': nome, 'url': f'https://www.paodeacucar.com/produto/{numero}/item', 'calorias': 10,
+        'data_coleta': '2024-01-01 10:00:00', 'categoria': 'Mercearia'
+    }, **campos)
+
+
+def test_sku_nan_gravado_com_o_da_url(tmp_path):
+    store = ProductStore(str(tmp_path), csv_legado=None)
+    store.adicionar(produto(123, sku=np.nan))
+
+    # O segmento guarda o SKU da URL, não um NaN
+    with open(store._listar_segmentos()[0], encoding='utf-8') as f:
+        assert json.loads(f.readline())['sku'] == '123'
+
+
+def test_lote_abre_cada_segmento_uma_vez(tmp_path, monkeypatch):
+    store = ProductStore(str(tmp_path), csv_legado=None, linhas_por_segmento=4)
+    abertos = []
+    abrir = open
+    monkeypatch.setattr('builtins.open', lambda caminho, *args, **kwargs: abertos.append(caminho) or abrir(caminho, *args, **kwargs))
+    store.adicionar_varios([produto(100 + i) for i in range(10)])
+    monkeypatch.undo()
+
+    # 10 linhas em segmentos de 4: três arquivos, cada um aberto uma vez
+    assert [os.path.basename(caminho) for caminho in abertos] == ['000001.jsonl', '000002.jsonl', '000003.jsonl']
+    assert sorted(store.carregar()['sku'].astype(int)) == list(range(100, 110))
+
+
+def test_migracao_do_csv_so_quando_pedida(tmp_path):
+    csv = tmp_path / 'dados_nutricionais.csv'
+    pd.DataFrame([produto(200), produto(201), produto(200, nome='Repetido')]).to_csv(csv, index=False)
+
+    store = ProductStore(str(tmp_path / 'dados'), csv_legado=str(csv))
+    assert store.vazio()
+
+    assert store.migrar() == 2
+    assert store.carregar().set_index('sku').loc['200', 'nome'] == 'Repetido'
+    # Com a base preenchida, a migração automática não roda de novo
+    assert store.migrar() == 0
+
+
+def test_compactacao_funde_os_segmentos_na_base(tmp_path):
+    store = ProductStore(str(tmp_path), csv_legado=None, linhas_por_segmento=3, min_linhas_compactacao=10)
+    store.adicionar_varios([produto(300 + i) for i in range(9)])
+    assert len(store._listar_segmentos()) == 3
+    assert not os.path.exists(store.arquivo_base)
+
+    # A décima linha atinge o limite e dispara a compactação
+    store.adicionar(produto(309))
+    assert store._listar_segmentos() == []
+    assert os.path.exists(store.arquivo_base)
+
+    # Um novo processo lê a base compactada e continua gravando no log
+    reaberto = ProductStore(str(tmp_path), csv_legado=None)
+    assert reaberto.total() == 10
+    reaberto.adicionar(produto(310))
+    assert sorted(reaberto.carregar()['sku'].astype(int)) == list(range(300, 311))
+    assert reaberto.contem('https://www.paodeacucar.com/produto/305/outra-url')
@@ -0,0 +1,45 @@
+import asyncio
+from progress_bus import BarramentoProgresso
+
+
+def test_mensagens_agrupadas_em_lotes_com_delta_de_estatisticas():
+    enviados = []
+
+    async def emitir(evento, dados):
+        enviados.append((evento, dados))
+
+    async def executar():
+        barramento = BarramentoProgresso(emitir, intervalo=0.05, capacidade=100)
+        for i in range(10):
+            barramento.publicar({'message': f'm{i}'}, {'sucessos': i // 5, 'falhas': 0})
+        await asyncio.sleep(0.12)
+        barramento.publicar({'message': 'fim'}, {'sucessos': 1, 'falhas': 1})
+        await barramento.descarregar()
+
+    asyncio.run(executar())
+
+    assert [evento for evento, _ in enviados] == ['log_batch', 'log_batch']
+    primeiro, segundo = (dados for _, dados in enviados)
+    # Dez publicações, um único envio
+    assert [mensagem['message'] for mensagem in primeiro['logs']] == [f'm{i}' for i in range(10)]
+    assert primeiro['estatisticas'] == {'sucessos': 1, 'falhas': 0}
+    # Só as estatísticas que mudaram vão no lote seguinte
+    assert segundo['estatisticas'] == {'falhas': 1}
+    assert segundo['seq'] == 11
+
+
+def test_cliente_que_reconecta_recupera_o_que_perdeu():
+    async def emitir(evento, dados):
+        pass
+
+    async def executar():
+        barramento = BarramentoProgresso(emitir, intervalo=10, capacidade=5)
+        for i in range(8):
+            barramento.publicar({'message': f'm{i}'}, {'sucessos': i})
+        return barramento.sincronizar(5), barramento.sincronizar(1)
+
+    recente, antigo = asyncio.run(executar())
+    assert [mensagem['seq'] for mensagem in recente['logs']] == [6, 7, 8]
+    assert recente['completo'] and recente['estatisticas'] == {'sucessos': 7}
+    # As mensagens 2 e 3 já saíram do histórico
+    assert not antigo['completo']
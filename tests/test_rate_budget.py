@@ -0,0 +1,60 @@
+import time
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import html_extractor
+from rate_budget import OrcamentoHosts
+
+
+def test_rajada_e_depois_ritmo_por_dominio():
+    orcamento = OrcamentoHosts(por_segundo=20, rajada=2)
+    inicio = time.monotonic()
+    esperas = [orcamento.aguardar('https://www.paodeacucar.com/produto/1') for _ in range(6)]
+    decorrido = time.monotonic() - inicio
+
+    # As duas primeiras saem na hora; as outras quatro a 1/20 s uma da outra
+    assert esperas[:2] == [0.0, 0.0]
+    assert 0.18 <= decorrido < 0.5
+    # Outro domínio tem o seu próprio orçamento
+    assert orcamento.aguardar('https://outro.com.br/') == 0.0
+
+
+def test_ritmo_dividido_entre_threads():
+    orcamento = OrcamentoHosts(por_segundo=20, rajada=1)
+    threads = [
+        threading.Thread(target=orcamento.aguardar, args=('https://www.paodeacucar.com/',))
+        for _ in range(5)
+    ]
+    inicio = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - inicio >= 0.18
+
+
+class _Pagina(BaseHTTPRequestHandler):
+    def do_GET(self):
+        corpo = b'<html><body>ok</body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_download_sem_navegador_respeita_o_orcamento(monkeypatch):
+    servidor = HTTPServer(('127.0.0.1', 0), _Pagina)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    monkeypatch.setattr(html_extractor, 'orcamento_hosts', OrcamentoHosts(por_segundo=10, rajada=1))
+    url = f'http://127.0.0.1:{servidor.server_port}/produto/1/item'
+    try:
+        inicio = time.monotonic()
+        for _ in range(3):
+            assert 'ok' in html_extractor.baixar_html(url)
+        assert time.monotonic() - inicio >= 0.18
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
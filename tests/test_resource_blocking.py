@@ -0,0 +1,53 @@
+import json
+import resource_blocking
+from resource_blocking import EconomiaRecursos, aplicar_perfil, registrar_pagina
+
+
+class DriverFalso:
+    """Driver sem navegador: guarda os comandos CDP e devolve um log de performance fixo."""
+
+    def __init__(self, eventos=()):
+        self.comandos = []
+        self.log = [{'message': json.dumps({'message': evento})} for evento in eventos]
+
+    def execute_cdp_cmd(self, comando, parametros):
+        self.comandos.append((comando, parametros))
+
+    def get_log(self, tipo):
+        log, self.log = self.log, []
+        return log
+
+
+def test_perfil_aplicado_uma_vez_por_etapa(monkeypatch):
+    monkeypatch.setattr(resource_blocking, 'BLOQUEIO_ATIVO', True)
+    driver = DriverFalso()
+    aplicar_perfil(driver, 'categoria')
+    aplicar_perfil(driver, 'categoria')
+    aplicar_perfil(driver, 'produto')
+
+    bloqueios = [parametros['urls'] for comando, parametros in driver.comandos if comando == 'Network.setBlockedURLs']
+    assert len(bloqueios) == 2
+    assert '*.png' in bloqueios[0] and '*.css' not in bloqueios[0]
+
+
+def test_relatorio_da_pagina_soma_os_eventos_ja_lidos(monkeypatch):
+    monkeypatch.setattr(resource_blocking, 'BLOQUEIO_ATIVO', True)
+    economia = EconomiaRecursos()
+    monkeypatch.setattr(resource_blocking, 'economia_recursos', economia)
+    ja_lidos = [{'method': 'Network.requestWillBeSent', 'params': {'requestId': '1', 'type': 'Image'}}]
+    driver = DriverFalso([
+        {'method': 'Network.loadingFailed', 'params': {'requestId': '1', 'blockedReason': 'inspector'}},
+        {'method': 'Network.loadingFailed', 'params': {'requestId': '2', 'type': 'Font', 'blockedReason': 'inspector'}},
+        {'method': 'Network.loadingFailed', 'params': {'requestId': '3', 'type': 'XHR'}},
+        {'method': 'Network.loadingFinished', 'params': {'requestId': '4', 'encodedDataLength': 1200}},
+    ])
+
+    relatorio = registrar_pagina(driver, 'produto', ja_lidos)
+
+    assert relatorio == {
+        'requisicoes_bloqueadas': 2, 'bytes_economizados_estimados': 45_000 + 35_000,
+        'requisicoes_carregadas': 1, 'bytes_transferidos': 1200
+    }
+    assert economia.resumo()['produto']['paginas'] == 1
+    # O log foi esvaziado: a próxima página começa do zero
+    assert registrar_pagina(driver, 'produto')['requisicoes_bloqueadas'] == 0
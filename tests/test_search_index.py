@@ -0,0 +1,27 @@
+from search_index import construir_indice, tokenizar
+
+
+def test_termos_sem_acento_no_singular_e_sem_stopwords():
+    assert tokenizar('Pães de Açúcar com Biscoitos') == ['pao', 'acucar', 'biscoito']
+
+
+def test_busca_por_prefixo_com_pontuacao():
+    indice = construir_indice(['Pão de chocolate', 'Chocolate amargo', 'Pão francês', 'Leite'])
+
+    assert indice.buscar('paes choc')[0].tolist() == [0]
+
+    posicoes, pontos = indice.buscar('chocolate')
+    assert posicoes.tolist() == [0, 1]
+    # Termo igual vale mais que termo que só começa com a consulta
+    assert pontos.tolist() == [2.0, 2.0]
+    assert indice.buscar('choc')[1].tolist() == [1.0, 1.0]
+
+    assert indice.buscar('de') is None
+    assert indice.buscar('queijo')[0].tolist() == []
+
+
+def test_linhas_novas_entram_no_indice():
+    indice = construir_indice(['Leite integral'])
+    indice.adicionar(['Leite desnatado', 'Iogurte'], 1)
+    assert indice.buscar('leite')[0].tolist() == [0, 1]
+    assert indice.buscar('iog')[0].tolist() == [2]
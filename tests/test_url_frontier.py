@@ -0,0 +1,43 @@
+import threading
+import numpy as np
+import pandas as pd
+from url_frontier import FronteiraURLs, chave_produto, normalizar_url
+
+
+def test_sku_ausente_lido_do_pandas_usa_a_url():
+    url = 'https://www.paodeacucar.com/outro/sem-sku'
+    assert chave_produto(url, np.nan) == url
+    assert chave_produto(url, pd.NA) == url
+    assert chave_produto('https://www.paodeacucar.com/produto/123/leite', np.nan) == '123'
+
+
+def test_mesmo_produto_com_url_diferente_entra_uma_vez():
+    fronteira = FronteiraURLs()
+    assert fronteira.adicionar('https://www.paodeacucar.com/produto/123/biscoito-(aprox--196g)')
+    assert not fronteira.adicionar('https://WWW.paodeacucar.com//produto/123/biscoito-%28aprox--196g%29/?utm=x#topo')
+    # Mesmo SKU em outro slug é o mesmo produto
+    assert not fronteira.adicionar('https://www.paodeacucar.com/produto/123/outro-nome')
+    assert fronteira.contem('https://www.paodeacucar.com/produto/999/novo', sku='123')
+    assert fronteira.adicionar('https://www.paodeacucar.com/produto/124/biscoito')
+    assert len(fronteira) == 2
+
+
+def test_paginas_sem_sku_comparadas_pela_url_canonica():
+    assert normalizar_url('HTTPS://Site.com/busca/?q=leite&b=2#x') == normalizar_url('https://site.com/busca?b=2&q=leite')
+    fronteira = FronteiraURLs([chave_produto('https://site.com/categoria/doces/')])
+    assert fronteira.contem('https://site.com/categoria/doces')
+
+
+def test_threads_concorrentes_nao_duplicam():
+    fronteira = FronteiraURLs()
+    novos = []
+
+    def coletar():
+        novos.append(sum(fronteira.adicionar(f'https://x.com/produto/{i}/item') for i in range(500)))
+
+    threads = [threading.Thread(target=coletar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(novos) == 500 and len(fronteira) == 500
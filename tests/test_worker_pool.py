@@ -0,0 +1,72 @@
+import time
+import threading
+from worker_pool import BrowserWorkerPool
+
+
+class ScraperFalso:
+    """Scraper sem navegador: devolve um resultado fixo e falha nas URLs marcadas."""
+
+    def __init__(self, espera=0.0):
+        self.espera = espera
+
+    def extrair_dados_nutricionais(self, url, categoria):
+        time.sleep(self.espera)
+        if url.endswith('/erro'):
+            raise RuntimeError('falhou')
+        return {'calorias': 10}
+
+    def fechar_driver(self):
+        pass
+
+    def cancelar(self):
+        pass
+
+
+def test_cada_produto_processado_uma_vez():
+    eventos = []
+    lock = threading.Lock()
+
+    def ao_evento(*evento):
+        with lock:
+            eventos.append(evento)
+
+    pool = BrowserWorkerPool(3, ao_evento, criar_scraper=ScraperFalso)
+    urls = [f'https://x.com/produto/{i}' for i in range(30)] + ['https://x.com/produto/30/erro']
+    for url in urls:
+        assert pool.submeter({'url': url})
+    pool.finalizar()
+    pool.aguardar(timeout=5)
+
+    assert not pool.ativo()
+    resultados = {evento[2]['url']: evento[3:5] for evento in eventos if evento[0] == 'resultado'}
+    assert sorted(resultados) == sorted(urls)
+    assert sum(1 for evento in eventos if evento[0] == 'inicio') == len(urls)
+    assert resultados['https://x.com/produto/0'] == ({'calorias': 10}, None)
+    assert isinstance(resultados['https://x.com/produto/30/erro'][1], RuntimeError)
+    assert sum(status['processados'] for status in pool.status()) == len(urls)
+
+
+def test_fila_limitada_segura_quem_enfileira():
+    pool = BrowserWorkerPool(1, criar_scraper=lambda: ScraperFalso(espera=0.02), tamanho_fila=3)
+    tamanhos = []
+    inicio = time.monotonic()
+    for i in range(12):
+        assert pool.submeter({'url': f'https://x.com/produto/{i}'})
+        tamanhos.append(pool.fila.qsize())
+    decorrido = time.monotonic() - inicio
+    pool.finalizar()
+    pool.aguardar(timeout=5)
+
+    # A fila nunca passa do limite; quem enfileira espera o worker liberar espaço
+    assert max(tamanhos) <= 3
+    assert decorrido >= 0.1
+    assert pool.status()[0]['processados'] == 12
+
+
+def test_submeter_desiste_com_o_pool_cancelado():
+    pool = BrowserWorkerPool(1, criar_scraper=lambda: ScraperFalso(espera=1), tamanho_fila=1)
+    pool.submeter({'url': 'https://x.com/produto/1'})
+    pool.submeter({'url': 'https://x.com/produto/2'})
+    threading.Timer(0.1, pool.cancelar).start()
+    # Fila cheia: a espera termina com o cancelamento, sem enfileirar
+    assert not pool.submeter({'url': 'https://x.com/produto/3'})
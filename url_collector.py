@@ -7,20 +7,29 @@ import time
 import pandas as pd
 from datetime import datetime
 import platform
-from browser_config import configurar_driver
+from driver_lease import driver_manager
 from scraping_log import logger
+from url_frontier import FronteiraURLs, normalizar_url, sku_da_url
+from page_readiness import aguardar_cards, aguardar_novos_cards, contar_cards
+from resource_blocking import aplicar_perfil, registrar_pagina as registrar_economia
+from catalog_api import descobrir_endpoint
+from rate_budget import orcamento_hosts
 import re
+from urllib.parse import unquote
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import json
 
-def scroll_ate_o_fim(driver, max_scrolls=None):
+def scroll_ate_o_fim(driver, max_scrolls=None, ao_rolar=None):
     """
     Rola a página até o fim para carregar todos os produtos.
     Retorna False se não houver mais conteúdo para carregar.
+    
+    ao_rolar, se informado, é chamado a cada rolagem que trouxe produtos
+    novos, para que eles sejam aproveitados antes de a página terminar.
     """
     num_scrolls = 0
-    produtos_antes = len(driver.find_elements(By.CSS_SELECTOR, "div[data-testid='product-card'], a[href*='/produto/']"))
+    produtos_antes = contar_cards(driver)
     contagem_mesma_quantidade = 0
     max_tentativas_mesma_quantidade = 3  # Número máximo de vezes que aceitamos ver a mesma quantidade
     ultima_quantidade = produtos_antes
@@ -43,10 +52,9 @@ def scroll_ate_o_fim(driver, max_scrolls=None):
         
         # Executa a rolagem
         driver.execute_script(f"window.scrollTo(0, {proxima_posicao});")
-        time.sleep(5)  # Aumenta o tempo de espera para 5 segundos
         
-        # Conta produtos após a rolagem
-        produtos_depois = len(driver.find_elements(By.CSS_SELECTOR, "div[data-testid='product-card'], a[href*='/produto/']"))
+        # Aguarda novos produtos (ou a página estabilizar sem eles)
+        produtos_depois = aguardar_novos_cards(driver, ultima_quantidade)
         
         # Se a quantidade de produtos não mudou
         if produtos_depois == ultima_quantidade:
@@ -62,6 +70,8 @@ def scroll_ate_o_fim(driver, max_scrolls=None):
             logger.info(f"Novos produtos encontrados: {produtos_depois - ultima_quantidade} (total: {produtos_depois})")
             contagem_mesma_quantidade = 0
             ultima_quantidade = produtos_depois
+            if ao_rolar:
+                ao_rolar()
         
         num_scrolls += 1
         logger.info(f"Rolagem {num_scrolls} - Total de produtos: {produtos_depois}")
@@ -71,114 +81,117 @@ def scroll_ate_o_fim(driver, max_scrolls=None):
             botao_carregar = driver.find_element(By.CSS_SELECTOR, "button[class*='load-more']")
             if botao_carregar.is_displayed():
                 botao_carregar.click()
-                time.sleep(5)  # Aumenta o tempo de espera após clicar no botão
+                aguardar_novos_cards(driver, ultima_quantidade)
                 logger.info("Clicou no botão 'Carregar mais'")
         except:
             pass
 
-def extrair_urls_produtos(driver, max_urls=None, urls_ja_coletadas=None):
+# Seletores dos cards de produto, em ordem de prioridade: vale o primeiro que encontrar algum card
+SELETORES_CARDS = [
+    "div[data-testid='product-card']",  # Novo padrão comum
+    "div.product-card",                  # Classe direta
+    "div[class*='product-card']",        # Classe parcial
+    "div[class*='ProductCard']",         # Variação CamelCase
+    "div.vtex-product-summary-2-x-container",  # Padrão VTEX
+    "div.shelf-product",                 # Padrão antigo
+    "article[data-testid='product-card']",  # Variação com article
+    "a[href*='/produto/']"  # Links diretos de produtos
+]
+
+# Seletores do nome dentro do card, em ordem de prioridade
+SELETORES_NOME = [
+    "h2[class*='product-card__title']",
+    "h2[class*='ProductCard__title']",
+    "span[class*='product-name']",
+    "div[class*='product-name']",
+    "h2",
+    "h3",
+    "span[class*='title']"
+]
+
+# Lê URL e nome de todos os cards em uma única chamada ao navegador, em vez
+# de várias chamadas do WebDriver por card. Retorna o seletor usado e a
+# lista de cards na ordem da página.
+SCRIPT_CARDS = """
+const seletoresCards = arguments[0];
+const seletoresNome = arguments[1];
+for (const seletor of seletoresCards) {
+    const cards = document.querySelectorAll(seletor);
+    if (!cards.length) continue;
+    const produtos = [];
+    for (const card of cards) {
+        const link = (card.href && card.href.includes('/produto/'))
+            ? card
+            : card.querySelector("a[href*='/produto/']");
+        if (!link) continue;
+        let nome = '';
+        for (const seletorNome of seletoresNome) {
+            const elemento = card.querySelector(seletorNome);
+            nome = elemento ? (elemento.innerText || '').trim() : '';
+            if (nome) break;
+        }
+        produtos.push([link.href, nome]);
+    }
+    return [seletor, produtos];
+}
+return [null, []];
+"""
+
+def extrair_urls_produtos(driver, max_urls=None, fronteira=None):
     """
     Extrai todas as URLs e nomes dos produtos da página atual.
     
     Args:
         driver: WebDriver do Selenium
         max_urls: Número máximo de URLs a coletar
-        urls_ja_coletadas: Set de URLs já coletadas para evitar duplicatas
+        fronteira: FronteiraURLs com os produtos já vistos, para evitar duplicatas
     
     Returns:
-        list: Lista de dicionários com 'url' e 'nome' dos produtos
+        list: Lista de dicionários com 'url', 'nome' e 'sku' dos produtos
         bool: True se encontrou produtos novos, False se não
     """
     produtos_info = []
-    urls_ja_coletadas = urls_ja_coletadas or set()
+    fronteira = FronteiraURLs() if fronteira is None else fronteira
     produtos_novos = False
     
-    # Aguarda um pouco mais para garantir que a página carregou completamente
-    time.sleep(5)
+    # Aguarda os cards de produto estarem presentes
+    aguardar_cards(driver)
     
     try:
-        # Primeiro tenta encontrar os produtos usando diferentes seletores comuns
-        selectors = [
-            "div[data-testid='product-card']",  # Novo padrão comum
-            "div.product-card",                  # Classe direta
-            "div[class*='product-card']",        # Classe parcial
-            "div[class*='ProductCard']",         # Variação CamelCase
-            "div.vtex-product-summary-2-x-container",  # Padrão VTEX
-            "div.shelf-product",                 # Padrão antigo
-            "article[data-testid='product-card']",  # Variação com article
-            "a[href*='/produto/']"  # Links diretos de produtos
-        ]
-        
-        cards = None
-        for selector in selectors:
-            logger.debug(f"Tentando seletor: {selector}")
-            cards = driver.find_elements(By.CSS_SELECTOR, selector)
-            if cards:
-                logger.info(f"Encontrados {len(cards)} produtos com seletor: {selector}")
-                break
+        # Todos os cards são lidos de uma vez, com a mesma prioridade de seletores
+        seletor, cards = driver.execute_script(SCRIPT_CARDS, SELETORES_CARDS, SELETORES_NOME)
         
         if not cards:
             logger.info("Nenhum produto encontrado com os seletores disponíveis")
             return [], False
+        logger.info(f"Encontrados {len(cards)} produtos com seletor: {seletor}")
+        
+        for url, nome in cards:
+            url = normalizar_url(url)
             
-        for card in cards:
-            try:
-                # Tenta diferentes maneiras de obter a URL e o nome
-                url = None
-                nome = None
-                
-                # Tenta encontrar a URL
-                if '/produto/' in card.get_attribute('href'):
-                    url = card.get_attribute('href')
-                else:
-                    link = card.find_element(By.CSS_SELECTOR, "a[href*='/produto/']")
-                    url = link.get_attribute('href')
-                
-                # Se a URL já foi coletada, pula
-                if url in urls_ja_coletadas:
-                    continue
-                
-                # Tenta diferentes seletores para o nome
-                nome_selectors = [
-                    "h2[class*='product-card__title']",
-                    "h2[class*='ProductCard__title']",
-                    "span[class*='product-name']",
-                    "div[class*='product-name']",
-                    "h2",
-                    "h3",
-                    "span[class*='title']"
-                ]
-                
-                for nome_selector in nome_selectors:
-                    try:
-                        nome_element = card.find_element(By.CSS_SELECTOR, nome_selector)
-                        nome = nome_element.text.strip()
-                        if nome:
-                            break
-                    except:
-                        continue
-                
-                # Se não encontrou o nome pelos seletores, tenta extrair da URL
-                if not nome and url:
-                    nome = url.split('/')[-1].replace('-', ' ').strip()
-                
-                if url and nome and url not in [p['url'] for p in produtos_info]:
-                    produtos_info.append({
-                        'url': url,
-                        'nome': nome
-                    })
-                    urls_ja_coletadas.add(url)
-                    produtos_novos = True
-                    logger.debug(f"Produto encontrado: {nome} - {url}")
-                
-                # Se atingiu o número máximo de URLs e está no modo teste, para
-                if max_urls and len(produtos_info) >= max_urls:
-                    logger.info(f"Número máximo de URLs atingido ({max_urls})")
-                    break
-                    
-            except Exception as e:
-                logger.error(f"Erro ao extrair informações do produto: {str(e)}")
+            # Se não encontrou o nome pelos seletores, tenta extrair da URL
+            if not nome:
+                nome = unquote(url.split('/')[-1]).replace('-', ' ').strip()
+            if not nome:
                 continue
+            
+            # Se o produto já foi visto (mesmo SKU, ainda que com outra URL), pula
+            sku = sku_da_url(url)
+            if not fronteira.adicionar(url, sku):
+                continue
+            
+            produtos_info.append({
+                'url': url,
+                'nome': nome,
+                'sku': sku
+            })
+            produtos_novos = True
+            logger.debug(f"Produto encontrado: {nome} - {url}")
+            
+            # Se atingiu o número máximo de URLs e está no modo teste, para
+            if max_urls and len(produtos_info) >= max_urls:
+                logger.info(f"Número máximo de URLs atingido ({max_urls})")
+                break
     
         logger.info(f"Total de produtos encontrados nesta página: {len(produtos_info)}")
         
@@ -187,11 +200,65 @@ def extrair_urls_produtos(driver, max_urls=None, urls_ja_coletadas=None):
     
     return produtos_info, produtos_novos
 
+def coletar_pela_api(driver, endpoint, categoria_nome, fronteira, entregar, max_paginas=None, max_urls_por_pagina=None):
+    """
+    Coleta os produtos de uma categoria paginando direto a API de listagem,
+    sem rolar a página.
+    
+    Args:
+        endpoint: EndpointCatalogo encontrado por descobrir_endpoint()
+        fronteira: FronteiraURLs com os produtos já vistos
+        entregar: Função chamada com os produtos novos de cada página
+            ('url', 'nome', 'sku', 'categoria', 'pagina' e 'data_coleta'),
+            assim que a página é lida
+    
+    Returns:
+        int: Quantidade de produtos entregues
+        bool: True se a listagem foi percorrida até o fim; False se a API
+            falhou no meio e a rolagem deve completar a categoria
+    """
+    total = 0
+    try:
+        for pagina, cards in endpoint.paginas(driver, max_paginas):
+            produtos_pagina = []
+            for url, nome in cards:
+                url = normalizar_url(url)
+                if not nome:
+                    nome = unquote(url.split('/')[-1]).replace('-', ' ').strip()
+                sku = sku_da_url(url)
+                if not nome or not fronteira.adicionar(url, sku):
+                    continue
+                produtos_pagina.append({
+                    'url': url,
+                    'nome': nome,
+                    'sku': sku,
+                    'categoria': categoria_nome,
+                    'pagina': pagina,
+                    'data_coleta': datetime.now().isoformat()
+                })
+                if max_urls_por_pagina and len(produtos_pagina) >= max_urls_por_pagina:
+                    break
+            
+            total += len(produtos_pagina)
+            logger.info(f"API - página {pagina}: {len(produtos_pagina)} produtos novos (total: {total})")
+            
+            # Uma página só com produtos já vistos é o fim da listagem; se for
+            # logo a segunda, a API provavelmente ignorou o parâmetro de página
+            if not produtos_pagina:
+                return total, pagina > 2
+            entregar(produtos_pagina)
+    except Exception as e:
+        logger.warning(f"Erro ao paginar a API de listagem: {e}")
+        return total, False
+    
+    return total, True
+
 def coletar_urls_categoria(url_categoria, categoria_nome, max_paginas=None, max_urls_por_pagina=None, max_scrolls=None):
     """Coleta todas as URLs dos produtos de uma categoria."""
-    driver = configurar_driver()
+    driver = driver_manager.adquirir()
+    aplicar_perfil(driver, 'categoria')
     todas_urls = []
-    urls_ja_coletadas = set()
+    fronteira = FronteiraURLs()
     pagina = 1
     paginas_sem_produtos_novos = 0
     max_paginas_sem_produtos = 3  # Se não encontrar produtos novos em 3 páginas seguidas, considera fim da categoria
@@ -214,8 +281,25 @@ def coletar_urls_categoria(url_categoria, categoria_nome, max_paginas=None, max_
             url_paginada = f"{url_base}p={pagina}"
             logger.info(f"Processando página {pagina}: {url_paginada}")
             
+            orcamento_hosts.aguardar(url_paginada)
             driver.get(url_paginada)
-            time.sleep(3)  # Aguarda carregamento inicial
+            driver_manager.registrar_pagina(driver)
+            aguardar_cards(driver)  # Aguarda carregamento inicial
+            
+            # Na primeira página, tenta paginar direto a API de listagem que a página usou
+            eventos_rede = None
+            if pagina == 1:
+                endpoint, eventos_rede = descobrir_endpoint(driver)
+                if endpoint:
+                    _, completo = coletar_pela_api(
+                        driver, endpoint, categoria_nome, fronteira, todas_urls.extend,
+                        max_paginas, max_urls_por_pagina
+                    )
+                    if completo:
+                        registrar_economia(driver, 'categoria', eventos_rede)
+                        logger.info(f"Categoria coletada pela API: {len(todas_urls)} produtos")
+                        break
+                    logger.info("Completando a categoria com a rolagem")
             
             # Rola até o fim para carregar todos os produtos
             tem_mais_conteudo = scroll_ate_o_fim(driver, max_scrolls)
@@ -224,8 +308,9 @@ def coletar_urls_categoria(url_categoria, categoria_nome, max_paginas=None, max_
             produtos_pagina, encontrou_novos = extrair_urls_produtos(
                 driver, 
                 max_urls_por_pagina,
-                urls_ja_coletadas
+                fronteira
             )
+            registrar_economia(driver, 'categoria', eventos_rede)
             
             # Se não encontrou produtos novos, incrementa o contador
             if not encontrou_novos:
@@ -260,7 +345,7 @@ def coletar_urls_categoria(url_categoria, categoria_nome, max_paginas=None, max_
     except Exception as e:
         logger.error(f"Erro ao processar categoria: {e}")
     finally:
-        driver.quit()
+        driver_manager.devolver(driver)
     
     return todas_urls
 
@@ -268,11 +353,18 @@ class URLCollector:
     def __init__(self):
         """Inicializa o coletor de URLs."""
         self.driver = None
+        self.cancelado = False
+        
+    def cancelar(self):
+        """Interrompe a coleta em andamento fechando o navegador."""
+        self.cancelado = True
+        if self.driver:
+            driver_manager.descartar(self.driver)
         
     def inicializar_driver(self):
-        """Inicializa o driver do navegador."""
+        """Obtém um navegador do gerenciador de navegadores."""
         try:
-            self.driver = configurar_driver()
+            self.driver = driver_manager.adquirir()
             if not self.driver:
                 raise Exception("Falha ao configurar o driver")
             return self.driver
@@ -284,22 +376,23 @@ class URLCollector:
         """Rola a página para baixo para carregar mais produtos."""
         try:
             # Rola até o fim da página
+            quantidade = contar_cards(driver)
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)  # Espera o carregamento
+            quantidade = aguardar_novos_cards(driver, quantidade)  # Espera o carregamento
             
             # Verifica se há um botão "Carregar mais" e clica nele
             try:
                 botao_carregar = driver.find_element(By.CSS_SELECTOR, "button[class*='load-more']")
                 if botao_carregar.is_displayed():
                     botao_carregar.click()
-                    time.sleep(2)  # Espera o carregamento após clicar
+                    aguardar_novos_cards(driver, quantidade)  # Espera o carregamento após clicar
             except:
                 pass
                 
         except Exception as e:
             logger.error(f"Erro ao rolar página: {str(e)}")
             
-    def coletar_urls(self, url_categoria, modo_teste=False, categoria_nome=None):
+    def coletar_urls(self, url_categoria, modo_teste=False, categoria_nome=None, ao_lote=None):
         """
         Coleta URLs dos produtos de uma categoria.
         
@@ -307,12 +400,24 @@ class URLCollector:
             url_categoria: URL da categoria para coletar
             modo_teste: Se True, limita a coleta a poucos produtos para teste
             categoria_nome: Nome da categoria para adicionar aos produtos
+            ao_lote: Função opcional chamada com cada lote de produtos novos
+                (uma página da API ou uma rolagem) assim que ele é lido. Pode
+                bloquear para segurar a coleta enquanto os produtos anteriores
+                não forem consumidos. Com ela, os produtos não são acumulados
             
         Returns:
-            list: Lista de URLs coletadas
+            list: Lista de URLs coletadas (vazia quando ao_lote é usado)
+        
+        Raises:
+            Exception: Com ao_lote, os erros da coleta são propagados, para que
+                uma categoria que falhou não pareça uma categoria vazia; sem
+                ele, o erro é registrado no log e a lista volta vazia
         """
         driver = None
         try:
+            if self.cancelado:
+                return []
+            
             # Inicializa o driver
             driver = self.inicializar_driver()
             if not driver:
@@ -339,8 +444,11 @@ class URLCollector:
                     categoria_nome = 'Categoria não informada'
             
             logger.info(f"Acessando categoria: {url_categoria}")
+            aplicar_perfil(driver, 'categoria')
+            orcamento_hosts.aguardar(url_categoria)
             driver.get(url_categoria)
-            time.sleep(5)  # Espera o carregamento inicial
+            driver_manager.registrar_pagina(driver)
+            aguardar_cards(driver)  # Espera o carregamento inicial
             
             # Define limites baseado no modo
             max_scrolls = 2 if modo_teste else None
@@ -348,45 +456,75 @@ class URLCollector:
             
             # Coleta as URLs
             todas_urls = []
-            urls_ja_coletadas = set()
+            fronteira = FronteiraURLs()
+            total = 0
             
-            # Rola a página até o fim ou até atingir o limite
-            tem_mais_conteudo = scroll_ate_o_fim(driver, max_scrolls)
+            def entregar(lote):
+                nonlocal total
+                if not lote or self.cancelado:
+                    return
+                total += len(lote)
+                if ao_lote:
+                    ao_lote(lote)
+                else:
+                    todas_urls.extend(lote)
             
-            # Extrai URLs da página atual
-            urls_pagina, encontrou_novos = extrair_urls_produtos(
-                driver,
-                max_urls=max_urls,
-                urls_ja_coletadas=urls_ja_coletadas
-            )
+            # Tenta paginar direto a API de listagem que a página usou
+            endpoint, eventos_rede = descobrir_endpoint(driver)
+            if endpoint:
+                _, completo = coletar_pela_api(
+                    driver, endpoint, categoria_nome, fronteira, entregar,
+                    max_paginas=1 if modo_teste else None,
+                    max_urls_por_pagina=max_urls
+                )
+                if completo:
+                    registrar_economia(driver, 'categoria', eventos_rede)
+                    logger.info(f"Total de URLs coletadas pela API: {total}")
+                    return todas_urls
+                logger.info("Completando a categoria com a rolagem")
             
-            # Adiciona a categoria e outras informações aos produtos
-            for produto in urls_pagina:
-                produto.update({
-                    'categoria': categoria_nome,
-                    'data_coleta': datetime.now().isoformat()
-                })
+            def extrair_novos():
+                # Só os cards ainda não vistos saem daqui (a fronteira filtra os demais)
+                restante = max_urls - total if max_urls else None
+                if restante is not None and restante <= 0:
+                    return
+                urls_pagina, _ = extrair_urls_produtos(driver, max_urls=restante, fronteira=fronteira)
+                
+                # Adiciona a categoria e outras informações aos produtos
+                for produto in urls_pagina:
+                    produto.update({
+                        'categoria': categoria_nome,
+                        'data_coleta': datetime.now().isoformat()
+                    })
+                entregar(urls_pagina)
+            
+            # Rola a página até o fim ou até atingir o limite, entregando os produtos a cada rolagem
+            extrair_novos()
+            scroll_ate_o_fim(driver, max_scrolls, ao_rolar=extrair_novos)
             
-            todas_urls.extend(urls_pagina)
+            # Extrai o que sobrou na página depois da última rolagem
+            extrair_novos()
+            registrar_economia(driver, 'categoria', eventos_rede)
             
             # Se está no modo teste e já tem URLs suficientes, para
-            if modo_teste and len(todas_urls) >= 5:  # Número fixo para modo teste
+            if modo_teste and total >= 5:  # Número fixo para modo teste
                 logger.info("Modo teste: limite de 5 URLs atingido")
             
-            logger.info(f"Total de URLs coletadas: {len(todas_urls)}")
+            logger.info(f"Total de URLs coletadas: {total}")
             return todas_urls
             
         except Exception as e:
             logger.error(f"Erro ao coletar URLs: {str(e)}")
+            if ao_lote:
+                raise
             return []
             
         finally:
+            # Devolve o navegador para ser reaproveitado na próxima categoria
             if driver:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    logger.error(f"Erro ao fechar o driver: {str(e)}")
+                driver_manager.devolver(driver)
                 driver = None
+                self.driver = None
     
     def salvar_urls_csv(self, urls, nome_arquivo=None):
         """Salva as URLs coletadas em um arquivo CSV."""
@@ -0,0 +1,99 @@
+import re
+import threading
+import pandas as pd
+from urllib.parse import urlsplit, urlunsplit, quote, unquote
+from scraping_log import logger
+
+# Código do produto no site, presente em todas as URLs (/produto/298933/leite-...)
+RE_SKU = re.compile(r'/produto/(\d+)')
+
+# Caracteres mantidos literais no caminho; os slugs têm parênteses, ex.: "(aprox--196g)"
+CARACTERES_CAMINHO = "/-._~()!*'$,;=:@+&"
+
+
+def normalizar_url(url):
+    """
+    Forma canônica de uma URL, para que o mesmo produto não seja visto duas vezes.
+
+    - esquema e domínio em minúsculas, sem fragmento (#...)
+    - caminho com uma única codificação: "%28aprox--196g%29" e "(aprox--196g)" ficam iguais
+    - sem barras duplicadas nem barra no final
+    - páginas de produto sem query string (busca, página, rastreamento);
+      nas demais, os parâmetros ficam em ordem alfabética
+    """
+    url = str(url or '').strip()
+    if not url:
+        return url
+    partes = urlsplit(url)
+    caminho = quote(unquote(partes.path), safe=CARACTERES_CAMINHO)
+    caminho = re.sub(r'/{2,}', '/', caminho)
+    if len(caminho) > 1:
+        caminho = caminho.rstrip('/')
+    if '/produto/' in caminho or not partes.query:
+        consulta = ''
+    else:
+        consulta = '&'.join(sorted(parametro for parametro in partes.query.split('&') if parametro))
+    return urlunsplit((partes.scheme.lower(), partes.netloc.lower(), caminho, consulta, ''))
+
+
+def sku_da_url(url):
+    """Extrai o SKU (código do produto no site) da URL, ou None se a URL não tiver um."""
+    encontrado = RE_SKU.search(str(url or ''))
+    return encontrado.group(1) if encontrado else None
+
+
+def limpar_sku(sku):
+    """SKU como texto, ou None se ausente (inclusive NaN/NA lidos pelo pandas)."""
+    if sku is None or (not isinstance(sku, str) and pd.isna(sku)):
+        return None
+    return str(sku).strip() or None
+
+
+def chave_produto(url, sku=None):
+    """Chave que identifica o produto: o SKU e, na falta dele, a URL canônica."""
+    return limpar_sku(sku) or sku_da_url(url) or normalizar_url(url)
+
+
+class FronteiraURLs:
+    """
+    Produtos já vistos em uma coleta, com consulta e inserção em O(1).
+
+    Os produtos são comparados pela chave de chave_produto(): a mesma página
+    com outra query string, barra no final ou codificação diferente conta
+    como o mesmo produto. Usada em todos os caminhos da coleta (cards de uma
+    página, páginas de uma categoria e as categorias de uma coleta), inclusive
+    por coletores em threads diferentes ao mesmo tempo.
+    """
+
+    def __init__(self, chaves=()):
+        """
+        Args:
+            chaves: Chaves já conhecidas (ex.: ProductStore.chaves())
+        """
+        self._chaves = set(chaves)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def contem(self, url, sku=None):
+        """Indica se o produto já foi visto."""
+        return chave_produto(url, sku) in self._chaves
+
+    def adicionar(self, url, sku=None):
+        """
+        Marca o produto como visto.
+
+        Returns:
+            bool: True se o produto ainda não tinha sido visto
+        """
+        chave = chave_produto(url, sku)
+        with self._lock:
+            if chave in self._chaves:
+                return False
+            self._chaves.add(chave)
+            return True
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")
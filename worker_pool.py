@@ -0,0 +1,186 @@
+import os
+import queue
+import threading
+import time
+from scraper import Scraper
+from scraping_log import logger
+
+# Limite máximo de navegadores simultâneos (cada worker abre o seu próprio Chrome)
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', '4'))
+
+# Produtos aguardando um worker; com a fila cheia, quem enfileira espera (contrapressão)
+TAMANHO_FILA_PRODUTOS = int(os.getenv('TAMANHO_FILA_PRODUTOS', '50'))
+
+
+class BrowserWorker(threading.Thread):
+    """Worker que possui um navegador próprio e consome URLs da fila compartilhada."""
+
+    def __init__(self, worker_id, fila, sem_mais, ao_evento, criar_scraper=Scraper):
+        super().__init__(name=f"browser-worker-{worker_id}", daemon=True)
+        self.worker_id = worker_id
+        self.fila = fila
+        self.sem_mais = sem_mais
+        self.ao_evento = ao_evento
+        self.criar_scraper = criar_scraper
+        self.scraper = None
+        self.cancelado = threading.Event()
+        self.processados = 0
+
+    def cancelar(self):
+        """Interrompe este worker e fecha o seu navegador."""
+        self.cancelado.set()
+        if self.scraper:
+            try:
+                self.scraper.cancelar()
+            except Exception as e:
+                logger.error(f"Erro ao cancelar worker {self.worker_id}: {str(e)}")
+
+    def run(self):
+        try:
+            self.scraper = self.criar_scraper()
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} não conseguiu abrir o navegador: {str(e)}")
+            return
+
+        try:
+            while not self.cancelado.is_set():
+                try:
+                    item = self.fila.get(timeout=0.5)
+                except queue.Empty:
+                    # Fila vazia e nada mais a caminho: o trabalho acabou
+                    if self.sem_mais.is_set():
+                        break
+                    continue
+
+                try:
+                    if self.cancelado.is_set():
+                        continue
+                    self.ao_evento('inicio', self.worker_id, item)
+                    inicio = time.monotonic()
+                    erro = None
+                    try:
+                        resultado = self.scraper.extrair_dados_nutricionais(item['url'], item.get('categoria'))
+                    except Exception as e:
+                        resultado = None
+                        erro = e
+                    self.processados += 1
+                    self.ao_evento('resultado', self.worker_id, item, resultado, erro, time.monotonic() - inicio)
+                finally:
+                    self.fila.task_done()
+        finally:
+            try:
+                self.scraper.fechar_driver()
+            except Exception as e:
+                logger.error(f"Erro ao fechar navegador do worker {self.worker_id}: {str(e)}")
+            logger.info(f"Worker {self.worker_id} finalizado ({self.processados} produtos)")
+
+
+class BrowserWorkerPool:
+    """
+    Pool de workers, cada um com o seu próprio navegador, alimentado por uma
+    fila limitada de URLs de produtos.
+
+    Os navegadores só são abertos quando o primeiro produto é submetido. Com
+    a fila cheia, submeter() espera um worker liberar espaço, o que segura o
+    coletor de URLs no ritmo da extração e mantém a memória constante. Por
+    bloquear, submeter() deve ser chamado de uma thread dedicada à coleta
+    (executor_categorias), nunca do job_runner compartilhado.
+
+    Os eventos são entregues pelo callback ao_evento, chamado a partir das
+    threads dos workers:
+        ao_evento('inicio', worker_id, item)
+        ao_evento('resultado', worker_id, item, resultado, erro, duracao)
+    """
+
+    def __init__(self, num_workers=None, ao_evento=None, criar_scraper=Scraper, tamanho_fila=TAMANHO_FILA_PRODUTOS):
+        self.num_workers = max(1, min(num_workers or MAX_WORKERS, MAX_WORKERS))
+        self.ao_evento = ao_evento or (lambda *args: None)
+        self.criar_scraper = criar_scraper
+        self.fila = queue.Queue(maxsize=max(1, tamanho_fila))
+        self.sem_mais = threading.Event()
+        self.cancelado = threading.Event()
+        self._lock = threading.Lock()
+        self.workers = []
+
+    def iniciar(self):
+        """Cria e inicia os workers (apenas na primeira chamada)."""
+        with self._lock:
+            if self.workers:
+                return
+            logger.info(f"Iniciando pool com {self.num_workers} navegadores")
+            for worker_id in range(1, self.num_workers + 1):
+                worker = BrowserWorker(worker_id, self.fila, self.sem_mais, self.ao_evento, self.criar_scraper)
+                worker.start()
+                self.workers.append(worker)
+
+    def iniciado(self):
+        """Indica se os workers já foram criados."""
+        return bool(self.workers)
+
+    def submeter(self, item):
+        """
+        Coloca uma URL de produto na fila de trabalho, esperando enquanto a fila estiver cheia.
+
+        Returns:
+            bool: False se o pool foi cancelado ou ficou sem workers antes de
+            a URL entrar na fila
+        """
+        self.iniciar()
+        while not self.cancelado.is_set():
+            try:
+                self.fila.put(item, timeout=0.5)
+                # cancelar() esvazia a fila, o que pode liberar esta espera: o item não será processado
+                return not self.cancelado.is_set()
+            except queue.Full:
+                if not self.ativo():
+                    return False
+        return False
+
+    def finalizar(self):
+        """Sinaliza que não há mais URLs; os workers saem quando a fila esvaziar."""
+        self.sem_mais.set()
+
+    def ativo(self):
+        """Indica se ainda há algum worker em execução."""
+        return any(worker.is_alive() for worker in self.workers)
+
+    def cancelar_worker(self, worker_id):
+        """Cancela apenas um worker; os demais continuam consumindo a fila."""
+        for worker in self.workers:
+            if worker.worker_id == worker_id:
+                worker.cancelar()
+                return True
+        return False
+
+    def cancelar(self):
+        """Cancela todos os workers e descarta as URLs pendentes."""
+        self.cancelado.set()
+        for worker in self.workers:
+            worker.cancelar()
+        while True:
+            try:
+                self.fila.get_nowait()
+                self.fila.task_done()
+            except queue.Empty:
+                break
+
+    def aguardar(self, timeout=None):
+        """Aguarda o término de todos os workers."""
+        for worker in self.workers:
+            worker.join(timeout)
+
+    def status(self):
+        """Resumo do estado de cada worker."""
+        return [
+            {
+                'worker_id': worker.worker_id,
+                'ativo': worker.is_alive(),
+                'cancelado': worker.cancelado.is_set(),
+                'processados': worker.processados
+            }
+            for worker in self.workers
+        ]
+
+
+if __name__ == "__main__":
+    logger.info("Este arquivo não deve ser executado diretamente. Use o api.py")